@@ -0,0 +1,32 @@
+import logging
+
+import warnings
+
+from inventory_optim.batch.runner import BatchRunner, read_scenarios_file
+from inventory_optim.data_model.parser import BatchParser
+from inventory_optim.data_model.reader import read_data
+from inventory_optim.data_model.shared_data import SharedDataset
+from inventory_optim.monitoring.logger import create_logger
+from inventory_optim.monitoring.time_runner import TimeRunner
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+def main():
+    args = BatchParser.parse_args()
+    logger = create_logger(logging.INFO)
+    stats = {}
+    scenarios = read_scenarios_file(args['scenarios'])
+    data = TimeRunner.run_and_log(stats, read_data, [args['data']], 'reading_data(s)', 'reading data', logger)
+    dataset = TimeRunner.run_and_log(stats, SharedDataset.publish, [data], 'publishing_data(s)', 'publishing data in shared memory', logger)
+    del data
+    try:
+        runner = BatchRunner(dataset, args['var_col'], args['export_dir'], args['workers'], args['time_limit'], args['check'])
+        report = runner.run(scenarios, logger)
+    finally:
+        dataset.close()
+    logger.info(f"{report['num_scenarios']} scenarios ({report['num_failed']} failed) at {report['scenarios_per_minute']} scenarios/minute")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import itertools
+import json
+import logging
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from timeit import default_timer as timer
+from typing import TypedDict, List
+from inventory_optim.data_model.checker import Checker
+from inventory_optim.data_model.constraint_table import read_problem
+from inventory_optim.data_model.shared_data import SharedDataset
+from inventory_optim.export.exporter import Exporter
+from inventory_optim.monitoring.time_runner import TimeRunner
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+PHASES = ['read_constraint_file(s)', 'create_variables(s)', 'build_model(s)', 'check_constraints(s)', 'solving_time(s)',
+          'export_solution(s)']
+
+
+class Scenario(TypedDict):
+    id: str
+    constraints: str
+    var_incr: float
+    var_decr: float
+    optim_col: str
+    optim_obj: str
+
+
+def read_scenarios_file(filepath: str) -> List[Scenario]:
+    """
+    Read the file describing the scenario grid and expand it into the list of scenarios.
+    Each key holds a list of values (or a single value); scenarios are all the combinations of such values.
+
+    :param filepath: path of the json file describing the scenario grid
+    :return: list of scenarios
+    """
+    grid = json.loads(Path(filepath).read_text())
+    defaults = {'var_incr': 1.5, 'var_decr': .8, 'optim_obj': OBJ_MAX}
+    keys = ['constraints', 'var_incr', 'var_decr', 'optim_col', 'optim_obj']
+    values = [grid.get(k, defaults.get(k)) for k in keys]
+    values = [v if isinstance(v, list) else [v] for v in values]
+    return [
+        Scenario(id=f'scenario_{i:05d}', **dict(zip(keys, combination)))
+        for i, combination in enumerate(itertools.product(*values))
+    ]
+
+
+_dataset = None
+
+
+def _attach_dataset(descriptor: dict) -> None:
+    """
+    Worker initializer: attach to the shared dataset once per worker process.
+
+    :param descriptor: descriptor of the published dataset
+    :return: None
+    """
+    global _dataset
+    _dataset = SharedDataset.attach(descriptor)
+
+
+def run_scenario(scenario: Scenario, var_col: str, export_dir: str, time_limit: int, check: bool) -> dict:
+    """
+    Build, check and solve a scenario on the shared dataset and export its solution and statistics.
+
+    :param scenario: scenario to be run
+    :param var_col: name of the column used as optimization variable
+    :param export_dir: directory where the scenario outputs are written
+    :param time_limit: solver time limit in seconds
+    :param check: flag to check constraints
+    :return: statistics of the scenario
+    """
+    logger = logging.getLogger(scenario['id'])
+    stats = {'scenario': scenario, 'worker': os.getpid()}
+    start = timer()
+    try:
+        data = _dataset.to_frame()
+        mb = ModelBuilder(time_limit)
+        mb.highs_.impl_.setOptionValue('output_flag', False)
+        json_problem = TimeRunner.run_and_log(stats, read_problem, [scenario['constraints']], 'read_constraint_file(s)', 'reading constraint file', logger)
+        errors = Checker.check_schema(data, json_problem['constraints'], json_problem['templates'])
+        assert len(errors) == 0, '; '.join(errors)
+        TimeRunner.run_and_log(stats, mb.create_variables, [data, scenario['var_incr'], scenario['var_decr'], var_col], 'create_variables(s)', 'creating opt variables', logger)
+        TimeRunner.run_and_log(stats, mb.build_model, [data, json_problem['constraints'], scenario['optim_col'], scenario['optim_obj'], ScopeIndex(data), True, True, json_problem['templates']], 'build_model(s)', 'building opt model', logger)
+        if check:
+            stats['violations'] = TimeRunner.run_and_log(stats, Checker.find_violations, [mb.matrix_, mb.col_lower_, mb.col_upper_], 'check_constraints(s)', 'checking constraints and variable boundaries', logger)
+            assert len(stats['violations']) == 0, f"{len(stats['violations'])} constraints incompatible with variable boundaries"
+        is_ok, values = TimeRunner.run_and_log(stats, mb.solve, [], 'solving_time(s)', 'solving the opt problem', logger)
+        assert is_ok, 'no valid solution found'
+        target = os.path.join(export_dir, scenario['id'])
+        TimeRunner.run_and_log(stats, Exporter.export_solution, [os.path.join(target, 'solution.csv'), data, values], 'export_solution(s)', 'exporting solution', logger)
+        mb.populate_statistics(stats)
+        stats['status'] = 'done'
+    except Exception as e:
+        stats['status'], stats['error'] = 'failed', f'{type(e).__name__}: {e}'
+        target = os.path.join(export_dir, scenario['id'])
+    stats['scenario_time(s)'] = timer() - start
+    Exporter.export_statistics(stats, os.path.join(target, 'statistics.json'))
+    return stats
+
+
+def summarize(results: List[dict], wall_time: float) -> dict:
+    """
+    Aggregate the statistics of a batch into a throughput report.
+
+    :param results: statistics of every scenario
+    :param wall_time: wall time of the whole batch in seconds
+    :return: throughput report
+    """
+    report = {
+        'num_scenarios': len(results),
+        'num_failed': sum(r['status'] != 'done' for r in results),
+        'wall_time(s)': wall_time,
+        'scenarios_per_minute': 60 * len(results) / wall_time if wall_time > 0 else None,
+        'phases': {}
+    }
+    for phase in PHASES + ['scenario_time(s)']:
+        times = np.array([r[phase] for r in results if phase in r])
+        if len(times) > 0:
+            report['phases'][phase] = {
+                'total': float(times.sum()),
+                'mean': float(times.mean()),
+                'min': float(times.min()),
+                'p50': float(np.percentile(times, 50)),
+                'p90': float(np.percentile(times, 90)),
+                'max': float(times.max())
+            }
+    return report
+
+
+class BatchRunner:
+    """
+    Run a batch of scenarios over a process pool.
+    The dataset is published once in shared memory and every worker attaches to it at start-up.
+    """
+    def __init__(self, dataset: SharedDataset, var_col: str, export_dir: str, num_workers: int = None,
+                 time_limit: int = 60, check: bool = True) -> None:
+        self.dataset_ = dataset
+        self.var_col_ = var_col
+        self.export_dir_ = export_dir
+        self.num_workers_ = num_workers
+        self.time_limit_ = time_limit
+        self.check_ = check
+
+    def run(self, scenarios: List[Scenario], logger: logging.Logger) -> dict:
+        """
+        Run all the scenarios and export the aggregate report.
+
+        :param scenarios: scenarios to be run
+        :param logger: logger
+        :return: throughput report
+        """
+        start = timer()
+        results = []
+        with ProcessPoolExecutor(self.num_workers_, initializer=_attach_dataset, initargs=(self.dataset_.descriptor_,)) as pool:
+            futures = [
+                pool.submit(run_scenario, s, self.var_col_, self.export_dir_, self.time_limit_, self.check_) for s in scenarios
+            ]
+            for future in as_completed(futures):
+                stats = future.result()
+                results.append(stats)
+                logger.info(f"{stats['scenario']['id']} {stats['status']} in {stats['scenario_time(s)']}s ({len(results)}/{len(scenarios)})")
+        report = summarize(results, timer() - start)
+        Exporter.export_statistics(report, os.path.join(self.export_dir_, 'batch_statistics.json'))
+        return report
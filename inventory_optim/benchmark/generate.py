@@ -0,0 +1,71 @@
+import argparse
+import pandas as pd
+
+from pathlib import Path
+from timeit import default_timer as timer
+from inventory_optim.data_model.constraints import write_constraints_file
+from inventory_optim.data_model.reader import write_npy_chunks
+from inventory_optim.export.exporter import Exporter
+from inventory_optim.util import SyntheticInventoryData, SyntheticConstraints
+
+
+def generate_instance(data_path: str, constraints_path: str, num_rows: int, num_constraints: int = 100,
+                      depth: int = None, margin: float = .1, chunk_size: int = 1_000_000, num_stores: int = 20,
+                      random_seed: int = 17) -> dict:
+    """
+    Stream a synthetic inventory to disk chunk by chunk and write a matching set of nested constraints.
+    Only one chunk and the reference volumes of the feature combinations are held in memory at any time.
+
+    :param data_path: output path of the data, a NPY column directory if it has no extension
+    :param constraints_path: output path of the constraint file
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param depth: nesting depth of the constraints
+    :param margin: relative distance of the bounds from the reference volume
+    :param chunk_size: number of items per chunk
+    :param num_stores: number of stores
+    :param random_seed: random seed
+    :return: summary of the generated instance
+    """
+    start = timer()
+    volumes = []
+
+    def collect_volumes(chunks):
+        for chunk in chunks:
+            volumes.append(SyntheticConstraints.scope_volumes([chunk]))
+            yield chunk
+
+    chunks = collect_volumes(SyntheticInventoryData.generate_chunks(num_rows, chunk_size, random_seed, num_stores))
+    if Path(data_path).suffix == '':
+        write_npy_chunks(chunks, data_path, num_rows)
+    else:
+        Exporter.write_chunks(data_path, chunks)
+    volumes = SyntheticConstraints.scope_volumes([pd.concat(volumes)])
+    constraints = SyntheticConstraints.generate_nested(volumes, num_constraints, depth, margin, random_seed=random_seed)
+    write_constraints_file(constraints, constraints_path)
+    return {
+        'num_rows': num_rows,
+        'num_constraints': len(constraints),
+        'num_combinations': len(volumes),
+        'generation(s)': timer() - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic instance for stress tests')
+    parser.add_argument('--num-rows', help='Number of items in the inventory', type=int, required=True)
+    parser.add_argument('--data', help='Output path of the data: csv (possibly compressed), parquet, arrow or a NPY column directory if it has no extension', required=True)
+    parser.add_argument('--constraints', help='Output path of the constraint file', required=True)
+    parser.add_argument('--num-constraints', help='Number of constraints', type=int, default=100)
+    parser.add_argument('--depth', help='Nesting depth of the constraints (category, region, store)', type=int, choices=[1, 2, 3], default=None)
+    parser.add_argument('--margin', help='Relative distance of the constraint bounds from the reference volume', type=float, default=.1)
+    parser.add_argument('--chunk-size', help='Number of items generated at once', type=int, default=1_000_000)
+    parser.add_argument('--num-stores', help='Number of stores', type=int, default=20)
+    parser.add_argument('--seed', help='Random seed', type=int, default=17)
+    args = parser.parse_args()
+    print(generate_instance(args.data, args.constraints, args.num_rows, args.num_constraints, args.depth, args.margin,
+                            args.chunk_size, args.num_stores, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import numpy as np
+
+from timeit import default_timer as timer
+from inventory_optim.optim_model.aggregation import AggregatedSolver
+from inventory_optim.optim_model.builder import get_constraint_scope, ModelBuilder
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.util import SyntheticInventoryData, SyntheticConstraints
+
+
+def benchmark_scope(num_rows: int, num_constraints: int, random_seed: int = 17) -> dict:
+    """
+    Compare the DataFrame.query scope evaluation with the scope index on a synthetic instance.
+
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param random_seed: random seed
+    :return: dictionary with the timings of both paths
+    """
+    df = SyntheticInventoryData.generate(num_rows, random_seed)
+    constraints = SyntheticConstraints.generate(df, num_constraints, random_seed=random_seed)
+    start = timer()
+    query_scopes = [get_constraint_scope(df, c) for c in constraints]
+    query_time = timer() - start
+    start = timer()
+    index = ScopeIndex(df)
+    index_scopes = [index.get_scope(c) for c in constraints]
+    index_time = timer() - start
+    assert all(np.array_equal(q, i) for q, i in zip(query_scopes, index_scopes))
+    return {
+        'num_rows': num_rows,
+        'num_constraints': num_constraints,
+        'query(s)': query_time,
+        'index(s)': index_time,
+        'speedup': query_time / index_time
+    }
+
+
+def benchmark_build_model(num_rows: int, num_constraints: int, random_seed: int = 17) -> dict:
+    """
+    Compare the row-by-row model assembly with the bulk CSR assembly on a synthetic instance.
+    Both paths share the same scope index, so the difference is due to the model assembly only.
+
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param random_seed: random seed
+    :return: dictionary with the build_model timings of both paths
+    """
+    df = SyntheticInventoryData.generate(num_rows, random_seed)
+    constraints = SyntheticConstraints.generate(df, num_constraints, random_seed=random_seed)
+    index = ScopeIndex(df)
+    res = {'num_rows': num_rows, 'num_constraints': num_constraints}
+    for name, bulk in [('legacy', False), ('bulk', True)]:
+        mb = ModelBuilder()
+        mb.create_variables(df, 1.5, .8, 'quantity')
+        start = timer()
+        mb.build_model(df, constraints, 'gross_profit', 'max', index, bulk)
+        res[f'build_model_{name}(s)'] = timer() - start
+        res[f'nonzero_{name}'] = mb.highs_.impl_.getNumNz()
+    assert res['nonzero_legacy'] == res['nonzero_bulk']
+    res['speedup'] = res['build_model_legacy(s)'] / res['build_model_bulk(s)']
+    return res
+
+
+def benchmark_aggregation(num_rows: int, num_constraints: int, random_seed: int = 17) -> dict:
+    """
+    Compare the solution of the full model with the solution of its aggregation on a synthetic instance.
+    The objective coefficient is the unit price rounded to one decimal, so that interchangeable variables exist and the
+    aggregation is exact.
+
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param random_seed: random seed
+    :return: dictionary with the solving timings and objective values of both models
+    """
+    df = SyntheticInventoryData.generate(num_rows, random_seed)
+    df['price_level'] = df['unit_price'].round(1)
+    constraints = SyntheticConstraints.generate(df, num_constraints, random_seed=random_seed)
+    index = ScopeIndex(df)
+    res = {'num_rows': num_rows, 'num_constraints': num_constraints}
+    for name in ['full', 'aggregated']:
+        mb = ModelBuilder()
+        mb.highs_.impl_.setOptionValue('output_flag', False)
+        mb.create_variables(df, 1.5, .8, 'quantity')
+        mb.build_model(df, constraints, 'price_level', 'max', index, True, name == 'full')
+        solver = mb if name == 'full' else AggregatedSolver(mb)
+        start = timer()
+        is_ok, values = solver.solve()
+        res[f'solving_{name}(s)'] = timer() - start
+        res[f'objective_{name}'] = float(np.dot(mb.col_cost_, values))
+        if name == 'aggregated':
+            res['reduction_ratio'] = solver.statistics_['reduction_ratio']
+    res['speedup'] = res['solving_full(s)'] / res['solving_aggregated(s)']
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling benchmarks')
+    parser.add_argument('--sizes', help='Number of rows of the instances', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5])
+    parser.add_argument('--num-constraints', help='Number of constraints per instance', type=int, default=200)
+    parser.add_argument('--target', help='Benchmarked phase', choices=['scope', 'build_model', 'aggregation'], default='scope')
+    args = parser.parse_args()
+    benchmark = {'scope': benchmark_scope, 'build_model': benchmark_build_model, 'aggregation': benchmark_aggregation}[args.target]
+    results = [benchmark(size, args.num_constraints) for size in args.sizes]
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
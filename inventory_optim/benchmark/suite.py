@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import highspy
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from pathlib import Path
+from typing import List
+from inventory_optim.data_model.reader import write_npy_dir
+from inventory_optim.export.exporter import Exporter
+from inventory_optim.util import SyntheticInventoryData, SyntheticConstraints
+
+
+MAIN_PY = Path(__file__).resolve().parents[2] / 'main.py'
+PHASES = ['read_constraint_file(s)', 'reading_data(s)', 'check_schema(s)', 'coerce_dtypes(s)', 'create_variables(s)',
+          'build_model(s)', 'preprocessing(s)', 'load_model(s)', 'check_constraints(s)', 'screen_constraints(s)',
+          'solving_time(s)', 'export_solution(s)']
+
+
+def write_instance(work_dir: str, num_rows: int, num_constraints: int, num_features: int = None,
+                   data_format: str = 'csv', random_seed: int = 17) -> (str, str):
+    """
+    Generate a synthetic instance and write its data and constraint files.
+
+    :param work_dir: directory of the files
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param num_features: number of features filtered by each constraint, random if not provided
+    :param data_format: format of the input data, either csv or npy
+    :param random_seed: random seed
+    :return: paths of the data and of the constraint file
+    """
+    df = SyntheticInventoryData.generate(num_rows, random_seed)
+    constraints = SyntheticConstraints.generate(df, num_constraints, random_seed=random_seed, num_features=num_features)
+    data_path = os.path.join(work_dir, 'data.csv' if data_format == 'csv' else 'data')
+    df.to_csv(data_path, index=False) if data_format == 'csv' else write_npy_dir(df, data_path)
+    constraints_path = os.path.join(work_dir, 'constraints.json')
+    Path(constraints_path).write_text(json.dumps({'constraints': constraints}))
+    return data_path, constraints_path
+
+
+def run_instance(num_rows: int, num_constraints: int, num_features: int = None, data_format: str = 'csv',
+                 time_limit: int = 600, random_seed: int = 17, main_args: List[str] = None) -> dict:
+    """
+    Generate a synthetic instance, write it to a temporary directory and run main.py on it in a fresh process, so that
+    every stage of the real run is timed (schema check, screening, preprocessing, column projection) and its peak
+    resident set size does not include instance generation.
+
+    :param num_rows: number of items in the inventory
+    :param num_constraints: number of constraints
+    :param num_features: number of features filtered by each constraint, random if not provided
+    :param data_format: format of the input data, either csv or npy
+    :param time_limit: solver time limit in seconds
+    :param random_seed: random seed
+    :param main_args: further arguments of main.py, e.g. ['--preprocess']
+    :return: statistics of the instance
+    """
+    stats = {'num_rows': num_rows, 'num_constraints': num_constraints, 'num_features': num_features,
+             'data_format': data_format, 'main_args': main_args or []}
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path, constraints_path = write_instance(work_dir, num_rows, num_constraints, num_features, data_format, random_seed)
+        statistics_path = os.path.join(work_dir, 'statistics.json')
+        command = [
+            sys.executable, str(MAIN_PY), '--constraints', constraints_path, '--data', data_path,
+            '--var-col', 'quantity', '--optim-col', 'gross_profit', '--time-limit', str(time_limit),
+            '--export-solution', os.path.join(work_dir, 'solution.csv'), '--export-statistics', statistics_path
+        ] + (main_args or [])
+        res = subprocess.run(command, capture_output=True, text=True, cwd=MAIN_PY.parent)
+        run = json.loads(Path(statistics_path).read_text()) if os.path.exists(statistics_path) else {}
+    stats.update({phase: run[phase] for phase in PHASES if phase in run})
+    stats['total(s)'] = sum(run.get(phase, 0.) for phase in PHASES)
+    stats['global_time(s)'] = run.get('global_time(s)')
+    stats['peak_rss(MB)'] = run.get('peak_rss(MB)')
+    stats['nonzero'] = run['lp']['nonzero'] if 'lp' in run else None
+    stats['selectivity'] = stats['nonzero'] / (num_rows * num_constraints) if num_constraints > 0 and 'lp' in run else None
+    stats['num_violations'] = len(run.get('violations', []))
+    stats['status'] = run['solving']['status'] if res.returncode == 0 and 'solving' in run else 'failed'
+    stats['iteration_count'] = run['solving']['iteration_count'] if 'solving' in run else None
+    if res.returncode != 0:
+        stats['error'] = res.stderr.strip().splitlines()[-1] if res.stderr.strip() else f'exit status {res.returncode}'
+    return stats
+
+
+def environment() -> dict:
+    """
+    Describe the machine and the library versions the benchmark ran with.
+
+    :return: dictionary describing the environment
+    """
+    return {
+        'date': datetime.now().strftime("%Y%m%dT%H:%M"),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'highs': highspy.Highs().version()
+    }
+
+
+def cold_start(repeat: int = 3) -> dict:
+    """
+    Measure the start-up cost of the command line, i.e. the time taken by a fresh interpreter to print the help of
+    main.py, and the time taken to import the heaviest modules. The best of repeat runs is reported.
+
+    :param repeat: number of runs per measure
+    :return: dictionary with the timings
+    """
+    commands = {
+        'interpreter(s)': [sys.executable, '-c', 'pass'],
+        'main_help(s)': [sys.executable, str(MAIN_PY), '--help'],
+        'import_checker(s)': [sys.executable, '-c', 'import inventory_optim.data_model.checker'],
+        'import_builder(s)': [sys.executable, '-c', 'import inventory_optim.optim_model.builder']
+    }
+    res = {}
+    for name, command in commands.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, check=True, capture_output=True, cwd=MAIN_PY.parent)
+            times.append(time.perf_counter() - start)
+        res[name] = min(times)
+    return res
+
+
+def run_suite(sizes: List[int], num_constraints: int, num_features: int = None, data_format: str = 'csv',
+              time_limit: int = 600, random_seed: int = 17, main_args: List[str] = None) -> dict:
+    """
+    Run main.py on an instance per size, each run in a fresh process so that its peak memory is measured in isolation.
+
+    :param sizes: number of rows of the instances
+    :param num_constraints: number of constraints per instance
+    :param num_features: number of features filtered by each constraint, random if not provided
+    :param data_format: format of the input data, either csv or npy
+    :param time_limit: solver time limit in seconds
+    :param random_seed: random seed
+    :param main_args: further arguments of main.py
+    :return: benchmark report, with the environment and the statistics of every instance
+    """
+    instances = [run_instance(size, num_constraints, num_features, data_format, time_limit, random_seed, main_args) for size in sizes]
+    return {'environment': environment(), 'cold_start': cold_start(), 'instances': instances}
+
+
+def instance_key(instance: dict) -> tuple:
+    return (instance['num_rows'], instance['num_constraints'], instance['num_features'], instance['data_format'],
+            tuple(instance.get('main_args', [])))
+
+
+def compare(baseline: dict, current: dict, threshold: float = .2, min_time: float = .05) -> List[dict]:
+    """
+    Compare two benchmark reports and flag every phase (and the peak memory) of the common instances that got worse
+    than the baseline by more than threshold. Timings differing by less than min_time seconds are considered noise.
+
+    :param baseline: baseline benchmark report
+    :param current: current benchmark report
+    :param threshold: tolerated relative slowdown
+    :param min_time: tolerated absolute slowdown in seconds
+    :return: list of regressions
+    """
+    reference = {instance_key(i): i for i in baseline['instances']}
+    regressions = []
+    for metric, after in current.get('cold_start', {}).items():
+        before = baseline.get('cold_start', {}).get(metric)
+        if before is not None and after > before * (1 + threshold) and after - before > min_time:
+            regressions.append({'num_rows': None, 'num_constraints': None, 'metric': f'cold_start/{metric}',
+                                'baseline': before, 'current': after, 'ratio': after / before if before > 0 else None})
+    for instance in current['instances']:
+        base = reference.get(instance_key(instance))
+        if base is None:
+            continue
+        for metric in PHASES + ['total(s)', 'peak_rss(MB)']:
+            if metric not in base or metric not in instance:
+                continue
+            before, after = base[metric], instance[metric]
+            if after > before * (1 + threshold) and (metric == 'peak_rss(MB)' or after - before > min_time):
+                regressions.append({
+                    'num_rows': instance['num_rows'],
+                    'num_constraints': instance['num_constraints'],
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'ratio': after / before if before > 0 else None
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of the main.py phases on synthetic instances')
+    parser.add_argument('--sizes', help='Number of rows of the instances', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+    parser.add_argument('--num-constraints', help='Number of constraints per instance', type=int, default=200)
+    parser.add_argument('--num-features', help='Number of features filtered by each constraint (higher is more selective)', type=int, default=None, choices=[1, 2, 3])
+    parser.add_argument('--data-format', help='Format of the input data', choices=['csv', 'npy'], default='csv')
+    parser.add_argument('--time-limit', help='Solver time limit in seconds', type=int, default=600)
+    parser.add_argument('--main-args', help='Further arguments of main.py, e.g. "--preprocess --read-columns required"', required=False, default='')
+    parser.add_argument('--output', help='Output filepath of the benchmark report', required=False, default=None)
+    parser.add_argument('--baseline', help='Benchmark report to compare with, the benchmark is not run if --current is provided', required=False, default=None)
+    parser.add_argument('--current', help='Benchmark report to compare with the baseline', required=False, default=None)
+    parser.add_argument('--threshold', help='Tolerated relative slowdown of a phase', type=float, default=.2)
+    parser.add_argument('--min-time', help='Tolerated absolute slowdown of a phase in seconds', type=float, default=.05)
+    args = parser.parse_args()
+    if args.current is not None:
+        assert args.baseline is not None, '--current requires --baseline'
+        report = json.loads(Path(args.current).read_text())
+    else:
+        report = run_suite(args.sizes, args.num_constraints, args.num_features, args.data_format, args.time_limit, main_args=shlex.split(args.main_args))
+        if args.output:
+            Exporter.export_statistics(report, args.output)
+        print(json.dumps(report, indent=4))
+    if args.baseline is not None:
+        regressions = compare(json.loads(Path(args.baseline).read_text()), report, args.threshold, args.min_time)
+        for regression in regressions:
+            where = f"{regression['num_rows']} rows, {regression['num_constraints']} constraints" if regression['num_rows'] is not None else 'start-up'
+            print(f"regression on {where}: {regression['metric']} {regression['baseline']:.3f} -> {regression['current']:.3f}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,225 @@
+import numpy as np
 import pandas as pd
 
-from inventory_optim.data_model.constraints import Constraint
-from inventory_optim.optim_model.builder import get_constraint_scope
+from typing import TypedDict, List
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.monitoring.time_runner import TimeRunner
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.optim_model.screening import Conflict, ScopeScreening
+from inventory_optim.optim_model.templates import compile_constraints
+
+
+class Violation(TypedDict):
+    constraint: int
+    lb: float
+    ub: float
+    min_value: float
+    max_value: float
+    slack: float
+
+
+class Preflight(TypedDict):
+    constraints: list
+    violations: List[Violation]
+    conflicts: List[Conflict]
+
+
+def _accepted_types(dtype) -> tuple:
+    """
+    Python types of the values a constraint can filter a column of the given dtype on, None if not checked.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if dtype.kind in 'iuf':
+        return int, float
+    if dtype.kind == 'b':
+        return bool,
+    if dtype.kind in 'OSU':
+        return str,
+    return None
 
 
 class Checker:
     @staticmethod
-    def check_constraint_validity(df: pd.DataFrame, constraint: Constraint, var_name: str) -> None:
+    def check_schema(df: pd.DataFrame | ItemTable, constraints, templates: List[ConstraintTemplate] = None) -> List[str]:
+        """
+        Check the feature names and the types of the feature values of constraints and templates against the columns
+        of the data, before any scope is evaluated. Every distinct value of a ConstraintTable is checked once.
+
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
+        :param constraints: list of constraints, or ConstraintTable
+        :param templates: list of constraint templates
+        :return: list of errors, empty if the constraints match the data
+        """
+        items = ItemTable.wrap(df)
+        if hasattr(constraints, 'feature_values'):  # ConstraintTable, values are interned
+            values = {name: list(v) for name, v in constraints.feature_values().items()}
+        else:
+            values = {}
+            for constraint in constraints:
+                for feature in constraint['features']:
+                    values.setdefault(feature['name'], []).extend(feature['values'])
+        errors = []
+        for template in templates or []:
+            for feature in template.get('features', []):
+                values.setdefault(feature['name'], []).extend(feature['values'])
+            for position, name in enumerate(template['group_by']):
+                values.setdefault(name, []).extend(key[position] for key in template.get('bounds', {}).get('keys', []))
+            if 'reference' in template and template['reference'] not in items.columns:
+                errors.append(f"reference column {template['reference']} not found in data")
+            elif 'reference' in template and items.dtype(template['reference']).kind not in 'iuf':
+                errors.append(f"reference column {template['reference']} is not numeric")
+        for name, feature_values in values.items():
+            if name not in items.columns:
+                errors.append(f'feature {name} not found in data')
+                continue
+            types = _accepted_types(items.dtype(name))
+            if types is None:
+                continue
+            invalid = list(dict.fromkeys(
+                v for v in feature_values if v is not None and (not isinstance(v, types) or (bool not in types and isinstance(v, bool)))
+            ))
+            if invalid:
+                errors.append(f"feature {name}: values {invalid[:5]} not of type {'/'.join(t.__name__ for t in types)}")
+        return errors
+
+    @staticmethod
+    def variable_bounds(df: pd.DataFrame | ItemTable, var_name: str, var_incr: float = None,
+                        var_decr: float = None) -> (np.ndarray, np.ndarray):
+        """
+        Compute the variable boundaries as ModelBuilder.create_variables does.
+        Percentages not provided are read from the increase and decrease columns of df.
+
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
+        :param var_name: name of the column used as optimization variable
+        :param var_incr: upper bound in percentage
+        :param var_decr: lower bound in percentage
+        :return: lower and upper bound of each variable
+        """
+        items = ItemTable.wrap(df)
+        reference = items.numeric(var_name)
+        lower = var_decr * reference if var_decr is not None else items.numeric('decrease') * reference
+        upper = var_incr * reference if var_incr is not None else items.numeric('increase') * reference
+        return lower, upper
+
+    @staticmethod
+    def check_constraint_validity(df: pd.DataFrame | ItemTable, constraint: Constraint, var_name: str,
+                                  index: ScopeIndex = None, var_incr: float = None, var_decr: float = None) -> None:
         """
         Check constraint validity by comparing the constraint with the feasible values according to the
         variable boundaries defined by the user.
 
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param constraint: constraint to be checked
         :param var_name: name of the column in the pandas dataframe used as optimization variable
+        :param index: scope index built on df, created if not provided
+        :param var_incr: upper bound in percentage, read from the increase column of df if not provided
+        :param var_decr: lower bound in percentage, read from the decrease column of df if not provided
         :return: None
         """
-        scope = get_constraint_scope(df, constraint)
-        max_value = (df.iloc[scope]['increase'] * df.iloc[scope][var_name]).sum()
-        min_value = (df.iloc[scope]['decrease'] * df.iloc[scope][var_name]).sum()
+        scope = (index if index is not None else ScopeIndex(df)).get_scope(constraint)
+        lower, upper = Checker.variable_bounds(df, var_name, var_incr, var_decr)
+        max_value, min_value = upper[scope].sum(), lower[scope].sum()
         assert float(constraint['ub']) >= min_value, f"variable boundaries incompatible with constraint {constraint}"
         assert float(constraint['lb']) <= max_value, f"variable boundaries incompatible with constraint {constraint}"
 
     @staticmethod
-    def check_constraints(df: pd.DataFrame, constraints: list[Constraint],  var_name: str) -> None:
+    def find_violations(matrix: ConstraintMatrix, col_lower: np.ndarray, col_upper: np.ndarray) -> List[Violation]:
+        """
+        Compute the min/max volume reachable by every constraint given the variable boundaries, with one sparse
+        matrix-vector product per bound vector, and report every constraint that cannot be satisfied.
+        The slack is the (negative) distance between the violated bound and the closest reachable volume.
+
+        :param matrix: compiled constraints
+        :param col_lower: lower bound of each variable
+        :param col_upper: upper bound of each variable
+        :return: list of violations, empty if all the constraints are compatible with the variable boundaries
+        """
+        with tracer.span('reachable_volumes', nonzero=matrix.nnz):
+            positive = matrix.value_ > 0
+            lower, upper = col_lower[matrix.index_], col_upper[matrix.index_]
+            row_ids = matrix.row_ids()
+            min_value = np.bincount(row_ids, matrix.value_ * np.where(positive, lower, upper), minlength=matrix.num_row)
+            max_value = np.bincount(row_ids, matrix.value_ * np.where(positive, upper, lower), minlength=matrix.num_row)
+            slack = np.minimum(matrix.upper_ - min_value, max_value - matrix.lower_)
+        return [
+            Violation(
+                constraint=int(i),
+                lb=float(matrix.lower_[i]),
+                ub=float(matrix.upper_[i]),
+                min_value=float(min_value[i]),
+                max_value=float(max_value[i]),
+                slack=float(slack[i])
+            ) for i in np.flatnonzero(slack < 0)
+        ]
+
+    @staticmethod
+    def find_conflicts(matrix: ConstraintMatrix, col_lower: np.ndarray, col_upper: np.ndarray) -> List[Conflict]:
+        """
+        Screen the constraints for conflicts between them, e.g. a store cap smaller than the sum of the lower bounds of
+        its categories, which find_violations does not see as it checks every constraint on its own.
+        Every conflict lists the constraints involved, irreducible unless too many to be filtered.
+
+        :param matrix: compiled constraints, with unit coefficients
+        :param col_lower: lower bound of each variable
+        :param col_upper: upper bound of each variable
+        :return: list of conflicts, empty if none was found
+        """
+        return ScopeScreening(matrix, col_lower, col_upper).find_conflicts()
+
+    @staticmethod
+    def preflight(df: pd.DataFrame | ItemTable, constraints: List[Constraint], var_name: str, var_incr: float, var_decr: float,
+                  index: ScopeIndex = None, templates: List[ConstraintTemplate] = None, screen: bool = False,
+                  stats: dict = None) -> Preflight:
+        """
+        Check the constraints against the variable boundaries without creating a solver, and screen them for
+        conflicts if they are all compatible with the boundaries. Screening only loads the solver for the elastic LP,
+        when propagation finds no conflict.
+        Boundaries are computed as ModelBuilder.create_variables does, templates are expanded as
+        ModelBuilder.build_model does, after the explicit constraints.
+
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
+        :param constraints: constraints to be checked
+        :param var_name: name of the column in the pandas dataframe used as optimization variable
+        :param var_incr: upper bound in percentage
+        :param var_decr: lower bound in percentage
+        :param index: scope index built on df, created if not provided
+        :param templates: constraint templates
+        :param screen: whether to screen the constraints for conflicts
+        :param stats: dictionary storing the running time of every step, if provided
+        :return: expanded constraints, violations and conflicts, empty if the constraints passed the checks
+        """
+        stats = stats if stats is not None else {}
+        lower, upper = Checker.variable_bounds(df, var_name, var_incr, var_decr)
+        assert not np.isnan(lower).any(), f'column {var_name} contains missing values'
+        index = index if index is not None else ScopeIndex(df)
+        expanded, matrix = TimeRunner.measure_elapsed_time(stats, compile_constraints, [index, constraints, templates], 'compile_constraints(s)')
+        violations = TimeRunner.measure_elapsed_time(stats, Checker.find_violations, [matrix, lower, upper], 'check_constraints(s)')
+        conflicts = []
+        if screen and not violations:
+            conflicts = TimeRunner.measure_elapsed_time(stats, Checker.find_conflicts, [matrix, lower, upper], 'screen_constraints(s)')
+        return Preflight(constraints=expanded, violations=violations, conflicts=conflicts)
+
+    @staticmethod
+    def check_constraints(df: pd.DataFrame | ItemTable, constraints: list[Constraint],  var_name: str,
+                          index: ScopeIndex = None, var_incr: float = None, var_decr: float = None) -> None:
         """
         Check all the list of constraints.
-        Checks are performed according to the check_constraint_validity function.
+        Checks are vectorized over all the constraints and every violation is reported at once.
 
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param constraints: list of constraints
         :param var_name: name of the column in the pandas dataframe used as optimization variable
+        :param index: scope index built on df, created if not provided
+        :param var_incr: upper bound in percentage, read from the increase column of df if not provided
+        :param var_decr: lower bound in percentage, read from the decrease column of df if not provided
         :return: None
         """
-        for constraint in constraints:
-            Checker.check_constraint_validity(df, constraint, var_name)
+        matrix = ConstraintMatrix.compile(index if index is not None else ScopeIndex(df), constraints)
+        violations = Checker.find_violations(matrix, *Checker.variable_bounds(df, var_name, var_incr, var_decr))
+        assert len(violations) == 0, '\n'.join(
+            [f"variable boundaries incompatible with constraint {constraints[v['constraint']]}: {v}" for v in violations]
+        )
@@ -0,0 +1,183 @@
+import argparse
+import json
+import numpy as np
+
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate, Problem, check_constraint, \
+    check_template, iter_problem, write_constraints_file
+
+
+TABLE_VERSION = 1
+TABLE_ARRAYS = ['lb', 'ub', 'filter_start', 'filter_name', 'value_start', 'value_code']
+
+
+class ConstraintTable:
+    """
+    Compact columnar store of a list of constraints.
+    Bounds are held as two float arrays and the feature filters in CSR form: the filters of constraint i are
+    filter_start[i]:filter_start[i + 1], filter j refers to the feature name filter_name[j] and to the values
+    value_code[value_start[j]:value_start[j + 1]]. Feature names and values are interned, each distinct one being
+    stored once. The table behaves as a read-only sequence of constraints, built on access.
+    On disk, a table is a directory of .npy files, memory-mapped on read, plus the interned names and values.
+    """
+    def __init__(self, arrays: dict, names: List[str], values: list) -> None:
+        self.lb_, self.ub_ = arrays['lb'], arrays['ub']
+        self.filter_start_, self.filter_name_ = arrays['filter_start'], arrays['filter_name']
+        self.value_start_, self.value_code_ = arrays['value_start'], arrays['value_code']
+        self.names_ = names
+        self.values_ = values
+
+    @classmethod
+    def from_constraints(cls, constraints: Iterable[Constraint]) -> 'ConstraintTable':
+        """
+        Build a table from a stream of constraints, consuming one constraint at a time.
+
+        :param constraints: constraints, e.g. streamed by iter_constraints
+        :return: ConstraintTable instance
+        """
+        lb, ub = array('d'), array('d')
+        filter_start, filter_name, value_start, value_code = array('q', [0]), array('i'), array('q', [0]), array('i')
+        names, values = {}, {}
+        for constraint in constraints:
+            lb.append(constraint['lb'])
+            ub.append(constraint['ub'])
+            for feature in constraint['features']:
+                filter_name.append(names.setdefault(feature['name'], len(names)))
+                for value in feature['values']:
+                    # the type is part of the key, so that e.g. 1 and 1.0 are written back as they were read
+                    value_code.append(values.setdefault((type(value), value), len(values)))
+                value_start.append(len(value_code))
+            filter_start.append(len(filter_name))
+        arrays = {
+            'lb': np.frombuffer(lb, dtype=np.float64), 'ub': np.frombuffer(ub, dtype=np.float64),
+            'filter_start': np.frombuffer(filter_start, dtype=np.int64), 'filter_name': np.frombuffer(filter_name, dtype=np.int32),
+            'value_start': np.frombuffer(value_start, dtype=np.int64), 'value_code': np.frombuffer(value_code, dtype=np.int32)
+        }
+        return cls(arrays, list(names), [value for _, value in values])
+
+    def __len__(self) -> int:
+        return len(self.lb_)
+
+    def __getitem__(self, i: int) -> Constraint:
+        features = []
+        for j in range(self.filter_start_[i], self.filter_start_[i + 1]):
+            codes = self.value_code_[self.value_start_[j]:self.value_start_[j + 1]]
+            features.append({'name': self.names_[self.filter_name_[j]], 'values': [self.values_[c] for c in codes]})
+        return Constraint(lb=float(self.lb_[i]), ub=float(self.ub_[i]), features=features)
+
+    def __iter__(self) -> Iterator[Constraint]:
+        return (self[i] for i in range(len(self)))
+
+    def feature_names(self) -> List[str]:
+        """
+        Names of the features involved in the constraints, in order of first appearance.
+
+        :return: list of feature names
+        """
+        return list(self.names_)
+
+    def feature_values(self) -> dict:
+        """
+        Distinct values filtered by the constraints for each feature, without building the constraints.
+
+        :return: dictionary of feature name to list of values
+        """
+        owner = np.repeat(self.filter_name_, np.diff(self.value_start_))
+        pairs = np.unique(np.stack([owner.astype(np.int64), self.value_code_.astype(np.int64)], axis=1), axis=0)
+        res = {name: [] for name in self.names_}
+        for name, code in pairs.tolist():
+            res[self.names_[name]].append(self.values_[code])
+        return res
+
+    def write(self, dirpath: str, templates: List[ConstraintTemplate] = None) -> None:
+        """
+        Write the table, and possibly a list of templates, as a binary constraint directory readable by read_problem.
+
+        :param dirpath: path of the output directory
+        :param templates: list of constraint templates
+        :return: None
+        """
+        path = Path(dirpath)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, values in zip(TABLE_ARRAYS, [self.lb_, self.ub_, self.filter_start_, self.filter_name_, self.value_start_, self.value_code_]):
+            np.save(path / f'{name}.npy', np.ascontiguousarray(values))
+        meta = {'version': TABLE_VERSION, 'names': self.names_, 'values': self.values_, 'templates': templates or []}
+        (path / 'meta.json').write_text(json.dumps(meta))
+
+    @classmethod
+    def read(cls, dirpath: str) -> ('ConstraintTable', List[ConstraintTemplate]):
+        """
+        Read a binary constraint directory, memory-mapping its arrays.
+
+        :param dirpath: path of the directory
+        :return: ConstraintTable instance and list of templates
+        """
+        path = Path(dirpath)
+        meta = json.loads((path / 'meta.json').read_text())
+        assert meta['version'] == TABLE_VERSION, f"unsupported version {meta['version']} of constraint table {dirpath}"
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode='r') for name in TABLE_ARRAYS}
+        templates = [ConstraintTemplate(t) for t in meta['templates']]
+        for template in templates:
+            check_template(template)
+        return cls(arrays, meta['names'], meta['values']), templates
+
+
+def read_problem(filepath: str) -> Problem:
+    """
+    Read a constraint file, either json or binary, into a Problem whose constraints are held in a ConstraintTable.
+    Json files are streamed, one constraint at a time, and every constraint is checked as it is read.
+
+    :param filepath: path of the json file or of the binary constraint directory
+    :return: Problem instance
+    """
+    if Path(filepath).is_dir():
+        table, templates = ConstraintTable.read(filepath)
+        return Problem({'constraints': table, 'templates': templates})
+    problem = {}
+    for key, value in iter_problem(filepath):
+        if key == 'constraints':
+            problem[key] = ConstraintTable.from_constraints(_checked(value))
+        elif key == 'templates':
+            problem[key] = [ConstraintTemplate(element) for element in value]
+            for template in problem[key]:
+                check_template(template)
+    return Problem({'constraints': problem['constraints'], 'templates': problem.get('templates', [])})
+
+
+def _checked(constraints: Iterable[dict]) -> Iterator[dict]:
+    """
+    Check the constraints of a stream as they pass.
+    """
+    for position, constraint in enumerate(constraints):
+        check_constraint(constraint, position)
+        yield constraint
+
+
+def convert(source: str, target: str) -> None:
+    """
+    Convert a constraint file from json to binary or from binary to json, the json format being chosen for targets
+    with a .json extension.
+
+    :param source: path of the source constraint file
+    :param target: path of the target constraint file
+    :return: None
+    """
+    problem = read_problem(source)
+    if Path(target).suffix == '.json':
+        write_constraints_file(list(problem['constraints']), target, problem['templates'])
+    else:
+        problem['constraints'].write(target, problem['templates'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a constraint file between the json and the binary format')
+    parser.add_argument('source', help='Path of the source constraint file: json file or binary constraint directory')
+    parser.add_argument('target', help='Path of the target constraint file: json if it has a .json extension, binary otherwise')
+    args = parser.parse_args()
+    convert(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()
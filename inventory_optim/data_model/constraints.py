@@ -1,6 +1,6 @@
 import json
 
-from typing import TypedDict, List
+from typing import TypedDict, Iterator, List, TextIO
 from pathlib import Path
 
 
@@ -10,17 +10,230 @@ class Constraint(TypedDict):
     features: List[dict]
 
 
+class ConstraintTemplate(TypedDict, total=False):
+    """
+    Family of constraints, one per group of items sharing the values of the group_by features, among the items
+    matching the optional common features. Bounds are either read from a table (bounds: keys, lb and ub, one entry per
+    constraint, keys holding the group_by values) or defined as a fraction (lb_ratio, ub_ratio) of the volume of the
+    reference column within each group.
+    """
+    group_by: List[str]
+    features: List[dict]
+    bounds: dict
+    reference: str
+    lb_ratio: float
+    ub_ratio: float
+
+
 class Problem(TypedDict):
     constraints: List[Constraint]
+    templates: List[ConstraintTemplate]
+
+
+# characters that can follow a complete json value
+JSON_DELIMITERS = frozenset(' \t\n\r,:]}')
+
+
+class _JsonReader:
+    """
+    Incremental reader of a json document: values are decoded one at a time from a buffer refilled by chunks, so
+    that the elements of a large array are never held in memory all together.
+    """
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file_ = file
+        self.chunk_size_ = chunk_size
+        self.decoder_ = json.JSONDecoder()
+        self.buffer_, self.pos_, self.eof_ = '', 0, False
+
+    def __fill(self) -> bool:
+        """
+        Append a chunk of the file to the buffer, dropping the part already decoded.
+
+        :return: False at the end of the file
+        """
+        chunk = self.file_.read(self.chunk_size_)
+        self.buffer_, self.pos_, self.eof_ = self.buffer_[self.pos_:] + chunk, 0, len(chunk) == 0
+        return not self.eof_
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character without consuming it, an empty string at the end of the file.
+        """
+        while True:
+            while self.pos_ < len(self.buffer_) and self.buffer_[self.pos_] in ' \t\n\r':
+                self.pos_ += 1
+            if self.pos_ < len(self.buffer_) or not self.__fill():
+                return self.buffer_[self.pos_:self.pos_ + 1]
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next non-whitespace character, which must be one of the given ones.
+
+        :param characters: accepted characters
+        :return: consumed character
+        """
+        character = self.peek()
+        if character == '' or character not in characters:
+            raise json.JSONDecodeError(f'Expecting one of {characters!r}', self.buffer_, self.pos_)
+        self.pos_ += 1
+        return character
+
+    def value(self):
+        """
+        Decode the next json value, reading more of the file while the value is incomplete.
+
+        :return: decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder_.raw_decode(self.buffer_, self.pos_)
+                # a value not followed by a delimiter may be a truncated number, e.g. 1.5 out of 1.5e3
+                if self.eof_ or self.buffer_[end:end + 1] in JSON_DELIMITERS:
+                    self.pos_ = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof_:
+                    raise
+            self.__fill()
+
+
+def iter_problem(filepath: str, chunk_size: int = 2 ** 20) -> Iterator[tuple]:
+    """
+    Stream the content of a constraint file key by key. Top-level arrays (e.g. constraints) are returned as iterators
+    decoding one element at a time, valid until the next key is requested; any other value is returned decoded.
+
+    :param filepath: path of the file containing the constraints
+    :param chunk_size: number of characters read at once
+    :return: iterator of (key, value) pairs
+    """
+    def elements(reader):
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.expect(']')
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(',]') == ']':
+                return
+
+    with open(filepath, encoding='utf-8') as f:
+        reader = _JsonReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if reader.peek() != '[':
+                yield key, reader.value()
+            else:
+                array = elements(reader)
+                yield key, array
+                for _ in array:  # elements left unread by the caller
+                    pass
+            if reader.expect(',}') == '}':
+                return
+
+
+def iter_constraints(filepath: str, chunk_size: int = 2 ** 20) -> Iterator[Constraint]:
+    """
+    Stream the constraints of a constraint file one at a time, checking each one as it is read.
+
+    :param filepath: path of the file containing the constraints
+    :param chunk_size: number of characters read at once
+    :return: iterator of constraints
+    """
+    for key, value in iter_problem(filepath, chunk_size):
+        if key == 'constraints':
+            for position, element in enumerate(value):
+                check_constraint(element, position)
+                yield Constraint(element)
 
 
 def read_constraints_file(filepath: str) -> Problem:
     """
-    Read file containing the constraints and return a Problem object with the list of constraints.
+    Read file containing the constraints and return a Problem object with the list of constraints and templates.
+    The file is parsed incrementally and every constraint is checked as it is read.
 
     :param filepath: path of the file containing the constraints
     :return: Problem instance
     """
-    data = json.loads(Path(filepath).read_text())
-    constraints = [Constraint(d) for d in data['constraints']]
-    return Problem({'constraints': constraints})
+    problem = {}
+    for key, value in iter_problem(filepath):
+        if key == 'constraints':
+            problem[key] = [Constraint(element) for element in value]
+            for position, constraint in enumerate(problem[key]):
+                check_constraint(constraint, position)
+        elif key == 'templates':
+            problem[key] = [ConstraintTemplate(element) for element in value]
+            for template in problem[key]:
+                check_template(template)
+    return Problem({'constraints': problem['constraints'], 'templates': problem.get('templates', [])})
+
+
+def check_constraint(constraint: dict, position: int = None) -> None:
+    """
+    Check that a constraint is well-formed: numeric bounds and a list of features, each one with name and values.
+
+    :param constraint: constraint
+    :param position: position of the constraint in the file, reported on failure
+    :return: None
+    """
+    where = f'constraint {position}' if position is not None else 'constraint'
+    assert isinstance(constraint, dict), f'{where} is not an object'
+    for bound in ['lb', 'ub']:
+        assert isinstance(constraint.get(bound), (int, float)) and not isinstance(constraint[bound], bool), f'{where}: {bound} missing or not a number'
+    assert isinstance(constraint.get('features'), list), f'{where}: features missing or not a list'
+    for feature in constraint['features']:
+        assert isinstance(feature, dict) and isinstance(feature.get('name'), str), f'{where}: feature without name'
+        assert isinstance(feature.get('values'), list), f"{where}: values of feature {feature['name']} missing or not a list"
+        assert all(v is None or isinstance(v, (str, int, float)) for v in feature['values']), f"{where}: values of feature {feature['name']} must be scalars"
+
+
+def check_template(template: ConstraintTemplate) -> None:
+    """
+    Check that a constraint template is well-formed.
+
+    :param template: constraint template
+    :return: None
+    """
+    assert len(template.get('group_by', [])) > 0, f'template without group_by features: {template}'
+    assert ('bounds' in template) != ('reference' in template), f'template requires either bounds or reference: {template}'
+    if 'bounds' in template:
+        table = template['bounds']
+        assert len(table['keys']) == len(table['lb']) == len(table['ub']), f'bounds of different lengths in template {template["group_by"]}'
+        assert all(len(key) == len(template['group_by']) for key in table['keys']), f'keys not matching group_by {template["group_by"]}'
+    else:
+        assert 'lb_ratio' in template and 'ub_ratio' in template, f'template requires lb_ratio and ub_ratio: {template}'
+
+
+def write_constraints_file(constraints: List[Constraint], filepath: str, templates: List[ConstraintTemplate] = None) -> None:
+    """
+    Write a list of constraints, and possibly of templates, to a file readable by read_constraints_file.
+
+    :param constraints: list of constraints
+    :param filepath: path of the output file
+    :param templates: list of constraint templates
+    :return: None
+    """
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    content = {'constraints': constraints, 'templates': templates} if templates else {'constraints': constraints}
+    Path(filepath).write_text(json.dumps(content, indent=2))
+
+
+def feature_names(constraints: List[Constraint], templates: List[ConstraintTemplate] = None) -> List[str]:
+    """
+    Return the names of the features involved in a list of constraints and templates, in order of first appearance.
+
+    :param constraints: list of constraints, or ConstraintTable
+    :param templates: list of constraint templates
+    :return: list of feature names
+    """
+    if hasattr(constraints, 'feature_names'):  # ConstraintTable, names are interned
+        names = constraints.feature_names()
+    else:
+        names = [feature['name'] for constraint in constraints for feature in constraint['features']]
+    for template in templates or []:
+        names += [feature['name'] for feature in template.get('features', [])] + template['group_by']
+    return list(dict.fromkeys(names))
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List
+
+
+class ItemTable:
+    """
+    Compact columnar table of the items, used in place of a pandas dataframe along the optimization pipeline.
+    Categorical (feature) columns are held as integer codes plus their categorical dtype, numeric columns as plain
+    numpy arrays and any other column as its pandas array, with no per-row python objects. Wrapping a dataframe
+    copies no column, and nothing is ever added to the table: bounds and objective coefficients live in the model.
+    """
+    def __init__(self, arrays: Dict[str, object], dtypes: Dict[str, pd.CategoricalDtype] = None) -> None:
+        lengths = set(len(array) for array in arrays.values())
+        assert len(lengths) <= 1, 'columns of different lengths'
+        self.arrays_ = arrays
+        self.dtypes_ = dtypes if dtypes is not None else {}
+        self.num_rows_ = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, categorical: List[str] = None) -> 'ItemTable':
+        """
+        Wrap the columns of a pandas dataframe.
+
+        :param df: pandas dataframe
+        :param categorical: columns to be encoded as categorical codes, besides the pandas categoricals
+        :return: ItemTable instance
+        """
+        categorical = set(categorical) if categorical is not None else set()
+        arrays, dtypes = {}, {}
+        for name in df.columns:
+            series = df[name]
+            if name in categorical and not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype('category')
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                arrays[name], dtypes[name] = series.cat.codes.to_numpy(), series.dtype
+            elif series.dtype.kind in 'iufb':
+                arrays[name] = series.to_numpy()
+            else:
+                arrays[name] = series.array
+        return cls(arrays, dtypes)
+
+    @classmethod
+    def wrap(cls, data) -> 'ItemTable':
+        """
+        Return data as an ItemTable, wrapping it if it is a pandas dataframe.
+
+        :param data: ItemTable instance or pandas dataframe
+        :return: ItemTable instance
+        """
+        return data if isinstance(data, ItemTable) else cls.from_frame(data)
+
+    def __len__(self) -> int:
+        return self.num_rows_
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.arrays_)
+
+    def dtype(self, name: str):
+        return self.dtypes_[name] if name in self.dtypes_ else self.array(name).dtype
+
+    def is_categorical(self, name: str) -> bool:
+        return name in self.dtypes_
+
+    def array(self, name: str):
+        """
+        Raw storage of a column: codes for categorical columns, values otherwise.
+
+        :param name: name of the column
+        :return: numpy or pandas array
+        """
+        if name not in self.arrays_:
+            raise KeyError(f'column {name} not found in data')
+        return self.arrays_[name]
+
+    def numeric(self, name: str, dtype=np.float64) -> np.ndarray:
+        """
+        Values of a numeric column, converted only if stored with a different dtype.
+
+        :param name: name of the column
+        :param dtype: dtype of the result, the stored one if None
+        :return: numpy array
+        """
+        array = self.array(name)
+        assert not self.is_categorical(name) and array.dtype.kind in 'iufb', f'column {name} is not numeric'
+        return np.asarray(array, dtype=dtype)
+
+    def to_frame(self, columns: List[str] = None, rows=None) -> pd.DataFrame:
+        """
+        Build a pandas dataframe from some columns and rows, categorical columns being rebuilt from their codes.
+
+        :param columns: columns of the dataframe, all of them if not provided
+        :param rows: slice or positions of the rows, all of them if not provided
+        :return: pandas dataframe
+        """
+        res = {}
+        for name in (columns if columns is not None else self.columns):
+            values = self.array(name) if rows is None else self.array(name)[rows]
+            res[name] = pd.Categorical.from_codes(values, dtype=self.dtypes_[name]) if self.is_categorical(name) else values
+        return pd.DataFrame(res, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays_.values())
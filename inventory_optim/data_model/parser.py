@@ -1,6 +1,6 @@
 import argparse
 
-from inventory_optim.optim_model.builder import OBJ_MIN, OBJ_MAX
+from inventory_optim.optim_model.constants import OBJ_MIN, OBJ_MAX
 
 
 class CustomParser:
@@ -14,21 +14,93 @@ class CustomParser:
         parser = argparse.ArgumentParser(description='Vessel profile ')
         # Input data
         inputs = parser.add_argument_group('Input data')
-        inputs.add_argument('--constraints', help='<Required> Path to json constraints file', required=True)
-        inputs.add_argument('--data', help='<Required> Path to csv containing all the data', required=True)
+        inputs.add_argument('--constraints', help='<Required> Path to json constraints file or binary constraint directory', required=True)
+        inputs.add_argument('--data', help='<Required> Path to the data: csv, parquet, arrow ipc file or npy column directory', required=True)
         inputs.add_argument('--var-col', help='<Required> Name of the column in data used as optimization variable', required=True)
         inputs.add_argument('--optim-col', help='<Required> Name of the column in data used as optimization objective', required=True)
         inputs.add_argument('--optim-obj', help='Optimization objective', choices=[OBJ_MIN, OBJ_MAX], default=OBJ_MAX)
+        inputs.add_argument('--id-col', help='Name of the column in data identifying the items', default='id')
+        inputs.add_argument('--chunk-size', help='Rows per chunk of the data read by the pipelined run', required=False, type=int, default=1_000_000)
+        inputs.add_argument('--read-columns', help='Columns read from data: all of them, exported with the solution, or only the ones required by the run', choices=['all', 'required'], default='all')
         # Options
         options = parser.add_argument_group('Options')
         options.add_argument('--time-limit', help='Time limit in seconds', required=False, type=int, default=60)
         options.add_argument('--var-incr', help='Perc of allowed var increase', required=False, type=float, default=1.5)
         options.add_argument('--var-decr', help='Perc of allowed var decrease', required=False, type=float, default=.8)
+        options.add_argument('--decompose', help='Flag to solve independent blocks of constraints separately', action='store_true', default=False)
+        options.add_argument('--workers', help='Number of worker processes used to solve blocks', required=False, type=int, default=None)
+        options.add_argument('--aggregate', help='Flag to solve the model aggregating variables with the same constraints and objective coefficient', action='store_true', default=False)
+        options.add_argument('--portfolio', help='Race solver strategies in separate processes and keep the first optimal solution, e.g. dual_simplex ipm:4 (strategy:threads); dual_simplex, primal_simplex and ipm if no strategy is given', nargs='*', default=None)
+        options.add_argument('--aggregate-cost-decimals', help='Round objective coefficients to this number of decimals before aggregating (inexact)', required=False, type=int, default=None)
+        options.add_argument('--target-gap', help='Stop the solve as soon as the relative gap between the best solution and the dual bound is below this value (primal simplex)', required=False, type=float, default=None)
+        options.add_argument('--target-objective', help='Stop the solve as soon as a solution reaches this objective (primal simplex)', required=False, type=float, default=None)
+        options.add_argument('--pipeline', help='Flag to read the data in chunks while parsing the constraint file in a thread, creating the variables of each chunk while the next one is read', action='store_true', default=False)
+        options.add_argument('--integral', help='Flag to round the solution to whole quantities, repairing the constraints broken by rounding', action='store_true', default=False)
         # Output
         output = parser.add_argument_group('Output')
         output.add_argument('--export-statistics', help='File to export statistics', default="data/res_stats.json")
-        output.add_argument('--export-solution', help='File to export solution', default="data/res_solution.csv")
+        output.add_argument('--export-solution', help='File to export solution: csv (optionally .gz, .bz2, .xz), parquet or arrow', default="data/res_solution.csv")
+        output.add_argument('--export-columns', help='Data columns exported with the solution, all the loaded ones if not set', nargs='+', default=None)
+        output.add_argument('--export-only-changed', help='Flag to export only rows whose solution differs from --var-col', action='store_true', default=False)
+        output.add_argument('--progress-file', help='File to stream progress records of the solve to, as json lines; the records are logged in any case when monitoring the solve', default=None)
+        output.add_argument('--progress-interval', help='Seconds between progress records of the solve', required=False, type=float, default=1.)
+        output.add_argument('--export-sensitivity', help='File to export duals, reduced costs and ranging of constraints and items, as <name>.constraints and <name>.items files in the format of its extension; not exported if not set', default=None)
         # Miscellaneous
         miscellaneous = parser.add_argument_group('Miscellaneous')
-        miscellaneous.add_argument('--check', help='Flag to check constraints', action='store_true', default=True)
+        miscellaneous.add_argument('--check', help='Flag to check constraints', action=argparse.BooleanOptionalAction, default=True)
+        miscellaneous.add_argument('--screen', help='Flag to screen the constraints for conflicts between them before solving', action=argparse.BooleanOptionalAction, default=True)
+        miscellaneous.add_argument('--preprocess', help='Flag to reduce the model before solving: fixed and unconstrained items are dropped and duplicated items merged', action='store_true', default=False)
+        miscellaneous.add_argument('--check-only', help='Flag to only validate inputs and check constraints against variable boundaries, without solving', action='store_true', default=False)
+        miscellaneous.add_argument('--cache-dir', help='Directory of the compiled model cache, no caching if not set', required=False, default=None)
+        miscellaneous.add_argument('--cache-size-mb', help='Size of the compiled model cache in MB, least recently used models are evicted', required=False, type=float, default=2048)
+        miscellaneous.add_argument('--trace', help='Flag to trace the run and export a Chrome trace next to the statistics file', action='store_true', default=False)
+        miscellaneous.add_argument('--trace-memory', help='Flag to trace Python allocations as well (slower)', action='store_true', default=False)
+        return vars(parser.parse_args())
+
+
+class BatchParser:
+    @staticmethod
+    def parse_args() -> dict:
+        """
+        Parse input args of the batch runner.
+
+        :return: dict of input args
+        """
+        parser = argparse.ArgumentParser(description='Batch of inventory optimization scenarios')
+        # Input data
+        inputs = parser.add_argument_group('Input data')
+        inputs.add_argument('--scenarios', help='<Required> Path to json file describing the scenario grid', required=True)
+        inputs.add_argument('--data', help='<Required> Path to the data: csv, parquet, arrow ipc file or npy column directory', required=True)
+        inputs.add_argument('--var-col', help='<Required> Name of the column in data used as optimization variable', required=True)
+        # Options
+        options = parser.add_argument_group('Options')
+        options.add_argument('--time-limit', help='Time limit in seconds per scenario', required=False, type=int, default=60)
+        options.add_argument('--workers', help='Number of worker processes', required=False, type=int, default=None)
+        # Output
+        output = parser.add_argument_group('Output')
+        output.add_argument('--export-dir', help='Directory to export solutions and statistics', default="data/batch")
+        # Miscellaneous
+        miscellaneous = parser.add_argument_group('Miscellaneous')
+        miscellaneous.add_argument('--check', help='Flag to check constraints', action=argparse.BooleanOptionalAction, default=True)
+        return vars(parser.parse_args())
+
+
+class ServiceParser:
+    @staticmethod
+    def parse_args() -> dict:
+        """
+        Parse input args of the resident optimization service.
+
+        :return: dict of input args
+        """
+        parser = argparse.ArgumentParser(description='Resident inventory optimization service')
+        # Input data
+        inputs = parser.add_argument_group('Input data')
+        inputs.add_argument('--register', help='Datasets registered at start-up, as name=path', nargs='+', default=[])
+        # Options
+        options = parser.add_argument_group('Options')
+        options.add_argument('--socket', help='Path of the unix socket the service listens on', default='/tmp/inventory_optim.sock')
+        options.add_argument('--workers', help='Number of worker processes solving jobs', required=False, type=int, default=None)
+        options.add_argument('--max-pending-jobs', help='Maximum number of queued and running jobs', required=False, type=int, default=64)
+        options.add_argument('--time-limit', help='Default time limit in seconds per job', required=False, type=int, default=60)
         return vars(parser.parse_args())
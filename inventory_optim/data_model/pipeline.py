@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Set
+from inventory_optim.data_model.checker import Checker
+from inventory_optim.data_model.constraint_table import Problem, read_problem
+from inventory_optim.data_model.constraints import feature_names
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.data_model.reader import CSV, available_columns, detect_format, read_chunks
+from inventory_optim.monitoring.time_runner import StageTimer
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+class IngestionPipeline:
+    """
+    Read the data and the constraint file overlapping their stages, and create the variables of the model while the
+    data is still being read.
+    The constraint file is parsed in a thread while the data is read chunk by chunk. Every chunk is handed over to a
+    single thread which, in chunk order, encodes its feature and non-numeric columns with codes shared by all the
+    chunks, computes the bounds and the objective coefficients of its items and appends its variables to the model,
+    while the next chunk is read. Once the last chunk is in, the columns are concatenated into the item table and the
+    feature columns referenced by the constraints are indexed, one thread per feature.
+    At most max_pending chunks wait to be processed, bounding the memory held by reading ahead. Csv chunks are read
+    with all their columns until the constraint file is parsed, and then with the required ones only: meanwhile,
+    chunks are a tenth of chunk_size.
+    """
+    def __init__(self, mb: ModelBuilder, var_name: str, var_incr: float, var_decr: float, obj_feature_name: str,
+                 obj: str, chunk_size: int = 1_000_000, max_pending: int = 2, workers: int = None) -> None:
+        self.mb_ = mb
+        self.var_name_ = var_name
+        self.var_incr_ = var_incr
+        self.var_decr_ = var_decr
+        self.obj_feature_name_ = obj_feature_name
+        self.obj_ = obj
+        self.chunk_size_ = chunk_size
+        self.max_pending_ = max_pending
+        self.workers_ = workers
+        self.parts_ = {}
+        self.lookups_ = {}
+        self.num_chunks_ = 0
+
+    def run(self, data_path: str, problem_path: str, required: Callable[[Problem], Set[str]] = None,
+            stages: StageTimer = None) -> (ItemTable, Problem, ScopeIndex):
+        """
+        Run the pipeline, leaving the variables and the objective in the model.
+
+        :param data_path: path of the input data (csv, parquet, arrow ipc file or NPY column directory)
+        :param problem_path: path of the constraint file
+        :param required: function giving the columns to keep once the constraint file is parsed, all of them if not provided
+        :param stages: timer of the stages
+        :return: item table, constraints and templates, and scope index with the constraint features indexed
+        """
+        stages = stages if stages is not None else StageTimer()
+        self.mb_.set_objective_sense(self.obj_)
+        with ThreadPoolExecutor(self.workers_) as pool, ThreadPoolExecutor(1) as consumer:
+            problem = pool.submit(IngestionPipeline.__timed, stages, 'read_constraint_file', read_problem, problem_path)
+            num_rows, narrowed = 0, required is None or detect_format(data_path) != CSV
+            pending, chunks = deque(), read_chunks(data_path, chunk_size=self.chunk_size_ if narrowed else max(self.chunk_size_ // 10, 1))
+            while True:
+                with stages.stage('read_chunk'):
+                    chunk = next(chunks, None)
+                    if not narrowed and problem.done() and chunk is not None:
+                        # parsing fewer columns is faster, the chunks already read keep theirs until processed
+                        columns = required(problem.result())
+                        columns = [name for name in available_columns(data_path) if name in columns]
+                        chunks.close()
+                        chunks = read_chunks(data_path, columns, self.chunk_size_, num_rows + len(chunk))
+                        narrowed = True
+                if chunk is None:
+                    break
+                num_rows += len(chunk)
+                pending.append(consumer.submit(self.process, chunk, problem, required, stages))
+                while len(pending) > self.max_pending_:
+                    pending.popleft().result()
+            for future in pending:
+                future.result()
+            with stages.stage('assemble_items'):
+                items = self.assemble()
+            problem = problem.result()
+            index = ScopeIndex(items)
+            names = [name for name in feature_names(problem['constraints'], problem['templates']) if name in items.columns]
+            for future in [pool.submit(IngestionPipeline.__timed, stages, 'scope_index', index.feature, name) for name in names]:
+                future.result()
+        return items, problem, index
+
+    def process(self, chunk: pd.DataFrame, problem: Future, required: Callable[[Problem], Set[str]] = None,
+                stages: StageTimer = None) -> None:
+        """
+        Process a chunk of the data: keep its required columns, encode them and append its variables to the model.
+
+        :param chunk: chunk of the data
+        :param problem: future of the constraint file
+        :param required: function giving the columns to keep once the constraint file is parsed
+        :param stages: timer of the stages
+        :return: None
+        """
+        problem = problem.result()
+        columns = required(problem) if required is not None else None
+        features = set(feature_names(problem['constraints'], problem['templates']))
+        with (stages if stages is not None else StageTimer()).stage('process_chunk'):
+            if columns is not None:
+                chunk = chunk[[name for name in chunk.columns if name in columns]]
+            for name in chunk.columns:
+                series = chunk[name]
+                numeric = pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype) and name not in features
+                if not numeric and name not in self.lookups_ and self.parts_.get(name):
+                    # numeric in the previous chunks only, e.g. a csv column whose first values look like numbers
+                    self.parts_[name] = [self.encode(name, pd.Series(part)) for part in self.parts_[name]]
+                if name in self.lookups_ or not numeric:
+                    self.parts_.setdefault(name, []).append(self.encode(name, series))
+                else:
+                    self.parts_.setdefault(name, []).append(series.to_numpy())
+            col_lower, col_upper = Checker.variable_bounds(chunk, self.var_name_, self.var_incr_, self.var_decr_)
+            self.mb_.add_variables(col_lower, col_upper, ModelBuilder.objective_coefficients(chunk, self.obj_feature_name_))
+            self.num_chunks_ += 1
+
+    def encode(self, name: str, series: pd.Series) -> np.ndarray:
+        """
+        Encode the values of a column of a chunk with the codes of the values seen in the previous chunks, new values
+        getting new codes. Missing values are encoded as -1.
+
+        :param name: name of the column
+        :param series: values of the column in the chunk
+        :return: codes
+        """
+        codes, uniques = pd.factorize(series, sort=False)
+        lookup = self.lookups_.setdefault(name, {})
+        remap = np.array([lookup.setdefault(value, len(lookup)) for value in uniques.tolist()] + [-1], dtype=np.int32)
+        return remap[codes]
+
+    def assemble(self) -> ItemTable:
+        """
+        Concatenate the columns of the chunks, the encoded columns becoming categoricals with the smallest integer
+        type holding their codes.
+
+        :return: item table
+        """
+        arrays, dtypes = {}, {}
+        for name, parts in self.parts_.items():
+            arrays[name] = np.concatenate(parts)
+            if name in self.lookups_:
+                dtypes[name] = pd.CategoricalDtype(list(self.lookups_[name]))
+                arrays[name] = arrays[name].astype(np.min_scalar_type(-max(len(self.lookups_[name]), 1)), copy=False)
+        return ItemTable(arrays, dtypes)
+
+    @staticmethod
+    def __timed(stages: StageTimer, name: str, function: callable, *args):
+        """
+        Run a function as a work item of a stage.
+        """
+        with stages.stage(name):
+            return function(*args)
@@ -1,2 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix, constraint_signatures
+
+
 class Preprocessor:
-    pass
+    """
+    Reduce the compiled model before it is passed to the solver, keeping the map from the items to the variables of
+    the reduced model needed to restore a full-length solution.
+    Fixed variables (lb == ub, e.g. items with a zero quantity) and variables in no constraint, which are fixed at the
+    bound favoured by their objective coefficient, are dropped and their contribution is folded into the row bounds.
+    Duplicated variables, in the same constraints with the same bounds and objective coefficient, are merged into one
+    variable whose bounds are the sums of theirs; its value is split evenly among them, which keeps them within
+    their bounds. Rows left without variables are dropped, unless their folded bounds exclude 0.
+    In integral mode, dropped variables are fixed at whole numbers within their integer bounds, as the integral solver
+    would round them, and duplicated variables are not merged, since splitting their value would make it fractional.
+    """
+    def __init__(self, dedupe: bool = True, tol: float = 1e-9, integral: bool = False) -> None:
+        self.dedupe_ = dedupe and not integral
+        self.tol_ = tol
+        self.integral_ = integral
+        self.column_map_ = None
+        self.fixed_values_ = None
+        self.group_size_ = None
+        self.rows_ = None
+        self.statistics_ = {}
+
+    @staticmethod
+    def coerce(data: pd.DataFrame | ItemTable, categorical: List[str], numeric: List[str]) -> ItemTable:
+        """
+        Coerce the dtypes of the columns used by the model: feature columns become categoricals and numeric columns
+        are stored as float32 when it represents all their values exactly, e.g. integer quantities.
+
+        :param data: item table (or pandas dataframe)
+        :param categorical: feature columns
+        :param numeric: numeric columns, e.g. the variable and the objective column
+        :return: ItemTable instance sharing the columns left untouched
+        """
+        items = ItemTable.wrap(data)
+        arrays, dtypes = dict(items.arrays_), dict(items.dtypes_)
+        for name in categorical:
+            if name in arrays and not items.is_categorical(name):
+                values = pd.Categorical(items.array(name))
+                arrays[name], dtypes[name] = values.codes, values.dtype
+        for name in numeric:
+            array = items.array(name)
+            if not items.is_categorical(name) and array.dtype.kind in 'iuf' and array.dtype != np.float32:
+                compact = array.astype(np.float32)
+                if np.array_equal(compact, array, equal_nan=array.dtype.kind == 'f'):
+                    arrays[name] = compact
+        return ItemTable(arrays, dtypes)
+
+    def reduce(self, col_lower: np.ndarray, col_upper: np.ndarray, matrix: ConstraintMatrix, col_cost: np.ndarray,
+               obj: str) -> (np.ndarray, np.ndarray, ConstraintMatrix, np.ndarray):
+        """
+        Reduce a compiled model, given and returned in the form taken by ModelBuilder.load_model.
+
+        :param col_lower: lower bound of each variable
+        :param col_upper: upper bound of each variable
+        :param matrix: compiled constraints
+        :param col_cost: objective coefficient of each variable
+        :param obj: either max or min
+        :return: lower bound and upper bound of each reduced variable, reduced constraints and objective coefficient of each reduced variable
+        """
+        num_col = len(col_lower)
+        sense = 1 if obj == OBJ_MAX else -1
+        fixed = col_lower == col_upper
+        best = np.where(sense * col_cost > 0, col_upper, col_lower)
+        unconstrained = ~fixed & (np.bincount(matrix.index_, minlength=num_col) == 0) & np.isfinite(best)
+        kept = ~(fixed | unconstrained)
+        self.fixed_values_ = np.where(fixed, col_lower, np.where(unconstrained, best, 0.))
+        lp_objective = float(col_cost @ self.fixed_values_)
+        if self.integral_:
+            # rounding loads the solver, which --check-only --preprocess does not need
+            from inventory_optim.optim_model.rounding import integral_bounds
+            lower, upper, _ = integral_bounds(col_lower, col_upper, best)
+            self.fixed_values_ = np.where(fixed, lower, np.where(unconstrained, np.where(sense * col_cost > 0, upper, lower), 0.))
+        offset = matrix.dot(self.fixed_values_)
+        if self.dedupe_ and np.all(matrix.value_ == 1):
+            signatures = constraint_signatures(matrix)[kept]
+            keys = pd.DataFrame({
+                'sig0': signatures[:, 0], 'sig1': signatures[:, 1],
+                'lower': col_lower[kept], 'upper': col_upper[kept], 'cost': col_cost[kept] + 0.  # maps -0. to 0.
+            })
+            group = keys.groupby(['sig0', 'sig1', 'lower', 'upper', 'cost'], sort=False).ngroup().to_numpy()
+        else:
+            group = np.arange(int(kept.sum()))
+        num_groups = int(group.max()) + 1 if len(group) > 0 else 0
+        self.column_map_ = np.full(num_col, -1, dtype=np.int64)
+        self.column_map_[kept] = group
+        self.group_size_ = np.bincount(group, minlength=num_groups)
+        # the entries of merged variables collapse, the others keep their coefficient
+        entries = self.column_map_[matrix.index_] >= 0
+        codes = matrix.row_ids()[entries].astype(np.int64) * max(num_groups, 1) + self.column_map_[matrix.index_[entries]]
+        codes, first = np.unique(codes, return_index=True)
+        start = np.zeros(matrix.num_row + 1, dtype=np.int32)
+        np.cumsum(np.bincount(codes // max(num_groups, 1), minlength=matrix.num_row), out=start[1:])
+        lower, upper = matrix.lower_ - offset, matrix.upper_ - offset
+        reduced = ConstraintMatrix(lower, upper, start, (codes % max(num_groups, 1)).astype(np.int32), matrix.value_[entries][first], num_groups)
+        tol = self.tol_ * np.maximum(1., np.abs(offset))
+        self.rows_ = np.flatnonzero((np.diff(start) > 0) | (lower > tol) | (upper < -tol))
+        reduced = reduced.take_rows(self.rows_)
+        reduced_lower = np.bincount(group, weights=col_lower[kept], minlength=num_groups)
+        reduced_upper = np.bincount(group, weights=col_upper[kept], minlength=num_groups)
+        reduced_cost = np.bincount(group, weights=col_cost[kept], minlength=num_groups) / np.maximum(self.group_size_, 1)
+        self.statistics_ = {
+            'num_column': num_col,
+            'num_reduced_column': num_groups,
+            'num_fixed': int(fixed.sum()),
+            'num_unconstrained': int(unconstrained.sum()),
+            'num_duplicates': int(kept.sum()) - num_groups,
+            'num_row': matrix.num_row,
+            'num_reduced_row': len(self.rows_),
+            'nonzero': matrix.nnz,
+            'reduced_nonzero': reduced.nnz,
+            'fixed_objective': float(col_cost @ self.fixed_values_),
+            'fixed_lp_objective': lp_objective
+        }
+        return reduced_lower, reduced_upper, reduced, reduced_cost
+
+    def restore(self, values: list[float]) -> np.ndarray:
+        """
+        Restore the full-length solution from a solution of the reduced model.
+
+        :param values: solution of the reduced model
+        :return: value of each item, in the order of the data
+        """
+        values = np.asarray(values)
+        full = self.fixed_values_.copy()
+        kept = self.column_map_ >= 0
+        group = self.column_map_[kept]
+        full[kept] = values[group] / self.group_size_[group]
+        if values.dtype.kind in 'iu' and np.all(full == np.round(full)):  # e.g. an integral solution
+            return full.astype(values.dtype)
+        return full
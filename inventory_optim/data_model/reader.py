@@ -0,0 +1,255 @@
+import json
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+from typing import Iterator, List
+from inventory_optim.data_model.item_table import ItemTable
+
+
+CSV = 'csv'
+PARQUET = 'parquet'
+ARROW = 'arrow'
+NPY = 'npy'
+
+
+def detect_format(filepath: str) -> str:
+    """
+    Detect the format of the input data from its path.
+    Directories are NPY column directories; compressed csv files (e.g. .csv.gz) are csv files.
+
+    :param filepath: path of the input data
+    :return: one of csv, parquet, arrow, npy
+    """
+    path = Path(filepath)
+    if path.is_dir():
+        return NPY
+    suffix = path.suffix.lower()
+    if suffix in ['.parquet', '.pq']:
+        return PARQUET
+    if suffix in ['.arrow', '.feather', '.ipc']:
+        return ARROW
+    return CSV
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('reading parquet or arrow files requires pyarrow, run: pip install pyarrow') from e
+    return pyarrow
+
+
+def available_columns(filepath: str) -> List[str]:
+    """
+    Return the column names of the input data without reading the data.
+
+    :param filepath: path of the input data
+    :return: list of column names
+    """
+    data_format = detect_format(filepath)
+    if data_format == CSV:
+        return pd.read_csv(filepath, nrows=0).columns.tolist()
+    if data_format == PARQUET:
+        return _import_pyarrow().parquet.read_schema(filepath).names
+    if data_format == ARROW:
+        pa = _import_pyarrow()
+        with pa.memory_map(filepath) as source:
+            return pa.ipc.open_file(source).schema.names
+    names = [p.name[:-len('.codes.npy')] if p.name.endswith('.codes.npy') else p.stem for p in Path(filepath).glob('*.npy')]
+    meta = Path(filepath) / 'columns.json'
+    if meta.exists():
+        order = json.loads(meta.read_text())
+        return [name for name in order if name in names]
+    return sorted(names)
+
+
+def read_data(filepath: str, columns: List[str] = None, categorical: List[str] = None) -> pd.DataFrame:
+    """
+    Read the input data, loading only the requested columns.
+    Feature columns listed in categorical are loaded as pandas categoricals.
+
+    :param filepath: path of the input data (csv, parquet, arrow ipc file or NPY column directory)
+    :param columns: columns to be loaded, all of them if not provided
+    :param categorical: columns to be loaded as categoricals
+    :return: pandas dataframe
+    """
+    categorical = list(categorical) if categorical is not None else []
+    data_format = detect_format(filepath)
+    if data_format == NPY:
+        return _read_npy_dir(filepath, columns, categorical)
+    if data_format == CSV:
+        df = pd.read_csv(filepath, usecols=columns)  # csv categoricals would hold strings, values are inferred first
+    else:
+        pa = _import_pyarrow()
+        if data_format == PARQUET:
+            table = pa.parquet.read_table(filepath, columns=columns, memory_map=True)
+        else:
+            with pa.memory_map(filepath) as source:
+                table = pa.ipc.open_file(source).read_all()
+            table = table.select(columns) if columns is not None else table
+        df = table.to_pandas()
+    return df.astype({c: 'category' for c in categorical if c in df.columns and df[c].dtype != 'category'})
+
+
+def read_items(filepath: str, columns: List[str] = None, categorical: List[str] = None) -> ItemTable:
+    """
+    Read the input data as a compact item table, loading only the requested columns.
+    NPY column directories are memory-mapped as they are; other formats are read as a dataframe first.
+
+    :param filepath: path of the input data (csv, parquet, arrow ipc file or NPY column directory)
+    :param columns: columns to be loaded, all of them if not provided
+    :param categorical: columns to be loaded as categoricals
+    :return: ItemTable instance
+    """
+    categorical = list(categorical) if categorical is not None else []
+    if detect_format(filepath) == NPY:
+        return _read_npy_items(filepath, columns, categorical)
+    return ItemTable.from_frame(read_data(filepath, columns, categorical))
+
+
+def read_chunks(filepath: str, columns: List[str] = None, chunk_size: int = 1_000_000,
+                skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Read the input data one chunk of rows at a time, loading only the requested columns.
+    Csv files are parsed chunk by chunk, parquet files are read by batches of rows and arrow ipc files by record
+    batches, whatever chunk_size; NPY column directories are memory-mapped and sliced.
+
+    :param filepath: path of the input data (csv, parquet, arrow ipc file or NPY column directory)
+    :param columns: columns to be loaded, all of them if not provided
+    :param chunk_size: number of rows per chunk
+    :param skip_rows: number of rows to skip, e.g. already read with other columns
+    :return: iterator over pandas dataframes
+    """
+    data_format = detect_format(filepath)
+    if data_format == CSV:
+        header = {'skiprows': skip_rows + 1, 'header': None, 'names': available_columns(filepath)} if skip_rows > 0 else {}
+        with pd.read_csv(filepath, usecols=columns, chunksize=chunk_size, **header) as reader:
+            # skipping every row leaves a single empty chunk, without dtypes
+            yield from (chunk for chunk in reader if skip_rows == 0 or len(chunk) > 0)
+    elif skip_rows > 0:
+        for chunk in read_chunks(filepath, columns, chunk_size):
+            if skip_rows < len(chunk):
+                yield chunk.iloc[skip_rows:]
+            skip_rows = max(skip_rows - len(chunk), 0)
+    elif data_format == PARQUET:
+        pa = _import_pyarrow()
+        for batch in pa.parquet.ParquetFile(filepath, memory_map=True).iter_batches(chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif data_format == ARROW:
+        pa = _import_pyarrow()
+        with pa.memory_map(filepath) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i).to_pandas()
+                yield batch[columns] if columns is not None else batch
+    else:
+        items = _read_npy_items(filepath, columns, [])
+        for start in range(0, len(items), chunk_size):
+            yield items.to_frame(rows=slice(start, start + chunk_size))
+
+
+def _read_npy_dir(dirpath: str, columns: List[str], categorical: List[str]) -> pd.DataFrame:
+    """
+    Read a NPY column directory as a pandas dataframe, see _read_npy_items.
+
+    :param dirpath: path of the directory
+    :param columns: columns to be loaded, all of them if not provided
+    :param categorical: columns to be loaded as categoricals
+    :return: pandas dataframe
+    """
+    return _read_npy_items(dirpath, columns, categorical).to_frame()
+
+
+def _read_npy_items(dirpath: str, columns: List[str], categorical: List[str]) -> ItemTable:
+    """
+    Read a NPY column directory. Plain columns are memory-mapped <name>.npy files; categorical columns are stored as
+    <name>.codes.npy plus <name>.categories.json and are loaded without decoding the codes.
+
+    :param dirpath: path of the directory
+    :param columns: columns to be loaded, all of them if not provided
+    :param categorical: columns to be loaded as categoricals
+    :return: ItemTable instance
+    """
+    path = Path(dirpath)
+    arrays, dtypes = {}, {}
+    for name in (columns if columns is not None else available_columns(dirpath)):
+        if (path / f'{name}.codes.npy').exists():
+            arrays[name] = np.load(path / f'{name}.codes.npy', mmap_mode='r')
+            dtypes[name] = pd.CategoricalDtype(json.loads((path / f'{name}.categories.json').read_text()))
+        elif (path / f'{name}.npy').exists():
+            values = np.load(path / f'{name}.npy', mmap_mode='r')
+            if name in categorical:
+                values = pd.Categorical(values)
+                arrays[name], dtypes[name] = values.codes, values.dtype
+            else:
+                arrays[name] = values
+        else:
+            raise KeyError(f'column {name} not found in {dirpath}')
+    return ItemTable(arrays, dtypes)
+
+
+def write_npy_dir(df: pd.DataFrame, dirpath: str, categorical: List[str] = None) -> None:
+    """
+    Write a pandas dataframe as a NPY column directory readable by read_data.
+    Non-numeric columns are always stored as categorical codes.
+
+    :param df: pandas dataframe
+    :param dirpath: path of the output directory
+    :param categorical: numeric columns to be stored as categorical codes as well
+    :return: None
+    """
+    categorical = list(categorical) if categorical is not None else []
+    path = Path(dirpath)
+    path.mkdir(parents=True, exist_ok=True)
+    for name in df.columns:
+        series = df[name]
+        if name in categorical or not pd.api.types.is_numeric_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = pd.factorize(series)
+            np.save(path / f'{name}.codes.npy', codes.astype(np.int32))
+            (path / f'{name}.categories.json').write_text(json.dumps(pd.Series(uniques).tolist()))
+        else:
+            np.save(path / f'{name}.npy', series.to_numpy())
+    (path / 'columns.json').write_text(json.dumps(df.columns.tolist()))
+
+
+def write_npy_chunks(chunks, dirpath: str, num_rows: int) -> None:
+    """
+    Write a sequence of dataframes sharing the same columns as a single NPY column directory readable by read_data,
+    one chunk at a time: every column is preallocated as a memory-mapped file of num_rows entries and filled in place.
+    Categorical columns are stored as codes and must have the same categories in every chunk; the other columns must
+    be numeric.
+
+    :param chunks: iterable of pandas dataframes
+    :param dirpath: path of the output directory
+    :param num_rows: total number of rows of the chunks
+    :return: None
+    """
+    path = Path(dirpath)
+    path.mkdir(parents=True, exist_ok=True)
+    files, categories, position = {}, {}, 0
+    for chunk in chunks:
+        if not files:
+            for name in chunk.columns:
+                series = chunk[name]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    categories[name] = series.cat.categories.tolist()
+                    (path / f'{name}.categories.json').write_text(json.dumps(categories[name]))
+                    files[name] = np.lib.format.open_memmap(path / f'{name}.codes.npy', 'w+', np.int32, (num_rows,))
+                else:
+                    assert pd.api.types.is_numeric_dtype(series), f'column {name} is neither numeric nor categorical'
+                    files[name] = np.lib.format.open_memmap(path / f'{name}.npy', 'w+', series.dtype, (num_rows,))
+            (path / 'columns.json').write_text(json.dumps(chunk.columns.tolist()))
+        rows = slice(position, position + len(chunk))
+        for name, file in files.items():
+            if name in categories:
+                assert chunk[name].cat.categories.tolist() == categories[name], f'categories of {name} differ between chunks'
+                file[rows] = chunk[name].cat.codes
+            else:
+                file[rows] = chunk[name].to_numpy()
+        position += len(chunk)
+    assert position == num_rows, f'{position} rows written, {num_rows} expected'
+    for file in files.values():
+        file.flush()
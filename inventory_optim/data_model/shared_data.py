@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from multiprocessing import shared_memory
+from typing import List
+
+
+class SharedDataset:
+    """
+    Dataset published in shared memory, so that worker processes can attach to it without copying or re-parsing.
+    Numeric columns are shared as they are; any other column is shared as int32 categorical codes, its categories
+    travel with the (picklable) descriptor.
+    """
+    def __init__(self, descriptor: dict, blocks: List[shared_memory.SharedMemory], owner: bool) -> None:
+        self.descriptor_ = descriptor
+        self.blocks_ = blocks
+        self.owner_ = owner
+
+    @classmethod
+    def publish(cls, df: pd.DataFrame, columns: List[str] = None) -> 'SharedDataset':
+        """
+        Copy the columns of a pandas dataframe into shared memory blocks.
+
+        :param df: pandas dataframe
+        :param columns: columns to be published, all of them if not provided
+        :return: SharedDataset instance owning the shared memory blocks
+        """
+        descriptor, blocks = {'num_rows': len(df), 'columns': {}}, []
+        for name in (columns if columns is not None else df.columns.tolist()):
+            series = df[name]
+            categories = None
+            if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+                array = series.to_numpy()
+            else:
+                codes, uniques = pd.factorize(series)
+                array, categories = codes.astype(np.int32), uniques.tolist()
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            blocks.append(block)
+            descriptor['columns'][name] = {'shm': block.name, 'dtype': array.dtype.str, 'categories': categories}
+        return cls(descriptor, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> 'SharedDataset':
+        """
+        Attach to a dataset published by another process.
+
+        :param descriptor: descriptor of the published dataset
+        :return: SharedDataset instance
+        """
+        blocks = [shared_memory.SharedMemory(name=c['shm']) for c in descriptor['columns'].values()]
+        return cls(descriptor, blocks, owner=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return a pandas dataframe whose numeric columns are views on the shared memory blocks.
+        Feature columns are returned as pandas categoricals.
+
+        :return: pandas dataframe
+        """
+        num_rows, columns = self.descriptor_['num_rows'], {}
+        for (name, column), block in zip(self.descriptor_['columns'].items(), self.blocks_):
+            array = np.ndarray((num_rows,), dtype=np.dtype(column['dtype']), buffer=block.buf)
+            if column['categories'] is None:
+                columns[name] = array
+            else:
+                columns[name] = pd.Categorical.from_codes(array, categories=column['categories'])
+        return pd.DataFrame(columns, copy=False)
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory blocks and release them if this instance owns them.
+
+        :return: None
+        """
+        for block in self.blocks_:
+            block.close()
+            if self.owner_:
+                block.unlink()
+        self.blocks_ = []
@@ -1,8 +1,18 @@
+import bz2
+import gzip
+import lzma
 import pandas as pd
+import numpy as np
 import json
 import os
 
 from pathlib import Path
+from typing import List
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.monitoring.tracing import tracer
+
+
+CSV_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
 
 
 class Exporter:
@@ -22,19 +32,127 @@ class Exporter:
         Path(filepath).write_text(statistics_json)
 
     @staticmethod
-    def export_solution(target_file: str, df: pd.DataFrame, values: list[float], optim_col_name='opt') -> None:
+    def export_solution(target_file: str, df: pd.DataFrame | ItemTable, values: list[float], optim_col_name='opt',
+                        columns: List[str] = None, reference_col: str = None, preprocessor=None,
+                        chunk_size: int = 1_000_000) -> None:
         """
-        Export solution to csv file.
+        Export solution to file, leaving df untouched.
+        The output is written in chunks of rows; its format is inferred from the extension of the target file:
+        csv (possibly compressed as .gz, .bz2, .xz), parquet or arrow ipc (.arrow, .feather), the last two requiring
+        pyarrow.
 
         :param target_file: output filepath
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param values: solution
-        :param optim_col_name: name of the column within the pandas dataframe where solution is stored
+        :param optim_col_name: name of the output column where solution is stored
+        :param columns: columns of df copied to the output, all of them if not provided
+        :param reference_col: if provided, only rows whose solution differs from this column are exported
+        :param preprocessor: Preprocessor instance that reduced the model, if values is a solution of the reduced model
+        :param chunk_size: number of rows per chunk
+        :return: None
+        """
+        items = ItemTable.wrap(df)
+        values = preprocessor.restore(values) if preprocessor is not None else np.asarray(values)
+        assert len(items) == len(values)
+        columns = columns if columns is not None else items.columns
+        missing = [c for c in columns if c not in items.columns]
+        assert len(missing) == 0, f'columns {missing} not found in data'
+        rows = np.flatnonzero(values != items.numeric(reference_col, None)) if reference_col is not None else None
+        num_rows = len(items) if rows is None else len(rows)
+        chunks = (
+            Exporter.__make_chunk(items, values, columns, optim_col_name, start, min(start + chunk_size, num_rows), rows)
+            for start in range(0, max(num_rows, 1), chunk_size)
+        )
+        Exporter.write_chunks(target_file, chunks)
+
+    @staticmethod
+    def export_sensitivity(target_file: str, report, chunk_size: int = 1_000_000) -> (str, str):
+        """
+        Export a sensitivity report as two columnar files, one row per constraint and one row per item, named after
+        the target file, e.g. res_sensitivity.constraints.csv and res_sensitivity.items.csv for res_sensitivity.csv.
+        The format is inferred from the extension of the target file, as for the solution.
+
+        :param target_file: output filepath
+        :param report: SensitivityReport instance
+        :param chunk_size: number of rows per chunk
+        :return: paths of the constraint and item files
+        """
+        path = Path(target_file)
+        paths = []
+        for name, table in [('constraints', report.constraints_), ('items', report.items_)]:
+            paths.append(str(path.with_name(f'{path.stem}.{name}{path.suffix}')))
+            chunks = (table.to_frame(rows=slice(start, start + chunk_size)) for start in range(0, max(len(table), 1), chunk_size))
+            Exporter.write_chunks(paths[-1], chunks)
+        return paths[0], paths[1]
+
+    @staticmethod
+    def write_chunks(target_file: str, chunks) -> None:
+        """
+        Write a sequence of dataframes sharing the same columns to a single file, one chunk at a time.
+        The format is inferred from the extension of the target file: csv (possibly compressed as .gz, .bz2, .xz),
+        parquet or arrow ipc (.arrow, .feather), the last two requiring pyarrow.
+
+        :param target_file: output filepath
+        :param chunks: iterable of pandas dataframes
         :return: None
         """
-        assert len(df) == len(values)
-        df[optim_col_name] = values
         file = os.path.dirname(target_file)
         if file != '' and not Path(file).exists():
             Path(file).mkdir(parents=True)
-        df.to_csv(target_file, index=False)
+        suffix = Path(target_file).suffix.lower()
+        if suffix in ['.parquet', '.pq', '.arrow', '.feather']:
+            Exporter.__write_arrow(target_file, chunks, suffix in ['.parquet', '.pq'])
+        else:
+            with CSV_OPENERS.get(suffix, open)(target_file, 'wt', newline='') as f:
+                for i, chunk in enumerate(chunks):
+                    with tracer.span('write_chunk', num_rows=len(chunk)):
+                        chunk.to_csv(f, index=False, header=i == 0)
+
+    @staticmethod
+    @tracer.span('make_chunk')
+    def __make_chunk(items: ItemTable, values: np.ndarray, columns: List[str], optim_col_name: str, start: int,
+                     stop: int, rows: np.ndarray = None) -> pd.DataFrame:
+        """
+        Build the output rows [start, stop), copying only the exported columns of such rows.
+
+        :param items: item table containing features and variables to be optimized
+        :param values: solution
+        :param columns: exported columns
+        :param optim_col_name: name of the output column where solution is stored
+        :param start: first output row
+        :param stop: last output row (excluded)
+        :param rows: positions in items of the exported rows, all of them if not provided
+        :return: chunk of the output
+        """
+        selection = slice(start, stop) if rows is None else rows[start:stop]
+        chunk = items.to_frame(columns, selection)
+        chunk[optim_col_name] = values[selection]
+        return chunk
+
+    @staticmethod
+    def __write_arrow(target_file: str, chunks, parquet: bool) -> None:
+        """
+        Write chunks to a parquet file (one row group per chunk) or to an arrow ipc file (one record batch per chunk).
+
+        :param target_file: output filepath
+        :param chunks: iterable of pandas dataframes sharing the same schema
+        :param parquet: True for parquet, False for arrow ipc
+        :return: None
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError('writing parquet or arrow files requires pyarrow, run: pip install pyarrow') from e
+        writer = None
+        try:
+            for chunk in chunks:
+                with tracer.span('write_chunk', num_rows=len(chunk)):
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pa.parquet.ParquetWriter(target_file, table.schema) if parquet else pa.ipc.new_file(target_file, table.schema)
+                    writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
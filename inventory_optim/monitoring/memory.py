@@ -0,0 +1,12 @@
+import resource
+import sys
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process.
+
+    :return: peak resident set size in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10  # bytes on macOS, kilobytes on Linux
@@ -0,0 +1,42 @@
+import json
+
+from logging import Logger
+from pathlib import Path
+
+
+class ProgressStream:
+    """
+    Sink of the progress records of a solve: every record is logged and appended as a json line to a file, if any.
+    The file is flushed after every record, so that it can be followed while the solve runs (e.g. tail -f).
+    """
+    def __init__(self, filepath: str = None, logger: Logger = None) -> None:
+        if filepath is not None:
+            Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        self.file_ = open(filepath, 'w') if filepath is not None else None
+        self.logger_ = logger
+        self.num_records_ = 0
+
+    def record(self, record: dict) -> None:
+        """
+        Push a progress record.
+
+        :param record: progress record
+        :return: None
+        """
+        self.num_records_ += 1
+        if self.file_ is not None:
+            self.file_.write(json.dumps(record) + '\n')
+            self.file_.flush()
+        if self.logger_ is not None:
+            self.logger_.info(' '.join(f'{key}={value:.6g}' if isinstance(value, float) else f'{key}={value}' for key, value in record.items()))
+
+    def close(self) -> None:
+        if self.file_ is not None:
+            self.file_.close()
+            self.file_ = None
+
+    def __enter__(self) -> 'ProgressStream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
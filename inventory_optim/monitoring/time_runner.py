@@ -1,5 +1,9 @@
+import threading
+
+from contextlib import contextmanager
 from logging import Logger
 from timeit import default_timer as timer
+from inventory_optim.monitoring.tracing import tracer
 
 
 class Timer:
@@ -13,11 +17,39 @@ class Timer:
         return timer() - self.timer_
 
 
+class StageTimer:
+    """
+    Busy time of the stages of a pipeline, summed over the work items of every stage. Stages may run in different
+    threads and overlap in time, so that the sum of their busy times may exceed the wall time of the pipeline.
+    """
+    def __init__(self) -> None:
+        self.busy_ = {}
+        self.lock_ = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a work item of a stage, also traced as a span named after the stage.
+
+        :param name: name of the stage
+        :return: context manager
+        """
+        with tracer.span(name):
+            start = timer()
+            try:
+                yield
+            finally:
+                elapsed = timer() - start
+                with self.lock_:
+                    self.busy_[name] = self.busy_.get(name, 0.) + elapsed
+
+
 class TimeRunner:
     @staticmethod
     def measure_elapsed_time(stats: dict, function: callable, args: list, info_stat: str):
         """
         Measure running time of a function and store it in dictionary.
+        The call is also traced as a span named after the key.
 
         :param stats: dictionary containing all statistics
         :param function: function to measure running time
@@ -25,9 +57,10 @@ class TimeRunner:
         :param info_stat: key in which the running time is going to be stored
         :return: result of the running function
         """
-        start = timer()
-        res = function(*args)
-        stats[info_stat]= timer() - start
+        with tracer.span(info_stat.removesuffix('(s)')):
+            start = timer()
+            res = function(*args)
+            stats[info_stat]= timer() - start
         return res
 
     @staticmethod
@@ -48,5 +81,32 @@ class TimeRunner:
         logger.info(f'elapsed time {stats[info_stat]} in {info}')
         return res
 
+    @staticmethod
+    def run_stages_and_log(stats: dict, function: callable, args: list, info_stat: str, info: str, logger: Logger):
+        """
+        Log and measure running time of a function whose stages overlap, e.g. running in threads. The function gets a
+        StageTimer as last argument. The wall time is stored under info_stat, the busy time of every stage under
+        <name>(s) of a dictionary stored under info_stat without (s) plus _stages, with their sum and the overlap,
+        i.e. the time saved with respect to running the stages in sequence.
+
+        :param stats: dictionary containing all statistics
+        :param function: function to measure running time
+        :param args: function arguments
+        :param info_stat: key in which the running time is going to be stored
+        :param info: info's name output by the logger
+        :param logger: logger
+        :return: result of the running function
+        """
+        stages = StageTimer()
+        res = TimeRunner.run_and_log(stats, function, list(args) + [stages], info_stat, info, logger)
+        busy = sum(stages.busy_.values())
+        stats[info_stat.removesuffix('(s)') + '_stages'] = {
+            **{f'{name}(s)': elapsed for name, elapsed in stages.busy_.items()},
+            'sum(s)': busy,
+            'overlap(s)': busy - stats[info_stat]
+        }
+        logger.info(f'stages busy for {busy} in {stats[info_stat]} of wall time')
+        return res
+
 
 global_timer = Timer()
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from contextlib import ContextDecorator
+from pathlib import Path
+from inventory_optim.monitoring.memory import peak_rss_mb
+
+
+class Span(ContextDecorator):
+    """
+    Traced section of code, usable as a context manager or as a decorator.
+    Spans opened while another span is open in the same thread are nested into it. Each span records wall time, the
+    CPU time of its thread (cpu(s), additive across threads) and of the whole process (process_cpu(s), which includes
+    the other threads, e.g. pipeline stages or multithreaded solver calls), the peak resident set size at its end and, when the tracer traces memory, the tracemalloc delta and peak of
+    the memory allocated by Python within the span. Attributes (e.g. solver metrics) can be attached with set.
+    """
+    def __init__(self, tracer: 'Tracer', name: str, args: dict) -> None:
+        self.tracer_ = tracer
+        self.name_ = name
+        self.args_ = args
+        self.record_ = None
+
+    def _recreate_cm(self) -> 'Span':
+        return Span(self.tracer_, self.name_, dict(self.args_))  # a decorated function may be re-entered
+
+    def set(self, **args) -> None:
+        """
+        Attach attributes to the span.
+
+        :param args: attributes
+        :return: None
+        """
+        self.args_.update(args)
+
+    def __enter__(self) -> 'Span':
+        tracer = self.tracer_
+        if not tracer.enabled_:
+            return self
+        stack = tracer.stack()
+        self.record_ = {
+            'name': self.name_,
+            'path': '/'.join([s.name_ for s in stack] + [self.name_]),
+            'depth': len(stack),
+            'tid': threading.get_ident(),
+            'start': time.perf_counter() - tracer.origin_,
+            'cpu_start': time.thread_time(),
+            'process_cpu_start': time.process_time(),
+            'peak_rss_start(MB)': peak_rss_mb()
+        }
+        if tracer.trace_memory_:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].alloc_peak_ = max(stack[-1].alloc_peak_, peak)
+            tracemalloc.reset_peak()
+            self.alloc_start_, self.alloc_peak_ = current, current
+        stack.append(self)
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        tracer = self.tracer_
+        if self.record_ is None:
+            return False
+        stack = tracer.stack()
+        stack.pop()
+        record = self.record_
+        record['wall(s)'] = time.perf_counter() - tracer.origin_ - record['start']
+        record['cpu(s)'] = time.thread_time() - record.pop('cpu_start')
+        record['process_cpu(s)'] = time.process_time() - record.pop('process_cpu_start')
+        record['peak_rss(MB)'] = peak_rss_mb()
+        record['peak_rss_delta(MB)'] = record['peak_rss(MB)'] - record.pop('peak_rss_start(MB)')
+        if tracer.trace_memory_:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self.alloc_peak_, peak)
+            if stack:
+                stack[-1].alloc_peak_ = max(stack[-1].alloc_peak_, peak)
+            tracemalloc.reset_peak()
+            record['alloc_delta(MB)'] = (current - self.alloc_start_) / 2 ** 20
+            record['alloc_peak(MB)'] = (peak - self.alloc_start_) / 2 ** 20
+        record['args'] = self.args_
+        if exc[0] is not None:
+            record['args']['error'] = exc[0].__name__
+        tracer.spans_.append(record)
+        return False
+
+
+class Tracer:
+    """
+    Collector of hierarchical spans, disabled until started so that instrumented code pays almost nothing.
+    """
+    def __init__(self) -> None:
+        self.enabled_ = False
+        self.trace_memory_ = False
+        self.origin_ = time.perf_counter()
+        self.spans_ = []
+        self.local_ = threading.local()
+
+    def start(self, trace_memory: bool = False) -> None:
+        """
+        Start collecting spans.
+
+        :param trace_memory: flag to trace Python allocations with tracemalloc, which slows down allocations
+        :return: None
+        """
+        self.enabled_, self.trace_memory_ = True, trace_memory
+        self.origin_, self.spans_ = time.perf_counter(), []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        """
+        Stop collecting spans; the collected ones are kept.
+
+        :return: None
+        """
+        if self.trace_memory_:
+            tracemalloc.stop()
+        self.enabled_, self.trace_memory_ = False, False
+
+    def stack(self) -> list:
+        """
+        Spans open in the current thread.
+
+        :return: list of spans, outermost first
+        """
+        if not hasattr(self.local_, 'stack'):
+            self.local_.stack = []
+        return self.local_.stack
+
+    def span(self, name: str, **args) -> Span:
+        """
+        Create a span.
+
+        :param name: name of the span
+        :param args: attributes of the span
+        :return: Span instance
+        """
+        return Span(self, name, args)
+
+    def summary(self) -> dict:
+        """
+        Aggregate the spans by path.
+
+        :return: dictionary mapping each path to count, total wall and thread CPU time and maximum peak RSS
+        """
+        res = {}
+        for record in sorted(self.spans_, key=lambda r: r['start']):
+            entry = res.setdefault(record['path'], {'count': 0, 'wall(s)': 0., 'cpu(s)': 0., 'peak_rss(MB)': 0.})
+            entry['count'] += 1
+            entry['wall(s)'] += record['wall(s)']
+            entry['cpu(s)'] += record['cpu(s)']
+            entry['peak_rss(MB)'] = max(entry['peak_rss(MB)'], record['peak_rss(MB)'])
+            if 'alloc_peak(MB)' in record:
+                entry['alloc_peak(MB)'] = max(entry.get('alloc_peak(MB)', 0.), record['alloc_peak(MB)'])
+        return res
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Convert the spans to the Chrome trace event format, readable by chrome://tracing and Perfetto.
+        Every span is a complete event; the peak RSS is also reported as a counter.
+
+        :return: dictionary in Chrome trace event format
+        """
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'inventory_optim'}}]
+        for record in sorted(self.spans_, key=lambda r: r['start']):
+            args = {k: v for k, v in record.items() if k not in ['name', 'path', 'depth', 'tid', 'start', 'wall(s)', 'args']}
+            args.update(record['args'])
+            events.append({
+                'name': record['name'],
+                'cat': record['path'].split('/')[0],
+                'ph': 'X',
+                'pid': pid,
+                'tid': record['tid'],
+                'ts': record['start'] * 1e6,
+                'dur': record['wall(s)'] * 1e6,
+                'args': args
+            })
+            events.append({
+                'name': 'peak_rss(MB)',
+                'ph': 'C',
+                'pid': pid,
+                'ts': (record['start'] + record['wall(s)']) * 1e6,
+                'args': {'peak_rss(MB)': record['peak_rss(MB)']}
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, filepath: str) -> None:
+        """
+        Export the spans to a Chrome trace file.
+
+        :param filepath: output filepath
+        :return: None
+        """
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        Path(filepath).write_text(json.dumps(self.to_chrome_trace(), default=str))
+
+
+tracer = Tracer()
+
+
+def trace_path(statistics_path: str) -> str:
+    """
+    Path of the trace file written next to a statistics file, e.g. data/res_stats.trace.json for data/res_stats.json.
+
+    :param statistics_path: path of the statistics file
+    :return: path of the trace file
+    """
+    path = Path(statistics_path)
+    return str(path.with_name(f'{path.stem}.trace.json'))
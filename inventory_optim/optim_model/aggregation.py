@@ -0,0 +1,129 @@
+import highspy
+import numpy as np
+import pandas as pd
+
+from timeit import default_timer as timer
+from inventory_optim.optim_model.builder import HighsSolver, ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix, constraint_signatures
+
+
+class AggregatedSolver:
+    """
+    Solve a built model on its aggregation.
+    Variables with the same constraint signature and the same objective coefficient are interchangeable: each group
+    is collapsed into a single variable whose bounds are the sums of the bounds of the group. The aggregated LP is
+    solved and the value of each group is split back among its variables greedily by objective coefficient, which is
+    exact when groups share the coefficient. With cost_decimals, coefficients are rounded before grouping: groups get
+    larger and the split stays feasible, but the aggregated optimum may no longer be the optimum of the full model.
+    """
+    def __init__(self, mb: ModelBuilder, cost_decimals: int = None) -> None:
+        assert mb.matrix_ is not None, 'aggregation requires the bulk build path'
+        self.mb_ = mb
+        self.cost_decimals_ = cost_decimals
+        self.highs_ = HighsSolver(mb.highs_.impl_.getOptionValue('time_limit')[1])
+        self.highs_.impl_.setOptionValue('output_flag', mb.highs_.impl_.getOptionValue('output_flag')[1])
+        self.groups_ = None
+        self.statistics_ = {}
+
+    def aggregate(self) -> ConstraintMatrix:
+        """
+        Group the variables and build the aggregated model into the solver.
+
+        :return: aggregated constraint matrix
+        """
+        start = timer()
+        mb, matrix = self.mb_, self.mb_.matrix_
+        cost = mb.col_cost_ if self.cost_decimals_ is None else np.round(mb.col_cost_, self.cost_decimals_)
+        signatures = constraint_signatures(matrix)
+        keys = pd.DataFrame({'sig0': signatures[:, 0], 'sig1': signatures[:, 1], 'cost': cost + 0.})  # maps -0. to 0.
+        self.groups_ = keys.groupby(['sig0', 'sig1', 'cost'], sort=False).ngroup().to_numpy()
+        num_groups = int(self.groups_.max()) + 1 if len(self.groups_) > 0 else 0
+        size = np.bincount(self.groups_, minlength=num_groups)
+        col_lower = np.bincount(self.groups_, mb.col_lower_, minlength=num_groups)
+        col_upper = np.bincount(self.groups_, mb.col_upper_, minlength=num_groups)
+        col_cost = np.bincount(self.groups_, mb.col_cost_, minlength=num_groups) / np.maximum(size, 1)
+        entries = np.unique(matrix.row_ids().astype(np.int64) * num_groups + self.groups_[matrix.index_])
+        row_start = np.zeros(matrix.num_row + 1, dtype=np.int32)
+        np.cumsum(np.bincount(entries // num_groups, minlength=matrix.num_row), out=row_start[1:])
+        aggregated = ConstraintMatrix(
+            matrix.lower_, matrix.upper_, row_start, (entries % num_groups).astype(np.int32),
+            np.ones(len(entries), dtype=np.float64), num_groups
+        )
+        self.statistics_['aggregation(s)'] = timer() - start
+        start = timer()
+        impl = self.highs_.impl_
+        impl.addVars(num_groups, col_lower, col_upper)
+        impl.addRows(aggregated.num_row, aggregated.lower_, aggregated.upper_, aggregated.nnz, aggregated.start_[:-1], aggregated.index_, aggregated.value_)
+        impl.changeObjectiveSense(highspy.ObjSense.kMaximize if mb.obj_ == OBJ_MAX else highspy.ObjSense.kMinimize)
+        impl.changeColsCost(num_groups, np.arange(num_groups, dtype=np.int32), col_cost)
+        self.statistics_['build_aggregated_model(s)'] = timer() - start
+        self.statistics_.update({
+            'num_column': matrix.num_col_,
+            'num_aggregated_column': num_groups,
+            'nonzero': matrix.nnz,
+            'aggregated_nonzero': aggregated.nnz,
+            'reduction_ratio': matrix.num_col_ / num_groups if num_groups > 0 else None,
+            'exact': self.cost_decimals_ is None
+        })
+        return aggregated
+
+    def disaggregate(self, group_values: np.ndarray) -> np.ndarray:
+        """
+        Split the value of each group among its variables: every variable starts from its lower bound and the
+        remaining volume of the group is assigned by decreasing (increasing when minimizing) objective coefficient.
+
+        :param group_values: solution of the aggregated model
+        :return: solution of the full model
+        """
+        mb = self.mb_
+        num_groups = len(group_values)
+        width = mb.col_upper_ - mb.col_lower_
+        extra = group_values - np.bincount(self.groups_, mb.col_lower_, minlength=num_groups)
+        direction = -1 if mb.obj_ == OBJ_MAX else 1
+        order = np.lexsort((direction * mb.col_cost_, self.groups_))
+        cumulative = np.cumsum(width[order])
+        group_start = np.searchsorted(self.groups_[order], np.arange(num_groups))
+        before = cumulative - width[order] - np.concatenate(([0.], cumulative))[group_start][self.groups_[order]]
+        values = np.empty(len(width))
+        values[order] = mb.col_lower_[order] + np.clip(extra[self.groups_[order]] - before, 0, width[order])
+        return values
+
+    def solve(self) -> (bool, list[float]):
+        """
+        Aggregate the model, solve it and disaggregate the solution.
+
+        :return: solution flag and solution
+        """
+        self.aggregate()
+        start = timer()
+        self.highs_.impl_.setOptionValue('log_to_console', True)
+        self.highs_.impl_.run()
+        solution = self.highs_.impl_.getSolution()
+        self.statistics_['solving_aggregated_model(s)'] = timer() - start
+        start = timer()
+        values = self.disaggregate(np.array(solution.col_value)) if solution.value_valid else np.array(solution.col_value)
+        self.statistics_['disaggregation(s)'] = timer() - start
+        return solution.value_valid, values.tolist()
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the aggregated model.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        matrix = self.mb_.matrix_
+        statistics['lp'] = {'num_column': matrix.num_col_, 'num_row': matrix.num_row, 'nonzero': matrix.nnz}
+        info = self.highs_.impl_.getInfo()
+        statistics['solving'] = {
+            'status': self.highs_.impl_.modelStatusToString(self.highs_.impl_.getModelStatus()),
+            'iteration_count': info.simplex_iteration_count,
+            'solver': {
+                'name': 'Highs',
+                'api': 'Highspy',
+                'version': self.highs_.impl_.version(),
+                'compilation_data': self.highs_.impl_.compilationDate()
+            }
+        }
+        statistics['aggregation'] = self.statistics_
@@ -3,11 +3,13 @@ import numpy as np
 import pandas as pd
 
 from typing import List
-from inventory_optim.data_model.constraints import Constraint
-
-
-OBJ_MAX = 'max'
-OBJ_MIN = 'min'
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.constants import OBJ_MAX, OBJ_MIN
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.optim_model.templates import compile_constraints
 
 
 class HighsSolver:
@@ -44,58 +46,192 @@ class ModelBuilder:
     """
     def __init__(self, time_limit_seconds=60) -> None:
         self.highs_ = HighsSolver(time_limit_seconds)
+        self.scope_index_ = None
+        self.constraints_ = None
+        self.matrix_ = None
+        self.col_lower_ = None
+        self.col_upper_ = None
+        self.col_cost_ = None
+        self.obj_ = None
 
-    def create_variables(self, df: pd.DataFrame, var_incr: float, var_decr: float, var_name: str) -> None:
+    def create_variables(self, df: pd.DataFrame | ItemTable, var_incr: float, var_decr: float, var_name: str) -> None:
         """
         Create variables involved in the optimization problem.
         Each variable is associated with its bounds [lb, ub], as defined by user's inputs.
 
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param var_incr: upper bound in percentage used to compute the upper bound of optimization variables
         :param var_decr: lower bound in percentage used to compute the lower bound of optimization variables
         :param var_name: name of the column used as reference to compute lower/upper bounds of optimization variables
         :return: None
         """
-        df['increase'] = var_incr
-        df['decrease'] = var_decr
-        self.highs_.impl_.addVars(
-            df.shape[0],
-            (df['decrease'] * df[var_name]).to_numpy(),  # lower_bound
-            (df['increase'] * df[var_name]).to_numpy()  # upper_bound
-        )  # bounds are defined as a function of the allocation observed in the reference data
+        reference = ItemTable.wrap(df).numeric(var_name)
+        # bounds are defined as a function of the allocation observed in the reference data
+        self.add_variables(var_decr * reference, var_incr * reference)
+
+    def add_variables(self, col_lower: np.ndarray, col_upper: np.ndarray, col_cost: np.ndarray = None) -> None:
+        """
+        Append variables to the model, e.g. one chunk of the data at a time while the data is still being read.
+        With col_cost, their objective coefficients are set as well, the direction being set by set_objective_sense.
 
-    def build_model(self, df: pd.DataFrame, constraints: List[Constraint], obj_feature_name: str="CONTRIB", obj: str='max') -> None:
+        :param col_lower: lower bound of each new variable
+        :param col_upper: upper bound of each new variable
+        :param col_cost: objective coefficient of each new variable
+        :return: None
+        """
+        with tracer.span('highs_add_vars', num_column=len(col_lower)):
+            if col_cost is None:
+                self.highs_.impl_.addVars(len(col_lower), col_lower, col_upper)
+            else:  # much faster than setting the coefficients afterwards with changeColsCost
+                self.highs_.impl_.addCols(len(col_lower), col_cost, col_lower, col_upper, 0, np.zeros(len(col_lower), dtype=np.int32),
+                                          np.zeros(0, dtype=np.int32), np.zeros(0))
+        if self.col_lower_ is None:
+            self.col_lower_, self.col_upper_ = col_lower, col_upper
+        else:
+            self.col_lower_ = np.concatenate([self.col_lower_, col_lower])
+            self.col_upper_ = np.concatenate([self.col_upper_, col_upper])
+        if col_cost is not None:
+            self.col_cost_ = col_cost if self.col_cost_ is None else np.concatenate([self.col_cost_, col_cost])
+
+    def build_model(self, df: pd.DataFrame | ItemTable, constraints: List[Constraint], obj_feature_name: str="CONTRIB", obj: str='max',
+                    index: ScopeIndex = None, bulk: bool = True, load: bool = True,
+                    templates: List[ConstraintTemplate] = None) -> None:
         """
         Define the set of constraints and the objective function.
+        By default, constraints are compiled into a single CSR matrix passed to Highs with one addRows call.
+        The legacy path (bulk=False) adds one row at a time.
+        With load=False the compiled matrix is not passed to Highs, e.g. when the model is solved by blocks.
+        Constraint templates are expanded after the explicit constraints, only by the bulk path.
 
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param constraints: involved constraints
         :param obj_feature_name: feature used to build the objective function
         :param obj: either max or min
+        :param index: scope index built on df, created if not provided
+        :param bulk: flag to assemble all the constraints at once
+        :param load: flag to pass the compiled constraints to Highs, only used by the bulk path
+        :param templates: constraint templates
+        :return: None
+        """
+        self.scope_index_ = index if index is not None else ScopeIndex(df)
+        if bulk:
+            self.add_constraints(self.scope_index_, constraints, load, templates)
+        else:
+            assert not templates, 'constraint templates require the bulk build path'
+            self.constraints_ = constraints
+            with tracer.span('build_constraints', num_constraints=len(constraints)):
+                for constraint in constraints:
+                    self.__build_constraint(constraint)
+        with tracer.span('make_objective'):
+            self.make_objective(df, obj_feature_name, obj)
+
+    def add_constraints(self, index: ScopeIndex, constraints: List[Constraint], load: bool = True,
+                        templates: List[ConstraintTemplate] = None) -> None:
+        """
+        Compile the constraints and the expansion of the templates into a single CSR matrix, passed to Highs with one
+        addRows call.
+
+        :param index: scope index built on the data
+        :param constraints: involved constraints
+        :param load: flag to pass the compiled constraints to Highs
+        :param templates: constraint templates
+        :return: None
+        """
+        self.scope_index_ = index
+        with tracer.span('compile_constraints'):
+            self.constraints_, self.matrix_ = compile_constraints(index, constraints, templates)
+        if load:
+            self.__add_rows(self.matrix_)
+
+    def load_model(self, col_lower: np.ndarray, col_upper: np.ndarray, matrix: ConstraintMatrix, col_cost: np.ndarray,
+                   obj: str = 'max', load: bool = True) -> None:
+        """
+        Define the model from its compiled form, e.g. read from the model cache, instead of creating variables and
+        building the model from data.
+
+        :param col_lower: lower bound of each variable
+        :param col_upper: upper bound of each variable
+        :param matrix: compiled constraints
+        :param col_cost: objective coefficient of each variable
+        :param obj: either max or min
+        :param load: flag to pass the compiled constraints to Highs
         :return: None
         """
-        for constraint in constraints:
-            self.__build_constraint(df, constraint)
-        self.__make_objective(df, obj_feature_name, obj)
+        self.col_lower_, self.col_upper_, self.matrix_ = col_lower, col_upper, matrix
+        with tracer.span('highs_add_vars', num_column=len(col_lower)):
+            self.highs_.impl_.addVars(len(col_lower), col_lower, col_upper)
+        if load:
+            self.__add_rows(matrix)
+        self.set_objective(col_cost, obj)
 
-    def __build_constraint(self, df: pd.DataFrame, constraint: Constraint) -> None:
+    def __add_rows(self, matrix: ConstraintMatrix) -> None:
+        """
+        Pass a compiled constraint matrix to the solver.
+
+        :param matrix: compiled constraints
+        :return: None
+        """
+        with tracer.span('highs_add_rows', num_row=matrix.num_row, nonzero=matrix.nnz):
+            self.highs_.impl_.addRows(
+                matrix.num_row, matrix.lower_, matrix.upper_, matrix.nnz, matrix.start_[:-1], matrix.index_, matrix.value_
+            )
+
+    def __build_constraint(self, constraint: Constraint) -> None:
         """
         Create a constraint based on constraint definition and data.
 
-        :param df: pandas dataframe containing features and variables to be optimized
         :param constraint: target constraint
         :return: None
         """
-        scope = get_constraint_scope(df, constraint)
+        with tracer.span('scope_query'):
+            scope = self.scope_index_.get_scope(constraint)
         coeffs = np.full(len(scope), fill_value=1)
-        self.highs_.impl_.addRow(constraint['lb'], constraint['ub'], len(coeffs), scope, coeffs)
+        with tracer.span('highs_add_row', nonzero=len(scope)):
+            self.highs_.impl_.addRow(constraint['lb'], constraint['ub'], len(coeffs), scope, coeffs)
+
+    def make_objective(self, df: pd.DataFrame | ItemTable, obj_feature_name: str, obj: str) -> None:
+        """
+        Create the objective function. Missing coefficients are set to 0; the column is copied only if it has any
+        or if it is not stored as float64.
+
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
+        :param obj_feature_name: name of the feature whose values are set as coefficients to build the obj function
+        :param obj: either max or min
+        :return: None
+        """
+        self.set_objective(ModelBuilder.objective_coefficients(df, obj_feature_name), obj)
 
-    def __make_objective(self, df: pd.DataFrame, obj_feature_name: str, obj: str) -> None:
+    @staticmethod
+    def objective_coefficients(df: pd.DataFrame | ItemTable, obj_feature_name: str) -> np.ndarray:
         """
-        Create the objective function.
+        Read the objective coefficients, missing ones being set to 0.
 
-        :param df: pandas dataframe containing features and variables to be optimized
+        :param df: item table (or pandas dataframe) containing features and variables to be optimized
         :param obj_feature_name: name of the feature whose values are set as coefficients to build the obj function
+        :return: objective coefficient of each variable
+        """
+        cost = ItemTable.wrap(df).numeric(obj_feature_name)
+        missing = np.isnan(cost)
+        if missing.any():
+            cost = np.where(missing, 0., cost)
+        return cost
+
+    def set_objective(self, col_cost: np.ndarray, obj: str) -> None:
+        """
+        Set the objective coefficients and the optimization direction.
+
+        :param col_cost: objective coefficient of each variable
+        :param obj: either max or min
+        :return: None
+        """
+        self.set_objective_sense(obj)
+        self.col_cost_ = col_cost
+        self.highs_.impl_.changeColsCost(len(col_cost), np.arange(len(col_cost), dtype=np.int32), col_cost)
+
+    def set_objective_sense(self, obj: str) -> None:
+        """
+        Set the optimization direction.
+
         :param obj: either max or min
         :return: None
         """
@@ -103,8 +239,7 @@ class ModelBuilder:
             self.highs_.impl_.changeObjectiveSense(highspy.ObjSense.kMaximize)
         else:
             self.highs_.impl_.changeObjectiveSense(highspy.ObjSense.kMinimize)
-        reward = df[obj_feature_name].fillna(0).to_numpy()
-        self.highs_.impl_.changeColsCost(len(reward), [i for i in range(len(reward))], reward)
+        self.obj_ = obj
 
     def solve(self) -> (bool, list[float]):
         """
@@ -113,7 +248,16 @@ class ModelBuilder:
         :return: solution flag and solution
         """
         self.highs_.impl_.setOptionValue('log_to_console', True)
-        self.highs_.impl_.run()
+        with tracer.span('highs_run') as span:
+            self.highs_.impl_.run()
+            if tracer.enabled_:
+                info = self.highs_.impl_.getInfo()
+                span.set(
+                    status=self.highs_.impl_.modelStatusToString(self.highs_.impl_.getModelStatus()),
+                    iteration_count=info.simplex_iteration_count,
+                    objective=info.objective_function_value,
+                    run_time=self.highs_.impl_.getRunTime()
+                )
         return self.highs_.impl_.getSolution().value_valid, self.highs_.impl_.getSolution().col_value
 
     def populate_statistics(self, statistics: dict) -> None:
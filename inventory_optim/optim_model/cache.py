@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+from typing import List
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.data_model.reader import read_items, write_npy_dir
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+
+
+CACHE_VERSION = 1
+MATRIX_ARRAYS = ['lower', 'upper', 'start', 'index', 'value']
+COLUMN_ARRAYS = ['col_lower', 'col_upper', 'col_cost']
+
+
+def file_digest(filepath: str) -> str:
+    """
+    Content hash of a file, or of every file of a directory (e.g. a NPY column directory) with their names.
+
+    :param filepath: path of the file or of the directory
+    :return: hexadecimal digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    path = Path(filepath)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path)).encode() if path.is_dir() else b'')
+        with open(file, 'rb') as f:
+            while block := f.read(2 ** 22):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class CachedModel:
+    """
+    Compiled model read from the cache: memory-mapped arrays plus the data columns loaded by the run that compiled it.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path_ = path
+        self.meta_ = json.loads((path / 'meta.json').read_text())
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode='r') for name in MATRIX_ARRAYS + COLUMN_ARRAYS + ['row_ids']}
+        self.matrix_ = ConstraintMatrix(*[arrays[name] for name in MATRIX_ARRAYS], self.meta_['num_col'])
+        self.matrix_.row_ids_ = arrays['row_ids']
+        self.col_lower_, self.col_upper_, self.col_cost_ = [arrays[name] for name in COLUMN_ARRAYS]
+
+    def read_items(self) -> ItemTable:
+        """
+        Read the data columns stored with the model, memory-mapped.
+
+        :return: ItemTable instance
+        """
+        return read_items(str(self.path_ / 'data'), None, self.meta_['categorical'])
+
+
+class ModelCache:
+    """
+    Content-addressed on-disk cache of compiled models.
+    An entry is keyed by the hashes of the data and of the constraint file plus the arguments the compiled model
+    depends on, and holds the CSR constraint matrix, the variable bounds, the objective coefficients and the loaded
+    data columns as .npy files, so that a hit is loaded with memory maps instead of reading the data and evaluating
+    the constraint scopes. Entries are evicted, least recently used first, when the cache exceeds its size.
+    File hashes are remembered by path, size and modification time, so that unchanged files are not hashed again.
+    """
+    def __init__(self, directory: str, max_size_mb: float = 2048) -> None:
+        self.path_ = Path(directory)
+        self.path_.mkdir(parents=True, exist_ok=True)
+        self.max_size_mb_ = max_size_mb
+
+    def __fingerprint(self, filepath: str) -> str:
+        """
+        Content hash of an input file, reusing the one computed by a previous run if the file did not change.
+
+        :param filepath: path of the file or of the directory
+        :return: hexadecimal digest
+        """
+        path = Path(filepath).resolve()
+        files = [p for p in path.rglob('*') if p.is_file()] if path.is_dir() else [path]
+        stamp = [len(files), sum(p.stat().st_size for p in files), max((p.stat().st_mtime_ns for p in files), default=0)]
+        known_file = self.path_ / 'fingerprints.json'
+        known = json.loads(known_file.read_text()) if known_file.exists() else {}
+        entry = known.get(str(path))
+        if entry is not None and entry['stamp'] == stamp:
+            return entry['digest']
+        with tracer.span('hash_file', path=str(path)):
+            digest = file_digest(str(path))
+        known[str(path)] = {'stamp': stamp, 'digest': digest}
+        tmp = known_file.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(known))
+        os.replace(tmp, known_file)
+        return digest
+
+    def key(self, data_path: str, constraints_path: str, args: dict) -> str:
+        """
+        Key of the model compiled from the given inputs.
+
+        :param data_path: path of the data
+        :param constraints_path: path of the constraint file
+        :param args: arguments the compiled model depends on, e.g. variable column and bounds
+        :return: hexadecimal key
+        """
+        content = {
+            'version': CACHE_VERSION,
+            'data': self.__fingerprint(data_path),
+            'constraints': self.__fingerprint(constraints_path),
+            'args': args
+        }
+        return hashlib.blake2b(json.dumps(content, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    def load(self, key: str) -> CachedModel:
+        """
+        Look up a compiled model, marking it as recently used.
+
+        :param key: key of the model
+        :return: CachedModel instance, None on a miss
+        """
+        path = self.path_ / key
+        if not (path / 'meta.json').exists():
+            return None
+        os.utime(path)
+        return CachedModel(path)
+
+    def store(self, key: str, matrix: ConstraintMatrix, col_lower: np.ndarray, col_upper: np.ndarray,
+              col_cost: np.ndarray, data: pd.DataFrame | ItemTable, categorical: List[str]) -> List[str]:
+        """
+        Store a compiled model, then evict the least recently used entries exceeding the size of the cache.
+        The entry is written to a temporary directory and renamed, so that concurrent runs never read partial entries.
+
+        :param key: key of the model
+        :param matrix: compiled constraints
+        :param col_lower: lower bound of each variable
+        :param col_upper: upper bound of each variable
+        :param col_cost: objective coefficient of each variable
+        :param data: data columns loaded by the run
+        :param categorical: columns of data loaded as categoricals
+        :return: keys of the evicted entries
+        """
+        path = self.path_ / key
+        if (path / 'meta.json').exists():
+            os.utime(path)
+            return []
+        tmp = self.path_ / f'.{key}.{os.getpid()}.tmp'
+        tmp.mkdir()
+        arrays = dict(zip(MATRIX_ARRAYS, [matrix.lower_, matrix.upper_, matrix.start_, matrix.index_, matrix.value_]))
+        arrays.update(zip(COLUMN_ARRAYS, [col_lower, col_upper, col_cost]))
+        arrays['row_ids'] = matrix.row_ids()
+        for name, array in arrays.items():
+            np.save(tmp / f'{name}.npy', np.ascontiguousarray(array))
+        data = ItemTable.wrap(data)
+        write_npy_dir(data.to_frame(), str(tmp / 'data'))
+        meta = {'key': key, 'num_col': matrix.num_col_, 'num_row': matrix.num_row, 'nnz': matrix.nnz,
+                'categorical': [c for c in categorical if c in data.columns], 'created': time.time()}
+        (tmp / 'meta.json').write_text(json.dumps(meta))
+        try:
+            os.rename(tmp, path)
+        except OSError:  # stored by a concurrent run in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+        return self.evict(keep=key)
+
+    def entries(self) -> List[dict]:
+        """
+        List the entries of the cache.
+
+        :return: list of dictionaries with key, size in MB and last access time, least recently used first
+        """
+        res = []
+        for path in self.path_.iterdir():
+            if path.is_dir() and (path / 'meta.json').exists():
+                size = sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+                res.append({'key': path.name, 'size(MB)': size / 2 ** 20, 'last_access': path.stat().st_mtime})
+        return sorted(res, key=lambda e: e['last_access'])
+
+    def size_mb(self) -> float:
+        return sum(e['size(MB)'] for e in self.entries())
+
+    def evict(self, keep: str = None) -> List[str]:
+        """
+        Remove the least recently used entries until the cache fits its size.
+
+        :param keep: key of an entry never evicted, e.g. the one just stored
+        :return: keys of the evicted entries
+        """
+        entries = self.entries()
+        size, evicted = sum(e['size(MB)'] for e in entries), []
+        for entry in entries:
+            if size <= self.max_size_mb_:
+                break
+            if entry['key'] == keep:
+                continue
+            shutil.rmtree(self.path_ / entry['key'], ignore_errors=True)
+            size -= entry['size(MB)']
+            evicted.append(entry['key'])
+        return evicted
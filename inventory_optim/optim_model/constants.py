@@ -0,0 +1,12 @@
+OBJ_MAX = 'max'
+OBJ_MIN = 'min'
+
+# Highs options of the solver strategies raced by the portfolio
+SOLVER_STRATEGIES = {
+    'dual_simplex': {'solver': 'simplex', 'simplex_strategy': 1},
+    'primal_simplex': {'solver': 'simplex', 'simplex_strategy': 4},
+    'parallel_dual_simplex': {'solver': 'simplex', 'simplex_strategy': 3, 'parallel': 'on'},
+    'ipm': {'solver': 'ipm', 'run_crossover': 'on'},
+    'ipm_no_crossover': {'solver': 'ipm', 'run_crossover': 'off'}
+}
+DEFAULT_PORTFOLIO = ['dual_simplex', 'primal_simplex', 'ipm']
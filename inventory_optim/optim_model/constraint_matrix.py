@@ -0,0 +1,133 @@
+import numpy as np
+
+from array import array
+from typing import Iterable, List
+from inventory_optim.data_model.constraint_table import ConstraintTable
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+class ConstraintMatrix:
+    """
+    Compiled constraint matrix in CSR format.
+    Row i is the i-th constraint, its nonzeros are the variables within the constraint scope.
+    """
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, start: np.ndarray, index: np.ndarray, value: np.ndarray,
+                 num_col: int) -> None:
+        self.lower_ = lower
+        self.upper_ = upper
+        self.start_ = start
+        self.index_ = index
+        self.value_ = value
+        self.num_col_ = num_col
+        self.row_ids_ = None
+
+    @classmethod
+    def compile(cls, index: ScopeIndex, constraints: Iterable[Constraint]) -> 'ConstraintMatrix':
+        """
+        Evaluate the scope of every constraint and assemble the CSR structure.
+        Constraints can be streamed (e.g. by iter_constraints): each one is only used while its scope is evaluated.
+        The scopes of a ConstraintTable are evaluated from its interned codes, without building the constraints.
+
+        :param index: scope index of the data
+        :param constraints: involved constraints
+        :return: ConstraintMatrix instance
+        """
+        with tracer.span('scope_queries') as span:
+            if isinstance(constraints, ConstraintTable):
+                scopes = index.table_scopes(constraints)
+                lower, upper = np.array(constraints.lb_, dtype=np.float64), np.array(constraints.ub_, dtype=np.float64)
+            else:
+                scopes, lower, upper = [], array('d'), array('d')
+                for constraint in constraints:
+                    scopes.append(index.get_scope(constraint))
+                    lower.append(constraint['lb'])
+                    upper.append(constraint['ub'])
+                lower, upper = np.frombuffer(lower, dtype=np.float64), np.frombuffer(upper, dtype=np.float64)
+            span.set(num_constraints=len(scopes))
+        with tracer.span('assemble_csr') as span:
+            start = np.zeros(len(scopes) + 1, dtype=np.int32)
+            np.cumsum([len(scope) for scope in scopes], out=start[1:])
+            col_index = np.concatenate(scopes).astype(np.int32) if scopes else np.empty(0, dtype=np.int32)
+            span.set(nonzero=len(col_index))
+            return cls(lower, upper, start, col_index, np.ones(len(col_index), dtype=np.float64), index.num_rows_)
+
+    @classmethod
+    def vstack(cls, matrices: List['ConstraintMatrix']) -> 'ConstraintMatrix':
+        """
+        Stack the rows of several constraint matrices defined over the same variables.
+
+        :param matrices: constraint matrices
+        :return: ConstraintMatrix instance
+        """
+        offsets = np.cumsum([0] + [m.nnz for m in matrices[:-1]])
+        return cls(
+            np.concatenate([m.lower_ for m in matrices]),
+            np.concatenate([m.upper_ for m in matrices]),
+            np.concatenate([[0]] + [m.start_[1:] + offset for m, offset in zip(matrices, offsets)]).astype(np.int32),
+            np.concatenate([m.index_ for m in matrices]),
+            np.concatenate([m.value_ for m in matrices]),
+            matrices[0].num_col_
+        )
+
+    def take_rows(self, rows: np.ndarray) -> 'ConstraintMatrix':
+        """
+        Return the sub-matrix made of the given rows, in the given order.
+
+        :param rows: row indexes
+        :return: ConstraintMatrix instance
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.start_[rows + 1] - self.start_[rows]
+        start = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=start[1:])
+        positions = np.repeat(self.start_[rows] - start[:-1], lengths) + np.arange(start[-1])
+        return ConstraintMatrix(
+            self.lower_[rows], self.upper_[rows], start, self.index_[positions], self.value_[positions], self.num_col_
+        )
+
+    @property
+    def num_row(self) -> int:
+        return len(self.lower_)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.index_)
+
+    def row_ids(self) -> np.ndarray:
+        """
+        Return the row of every nonzero (COO row indexes).
+
+        :return: row index of each nonzero
+        """
+        if self.row_ids_ is None:
+            self.row_ids_ = np.repeat(np.arange(self.num_row, dtype=np.int32), np.diff(self.start_))
+        return self.row_ids_
+
+    def dot(self, x: np.ndarray) -> np.ndarray:
+        """
+        Sparse matrix-vector product.
+
+        :param x: vector with one entry per column
+        :return: vector with one entry per row
+        """
+        return np.bincount(self.row_ids(), weights=self.value_ * x[self.index_], minlength=self.num_row)
+
+
+def constraint_signatures(matrix: ConstraintMatrix, random_seed: int = 17) -> np.ndarray:
+    """
+    Compute a 128-bit signature of the set of constraints each variable belongs to.
+    Every row gets two random 64-bit keys; the signature of a column is the (wrapping) sum of the keys of its rows,
+    so columns in exactly the same rows share the signature, and different sets collide with negligible probability.
+
+    :param matrix: compiled constraints, with unit coefficients
+    :param random_seed: random seed
+    :return: array of shape (num_col, 2) with the signature of each column
+    """
+    assert np.all(matrix.value_ == 1), 'signatures require unit coefficients'
+    rng = np.random.default_rng(random_seed)
+    keys = rng.integers(0, np.iinfo(np.uint64).max, size=(matrix.num_row, 2), dtype=np.uint64, endpoint=True)
+    signatures = np.zeros((matrix.num_col_, 2), dtype=np.uint64)
+    np.add.at(signatures, matrix.index_, keys[matrix.row_ids()])
+    return signatures
@@ -0,0 +1,202 @@
+import highspy
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+from typing import List
+from inventory_optim.optim_model.builder import HighsSolver, ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+
+
+def connected_components(matrix: ConstraintMatrix) -> (int, np.ndarray, np.ndarray):
+    """
+    Compute the connected components of the bipartite constraint-variable graph.
+    Labels are propagated as the minimum column id of the component, with pointer jumping between sweeps.
+
+    :param matrix: compiled constraints
+    :return: number of blocks, block of each row and block of each column (-1 for empty rows and free columns)
+    """
+    row_ids = matrix.row_ids()
+    label = np.arange(matrix.num_col_)
+    while True:
+        row_label = np.full(matrix.num_row, matrix.num_col_)
+        np.minimum.at(row_label, row_ids, label[matrix.index_])
+        new_label = label.copy()
+        np.minimum.at(new_label, matrix.index_, row_label[row_ids])
+        while not np.array_equal(new_label[new_label], new_label):
+            new_label = new_label[new_label]
+        if np.array_equal(new_label, label):
+            break
+        label = new_label
+    used = np.zeros(matrix.num_col_, dtype=bool)
+    used[matrix.index_] = True
+    roots, col_block = np.unique(label[used], return_inverse=True)
+    col_labels = np.full(matrix.num_col_, -1)
+    col_labels[used] = col_block
+    row_labels = np.full(matrix.num_row, -1)
+    nonempty = np.diff(matrix.start_) > 0
+    row_labels[nonempty] = col_labels[matrix.index_[matrix.start_[:-1][nonempty]]]
+    return len(roots), row_labels, col_labels
+
+
+def solve_blocks(blocks: List[dict], sense: str, time_limit: float) -> List[dict]:
+    """
+    Solve a list of independent blocks, each one as its own Highs model.
+
+    :param blocks: blocks with local column bounds, costs and CSR rows
+    :param sense: either max or min
+    :param time_limit: time limit in seconds per block
+    :return: per-block results
+    """
+    results = []
+    for block in blocks:
+        start = timer()
+        solver = HighsSolver(time_limit)
+        solver.impl_.setOptionValue('output_flag', False)
+        num_col, num_row = len(block['col_lower']), len(block['row_lower'])
+        solver.impl_.addVars(num_col, block['col_lower'], block['col_upper'])
+        solver.impl_.addRows(num_row, block['row_lower'], block['row_upper'], len(block['index']), block['start'], block['index'], block['value'])
+        solver.impl_.changeObjectiveSense(highspy.ObjSense.kMaximize if sense == OBJ_MAX else highspy.ObjSense.kMinimize)
+        solver.impl_.changeColsCost(num_col, np.arange(num_col, dtype=np.int32), block['cost'])
+        solver.impl_.run()
+        solution = solver.impl_.getSolution()
+        results.append({
+            'block': block['block'],
+            'value_valid': solution.value_valid,
+            'col_value': np.array(solution.col_value),
+            'status': solver.impl_.modelStatusToString(solver.impl_.getModelStatus()),
+            'iteration_count': solver.impl_.getInfo().simplex_iteration_count,
+            'solving_time(s)': timer() - start
+        })
+    return results
+
+
+class BlockSolver:
+    """
+    Solve a built model by decomposition.
+    The connected components of the constraint-variable graph are independent subproblems: each one is solved as its
+    own Highs model in a process pool and the solutions are merged back in the original variable order.
+    Variables appearing in no constraint are moved to their bound according to the sign of their objective
+    coefficient.
+    """
+    def __init__(self, mb: ModelBuilder) -> None:
+        assert mb.matrix_ is not None, 'decomposition requires the bulk build path'
+        self.mb_ = mb
+        self.statistics_ = None
+
+    def split(self) -> (List[dict], np.ndarray, np.ndarray):
+        """
+        Split the model into blocks.
+
+        :return: blocks, positions of the free columns and positions of the empty rows
+        """
+        matrix = self.mb_.matrix_
+        num_blocks, row_labels, col_labels = connected_components(matrix)
+        col_order = np.argsort(col_labels, kind='stable')
+        col_bounds = np.searchsorted(col_labels[col_order], np.arange(-1, num_blocks + 1))
+        row_order = np.argsort(row_labels, kind='stable')
+        row_bounds = np.searchsorted(row_labels[row_order], np.arange(-1, num_blocks + 1))
+        local = np.empty(matrix.num_col_, dtype=np.int32)  # position of each column within its block
+        local[col_order] = np.arange(matrix.num_col_) - col_bounds[col_labels[col_order] + 1]
+        ordered = matrix.take_rows(row_order)
+        blocks = []
+        for b in range(num_blocks):
+            cols = col_order[col_bounds[b + 1]:col_bounds[b + 2]]
+            first, last = row_bounds[b + 1], row_bounds[b + 2]
+            nnz = slice(ordered.start_[first], ordered.start_[last])
+            blocks.append({
+                'block': b,
+                'cols': cols,
+                'col_lower': self.mb_.col_lower_[cols],
+                'col_upper': self.mb_.col_upper_[cols],
+                'cost': self.mb_.col_cost_[cols],
+                'row_lower': ordered.lower_[first:last],
+                'row_upper': ordered.upper_[first:last],
+                'start': ordered.start_[first:last] - ordered.start_[first],
+                'index': local[ordered.index_[nnz]],
+                'value': ordered.value_[nnz]
+            })
+        return blocks, col_order[:col_bounds[1]], row_order[:row_bounds[1]]
+
+    def solve(self, num_workers: int = None) -> (bool, list[float]):
+        """
+        Find optimal solution block by block.
+
+        :param num_workers: number of worker processes, blocks are solved in this process if 1
+        :return: solution flag and solution
+        """
+        mb, matrix = self.mb_, self.mb_.matrix_
+        time_limit = mb.highs_.impl_.getOptionValue('time_limit')[1]
+        blocks, free_cols, empty_rows = self.split()
+        values = np.empty(matrix.num_col_)
+        # closed form: a free variable goes to the bound its objective coefficient pushes towards
+        push_up = mb.col_cost_[free_cols] > 0 if mb.obj_ == OBJ_MAX else mb.col_cost_[free_cols] < 0
+        values[free_cols] = np.where(push_up, mb.col_upper_[free_cols], mb.col_lower_[free_cols])
+        tasks = self.__make_tasks(blocks, num_workers)
+        if len(tasks) <= 1:
+            results = [r for task in tasks for r in solve_blocks(task, mb.obj_, time_limit)]
+        else:
+            with ProcessPoolExecutor(num_workers) as pool:
+                futures = [pool.submit(solve_blocks, task, mb.obj_, time_limit) for task in tasks]
+                results = [r for future in futures for r in future.result()]
+        results.sort(key=lambda r: r['block'])
+        for block, result in zip(blocks, results):
+            values[block['cols']] = result['col_value']
+        empty_rows_ok = bool(np.all((matrix.lower_[empty_rows] <= 0) & (matrix.upper_[empty_rows] >= 0)))
+        is_ok = empty_rows_ok and all(r['value_valid'] for r in results)
+        self.statistics_ = {
+            'num_blocks': len(blocks),
+            'num_free_columns': len(free_cols),
+            'num_empty_rows': len(empty_rows),
+            'blocks': [{
+                'num_column': len(block['cols']),
+                'num_row': len(block['row_lower']),
+                'status': result['status'],
+                'iteration_count': result['iteration_count'],
+                'solving_time(s)': result['solving_time(s)']
+            } for block, result in zip(blocks, results)]
+        }
+        return is_ok, values.tolist()
+
+    @staticmethod
+    def __make_tasks(blocks: List[dict], num_workers: int = None) -> List[List[dict]]:
+        """
+        Group blocks into tasks of similar size (number of nonzeros and columns), largest blocks first.
+
+        :param blocks: blocks to be solved
+        :param num_workers: number of worker processes
+        :return: list of tasks, each one being a list of blocks
+        """
+        if num_workers == 1 or len(blocks) <= 1:
+            return [blocks] if blocks else []
+        num_tasks = min(len(blocks), 4 * (num_workers if num_workers is not None else os.cpu_count()))
+        tasks, loads = [[] for _ in range(num_tasks)], np.zeros(num_tasks)
+        for block in sorted(blocks, key=lambda b: -(len(b['index']) + len(b['cols']))):
+            i = int(np.argmin(loads))
+            tasks[i].append(block)
+            loads[i] += len(block['index']) + len(block['cols'])
+        return [task for task in tasks if task]
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the decomposition and of every block.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        matrix = self.mb_.matrix_
+        statistics['lp'] = {'num_column': matrix.num_col_, 'num_row': matrix.num_row, 'nonzero': matrix.nnz}
+        statuses = set(b['status'] for b in self.statistics_['blocks'])
+        statistics['solving'] = {
+            'status': statuses.pop() if len(statuses) == 1 else 'Mixed' if statuses else 'Optimal',
+            'iteration_count': sum(b['iteration_count'] for b in self.statistics_['blocks']),
+            'solver': {
+                'name': 'Highs',
+                'api': 'Highspy',
+                'version': self.mb_.highs_.impl_.version(),
+                'compilation_data': self.mb_.highs_.impl_.compilationDate()
+            }
+        }
+        statistics['decomposition'] = self.statistics_
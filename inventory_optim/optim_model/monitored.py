@@ -0,0 +1,152 @@
+import numpy as np
+
+from timeit import default_timer as timer
+from inventory_optim.monitoring.progress import ProgressStream
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+
+
+def lagrangian_bound(mb: ModelBuilder, row_dual: np.ndarray) -> float:
+    """
+    Bound on the optimal objective given by any multipliers y of the rows: for a maximization, every feasible x
+    satisfies c x = (c - A^T y) x + y A x <= max over the column bounds of (c - A^T y) x + max over the row bounds of y r,
+    and symmetrically for a minimization. Multipliers of rows whose maximizing bound is infinite are dropped.
+
+    :param mb: built model, with finite column bounds
+    :param row_dual: multiplier of each row
+    :return: upper bound for a maximization, lower bound for a minimization
+    """
+    matrix = mb.matrix_
+    sense = 1 if mb.obj_ == OBJ_MAX else -1
+    y = sense * np.asarray(row_dual, dtype=np.float64)
+    row_bound = np.where(y > 0, matrix.upper_, matrix.lower_)
+    y[np.isinf(row_bound)] = 0
+    reduced = sense * mb.col_cost_ - np.bincount(matrix.index_, weights=matrix.value_ * y[matrix.row_ids()], minlength=matrix.num_col_)
+    col_bound = np.where(reduced > 0, mb.col_upper_, mb.col_lower_)
+    return sense * float(reduced @ col_bound + y[y != 0] @ row_bound[y != 0])
+
+
+def relative_gap(primal_bound: float, dual_bound: float) -> float:
+    """
+    Relative gap between a primal and a dual bound, as reported by Highs for MIPs.
+
+    :param primal_bound: objective of a feasible solution
+    :param dual_bound: bound on the optimal objective
+    :return: relative gap, None if a bound is missing
+    """
+    if primal_bound is None or dual_bound is None:
+        return None
+    return abs(dual_bound - primal_bound) / max(abs(primal_bound), 1e-9)
+
+
+class MonitoredSolver:
+    """
+    Solve a built model with the simplex in chunks of iterations, pushing a progress record after every chunk and
+    stopping as soon as a target is reached.
+    Highs resumes every chunk from the basis where the previous one stopped. Presolve is off, so that every iterate is
+    a solution of the original model: its objective is a primal bound when it is feasible, and the Lagrangian bound of
+    its row duals is a dual bound. Targets need feasible iterates, which the dual simplex only reaches at the optimum,
+    so the primal simplex is used when a target is set. Chunks are sized to push a record about every interval seconds.
+    """
+    def __init__(self, mb: ModelBuilder, stream: ProgressStream = None, interval: float = 1., target_gap: float = None,
+                 target_objective: float = None) -> None:
+        assert mb.matrix_ is not None, 'progress monitoring requires the bulk build path'
+        self.mb_ = mb
+        self.stream_ = stream if stream is not None else ProgressStream()
+        self.interval_ = interval
+        self.target_gap_ = target_gap
+        self.target_objective_ = target_objective
+        self.statistics_ = {}
+
+    def solve(self) -> (bool, list[float]):
+        """
+        Run the simplex chunk by chunk until optimality, a target or the time limit.
+
+        :return: solution flag and solution, the best feasible one if the solve is interrupted
+        """
+        highs, sense = self.mb_.highs_.impl_, 1 if self.mb_.obj_ == OBJ_MAX else -1
+        options = {name: highs.getOptionValue(name)[1] for name in ['time_limit', 'simplex_iteration_limit', 'presolve', 'solver', 'simplex_strategy', 'log_to_console']}
+        highs.setOptionValue('log_to_console', False)  # the progress records replace the log of every chunk
+        highs.setOptionValue('presolve', 'off')
+        highs.setOptionValue('solver', 'simplex')
+        if self.target_gap_ is not None or self.target_objective_ is not None:
+            highs.setOptionValue('simplex_strategy', 4)
+        start, chunk, iterations = timer(), 10, 0
+        best, primal_bound, dual_bound, status, interrupted = None, None, None, None, False
+        try:
+            while True:
+                remaining = options['time_limit'] - (timer() - start)
+                if remaining <= 0:
+                    status = 'Time limit reached'
+                    break
+                highs.setOptionValue('time_limit', remaining)
+                highs.setOptionValue('simplex_iteration_limit', chunk)
+                chunk_start = timer()
+                with tracer.span('highs_run', chunk=chunk):
+                    highs.run()
+                status = highs.modelStatusToString(highs.getModelStatus())
+                info, solution = highs.getInfo(), highs.getSolution()
+                iterations += info.simplex_iteration_count
+                objective = info.objective_function_value
+                if solution.value_valid and info.num_primal_infeasibilities == 0 and (primal_bound is None or sense * (objective - primal_bound) > 0):
+                    primal_bound, best = objective, np.array(solution.col_value)
+                if solution.dual_valid:
+                    bound = lagrangian_bound(self.mb_, np.array(solution.row_dual))
+                    dual_bound = bound if dual_bound is None else sense * min(sense * dual_bound, sense * bound)
+                gap = relative_gap(primal_bound, dual_bound)
+                self.stream_.record({
+                    'elapsed(s)': timer() - start,
+                    'status': status,
+                    'iteration_count': iterations,
+                    'objective': objective,
+                    'primal_bound': primal_bound,
+                    'dual_bound': dual_bound,
+                    'gap': gap,
+                    'num_primal_infeasibilities': info.num_primal_infeasibilities,
+                    'sum_primal_infeasibilities': info.sum_primal_infeasibilities,
+                    'num_dual_infeasibilities': info.num_dual_infeasibilities,
+                    'sum_dual_infeasibilities': info.sum_dual_infeasibilities
+                })
+                if status != 'Iteration limit reached':
+                    break
+                if self.target_gap_ is not None and gap is not None and gap <= self.target_gap_:
+                    status, interrupted = 'Interrupted: target gap reached', True
+                    break
+                if self.target_objective_ is not None and primal_bound is not None and sense * (primal_bound - self.target_objective_) >= 0:
+                    status, interrupted = 'Interrupted: target objective reached', True
+                    break
+                chunk = int(np.clip(chunk * self.interval_ / max(timer() - chunk_start, 1e-3), 10, 10 ** 7))
+        finally:
+            for name, value in options.items():
+                highs.setOptionValue(name, value)
+        if status == 'Optimal':
+            best = np.array(highs.getSolution().col_value)
+            primal_bound = dual_bound = highs.getInfo().objective_function_value
+        self.statistics_ = {
+            'status': status,
+            'interrupted': interrupted,
+            'iteration_count': iterations,
+            'num_records': self.stream_.num_records_,
+            'primal_bound': primal_bound,
+            'dual_bound': dual_bound,
+            'gap': relative_gap(primal_bound, dual_bound),
+            'target_gap': self.target_gap_,
+            'target_objective': self.target_objective_,
+            'elapsed(s)': timer() - start
+        }
+        if best is None:
+            return False, []
+        return True, best.tolist()
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the model and of the monitored solve, whose status overrides the one of the last chunk.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        self.mb_.populate_statistics(statistics)
+        statistics['solving']['status'] = self.statistics_['status']
+        statistics['solving']['iteration_count'] = self.statistics_['iteration_count']
+        statistics['progress'] = self.statistics_
@@ -0,0 +1,170 @@
+import highspy
+import multiprocessing
+import numpy as np
+
+from multiprocessing.connection import wait
+from timeit import default_timer as timer
+from typing import List
+from inventory_optim.optim_model.builder import HighsSolver, ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX, SOLVER_STRATEGIES, DEFAULT_PORTFOLIO
+
+
+def parse_strategy(spec: str) -> dict:
+    """
+    Parse a strategy of the portfolio, given as name or name:threads, e.g. ipm:4.
+
+    :param spec: strategy
+    :return: Highs options of the strategy
+    """
+    name, _, threads = spec.partition(':')
+    assert name in SOLVER_STRATEGIES, f'unknown solver strategy {name}, expected one of {sorted(SOLVER_STRATEGIES)}'
+    options = dict(SOLVER_STRATEGIES[name])
+    if threads:
+        assert threads.isdigit() and int(threads) > 0, f'invalid number of threads in {spec}'
+        options['threads'] = int(threads)
+    return options
+
+
+def run_strategy(model: dict, options: dict, time_limit: float) -> dict:
+    """
+    Solve a model with the given Highs options.
+
+    :param model: column bounds, costs, sense and CSR rows of the model
+    :param options: Highs options
+    :param time_limit: time limit in seconds
+    :return: outcome of the strategy, with the solution
+    """
+    start = timer()
+    solver = HighsSolver(time_limit)
+    solver.impl_.setOptionValue('output_flag', False)
+    for option, value in options.items():
+        assert solver.impl_.setOptionValue(option, value) == highspy.HighsStatus.kOk, f'invalid option {option}={value}'
+    num_col, num_row = len(model['col_lower']), len(model['row_lower'])
+    solver.impl_.addVars(num_col, model['col_lower'], model['col_upper'])
+    solver.impl_.addRows(num_row, model['row_lower'], model['row_upper'], len(model['index']), model['start'], model['index'], model['value'])
+    solver.impl_.changeObjectiveSense(highspy.ObjSense.kMaximize if model['sense'] == OBJ_MAX else highspy.ObjSense.kMinimize)
+    solver.impl_.changeColsCost(num_col, np.arange(num_col, dtype=np.int32), model['cost'])
+    solver.impl_.run()
+    solution, info = solver.impl_.getSolution(), solver.impl_.getInfo()
+    return {
+        'status': solver.impl_.modelStatusToString(solver.impl_.getModelStatus()),
+        'value_valid': solution.value_valid,
+        'col_value': np.array(solution.col_value),
+        'objective': info.objective_function_value,
+        'simplex_iteration_count': info.simplex_iteration_count,
+        'ipm_iteration_count': info.ipm_iteration_count,
+        'crossover_iteration_count': info.crossover_iteration_count,
+        'run_time(s)': solver.impl_.getRunTime(),
+        'solving_time(s)': timer() - start
+    }
+
+
+def _race(connection, model: dict, options: dict, time_limit: float) -> None:
+    """
+    Entry point of a racing process: send the outcome of the strategy back to the portfolio.
+    """
+    try:
+        result = run_strategy(model, options, time_limit)
+    except Exception as e:
+        result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+    connection.send(result)
+    connection.close()
+
+
+class PortfolioSolver:
+    """
+    Solve a built model by racing several solver strategies, each one in its own process on a copy of the model.
+    The first optimal solution wins and the processes still running are terminated. If no strategy reaches
+    optimality, the first valid solution is kept. The outcome of every strategy is recorded with the size of the
+    model, so that the statistics of past runs tell which strategy to use for a given size.
+    """
+    def __init__(self, mb: ModelBuilder, strategies: List[str] = None) -> None:
+        assert mb.matrix_ is not None, 'portfolio requires the bulk build path'
+        self.mb_ = mb
+        self.strategies_ = {spec: parse_strategy(spec) for spec in (strategies or DEFAULT_PORTFOLIO)}
+        self.winner_ = None
+        self.statistics_ = None
+
+    def model(self) -> dict:
+        """
+        Model in the form passed to the racing processes.
+
+        :return: column bounds, costs, sense and CSR rows of the model
+        """
+        mb, matrix = self.mb_, self.mb_.matrix_
+        return {
+            'col_lower': mb.col_lower_, 'col_upper': mb.col_upper_, 'cost': mb.col_cost_, 'sense': mb.obj_,
+            'row_lower': matrix.lower_, 'row_upper': matrix.upper_,
+            'start': matrix.start_, 'index': matrix.index_, 'value': matrix.value_
+        }
+
+    def solve(self) -> (bool, list[float]):
+        """
+        Race the strategies and keep the first optimal solution.
+
+        :return: solution flag and solution
+        """
+        start = timer()
+        time_limit = self.mb_.highs_.impl_.getOptionValue('time_limit')[1]
+        model, context = self.model(), multiprocessing.get_context()  # forked racers inherit the model without copies
+        racers = {}
+        for spec, options in self.strategies_.items():
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_race, args=(sender, model, options, time_limit), daemon=True)
+            process.start()
+            sender.close()
+            racers[receiver] = (spec, process)
+        outcomes = {spec: {'strategy': spec, 'options': options, 'outcome': 'cancelled'} for spec, options in self.strategies_.items()}
+        values, fallback, pending = None, None, list(racers)
+        try:
+            while pending and self.winner_ is None:
+                for receiver in wait(pending):
+                    pending.remove(receiver)
+                    spec = racers[receiver][0]
+                    try:
+                        result = receiver.recv()
+                    except EOFError:
+                        result = {'status': 'failed', 'error': 'racing process exited'}
+                    solution = result.pop('col_value', None)
+                    outcomes[spec].update(result, outcome='finished', **{'elapsed(s)': timer() - start})
+                    if result['status'] == 'Optimal' and self.winner_ is None:
+                        self.winner_, values = spec, solution
+                    elif result.get('value_valid') and fallback is None:
+                        fallback = (spec, solution)
+        finally:
+            for receiver, (_, process) in racers.items():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+                receiver.close()
+        if self.winner_ is None and fallback is not None:
+            self.winner_, values = fallback
+        if self.winner_ is not None:
+            outcomes[self.winner_]['outcome'] = 'won'
+        self.statistics_ = {'winner': self.winner_, 'wall(s)': timer() - start, 'strategies': list(outcomes.values())}
+        if values is None:
+            return False, []
+        return True, values.tolist()
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the model and of every strategy of the portfolio.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        matrix = self.mb_.matrix_
+        statistics['lp'] = {'num_column': matrix.num_col_, 'num_row': matrix.num_row, 'nonzero': matrix.nnz}
+        winner = next((s for s in self.statistics_['strategies'] if s['outcome'] == 'won'), {})
+        statistics['solving'] = {
+            'status': winner.get('status', 'failed'),
+            'iteration_count': winner.get('simplex_iteration_count', 0),
+            'strategy': self.winner_,
+            'solver': {
+                'name': 'Highs',
+                'api': 'Highspy',
+                'version': self.mb_.highs_.impl_.version(),
+                'compilation_data': self.mb_.highs_.impl_.compilationDate()
+            }
+        }
+        statistics['portfolio'] = self.statistics_
@@ -0,0 +1,278 @@
+import highspy
+import numpy as np
+
+from timeit import default_timer as timer
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.builder import HighsSolver, ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+
+
+def integral_bounds(col_lower: np.ndarray, col_upper: np.ndarray, x: np.ndarray, tol: float = 1e-9) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Integer bounds of the variables: [ceil(lower), floor(upper)].
+    A variable whose bounds contain no integer is bound to the integer closest to x among floor(lower) and ceil(upper).
+
+    :param col_lower: lower bounds of the variables
+    :param col_upper: upper bounds of the variables
+    :param x: reference (e.g. LP) value of the variables
+    :param tol: tolerance on the bounds
+    :return: integer lower bounds, integer upper bounds and mask of the variables with no integer within their bounds
+    """
+    lo, hi = np.ceil(col_lower - tol), np.floor(col_upper + tol)
+    empty = lo > hi
+    if empty.any():
+        closest = np.clip(np.round(x[empty]), np.floor(col_lower[empty]), np.ceil(col_upper[empty]))
+        lo[empty], hi[empty] = closest, closest
+    return lo, hi, empty
+
+
+class IntegralSolver:
+    """
+    Solve a built model in integral mode, i.e. with whole quantities.
+    The LP relaxation is solved by a wrapped solver (the model builder itself or any wrapper solver) and its solution
+    is rounded to the closest integer within the integer bounds of each variable. Rounding may break constraints: the
+    repair pass moves variables of the violated rows one batch per round, all rows at once, the variables with the best
+    objective change per unit first, and never by more than the slack of the other rows they belong to. Rows still
+    violated after repair are polished by a small MIP over their variables only, all the others being fixed, with a
+    time limit. The integral solution is never better than the LP bound, the gap between the two being reported.
+    """
+    def __init__(self, mb: ModelBuilder, solver=None, max_repair_rounds: int = 50, max_polish_columns: int = 10_000,
+                 polish_time_limit: float = None) -> None:
+        assert mb.matrix_ is not None, 'integral mode requires the bulk build path'
+        assert np.all(mb.matrix_.value_ == 1), 'integral mode requires unit coefficients'
+        self.mb_ = mb
+        self.solver_ = solver if solver is not None else mb
+        self.max_repair_rounds_ = max_repair_rounds
+        self.max_polish_columns_ = max_polish_columns
+        self.polish_time_limit_ = polish_time_limit if polish_time_limit is not None else mb.highs_.impl_.getOptionValue('time_limit')[1]
+        self.tol_ = mb.highs_.impl_.getOptionValue('primal_feasibility_tolerance')[1]
+        self.statistics_ = {}
+
+    def solve(self, *args) -> (bool, list[float]):
+        """
+        Solve the LP relaxation with the wrapped solver, then round and repair its solution.
+
+        :param args: arguments of the solve method of the wrapped solver
+        :return: solution flag and integral solution
+        """
+        is_ok, values = self.solver_.solve(*args)
+        if not is_ok:
+            return False, []
+        mb = self.mb_
+        sense = 1 if mb.obj_ == OBJ_MAX else -1
+        x_lp = np.asarray(values, dtype=np.float64)
+        start = timer()
+        with tracer.span('rounding') as span:
+            lo, hi, empty = integral_bounds(mb.col_lower_, mb.col_upper_, x_lp)
+            x = np.clip(np.round(x_lp), lo, hi)
+            violated = self.violated_rows(x)
+            span.set(num_violated=len(violated))
+        self.statistics_ = {
+            'lp_objective': float(mb.col_cost_ @ x_lp),
+            'num_fractional': int((np.abs(x_lp - np.round(x_lp)) > self.tol_).sum()),
+            'num_no_integer_bounds': int(empty.sum()),
+            'num_violated_after_rounding': len(violated),
+            'rounding(s)': timer() - start
+        }
+        start = timer()
+        with tracer.span('repair') as span:
+            x_rounded = x
+            x, rounds = self.repair(x, x_lp, lo, hi, sense)
+            violated = self.violated_rows(x)
+            span.set(rounds=rounds, num_violated=len(violated))
+        self.statistics_.update({
+            'repair_rounds': rounds,
+            'num_repaired': int((x != x_rounded).sum()),
+            'num_violated_after_repair': len(violated),
+            'repair(s)': timer() - start
+        })
+        self.statistics_['polish'] = None
+        if len(violated) > 0:
+            start = timer()
+            with tracer.span('polish') as span:
+                x, self.statistics_['polish'] = self.polish(x, violated, lo, hi, sense)
+                violated = self.violated_rows(x)
+                span.set(num_violated=len(violated))
+            self.statistics_['polish']['polish(s)'] = timer() - start
+        self.statistics_['objective'] = float(mb.col_cost_ @ x)
+        self.statistics_['gap'] = self.gap()
+        self.statistics_['num_violated'] = len(violated)
+        return True, x.astype(np.int64).tolist()
+
+    def gap(self) -> float:
+        """
+        Relative gap between the objective of the integral solution and the LP bound.
+
+        :return: gap, non-negative
+        """
+        sense = 1 if self.mb_.obj_ == OBJ_MAX else -1
+        lp_objective = self.statistics_['lp_objective']
+        return sense * (lp_objective - self.statistics_['objective']) / max(abs(lp_objective), 1e-9)
+
+    def add_fixed_objective(self, objective: float, lp_objective: float) -> None:
+        """
+        Add the objective of the variables dropped from the model before solving (e.g. by the Preprocessor), so that
+        the objectives and the gap refer to the full model.
+
+        :param objective: objective of the dropped variables, at their integral values
+        :param lp_objective: objective of the dropped variables in the LP relaxation
+        :return: None
+        """
+        self.statistics_['objective'] += objective
+        self.statistics_['lp_objective'] += lp_objective
+        self.statistics_['gap'] = self.gap()
+
+    def violated_rows(self, x: np.ndarray) -> np.ndarray:
+        """
+        Rows violated by a solution, beyond the primal feasibility tolerance.
+
+        :param x: solution
+        :return: indexes of the violated rows
+        """
+        matrix = self.mb_.matrix_
+        activity = matrix.dot(x)
+        return np.flatnonzero((activity < matrix.lower_ - self.tol_) | (activity > matrix.upper_ + self.tol_))
+
+    def repair(self, x: np.ndarray, x_lp: np.ndarray, lo: np.ndarray, hi: np.ndarray, sense: int) -> (np.ndarray, int):
+        """
+        Repair the rows violated by a rounded solution, moving whole units.
+        In every round, each violated row asks for the units it misses (or exceeds) to the variables of its scope,
+        ordered by objective change per unit and then by how much their LP value exceeds (or falls short of) the rounded
+        one. A variable moves at most by the slack of every other row it belongs to and by its integer bounds. Moves of
+        different rows over a shared row may still break it, so the rounds go on until no row is violated, the total
+        violation stops decreasing or the maximum number of rounds is reached; the best solution is kept.
+
+        :param x: rounded solution
+        :param x_lp: LP solution
+        :param lo: integer lower bounds of the variables
+        :param hi: integer upper bounds of the variables
+        :param sense: 1 to maximize, -1 to minimize
+        :return: repaired solution and number of rounds
+        """
+        matrix, tol = self.mb_.matrix_, self.tol_
+        rows, cols = matrix.row_ids(), matrix.index_
+        gain = sense * self.mb_.col_cost_
+        best, best_violation, stalled, rounds = x, np.inf, 0, 0
+        while rounds < self.max_repair_rounds_:
+            activity = matrix.dot(x)
+            short, excess = matrix.lower_ - activity, activity - matrix.upper_
+            violation = np.maximum(short, 0).sum() + np.maximum(excess, 0).sum()
+            if violation < best_violation - tol:
+                best, best_violation, stalled = x, violation, 0
+            else:
+                stalled += 1
+            if best_violation <= tol * matrix.num_row or stalled >= 3:
+                break
+            rounds += 1
+            # units each row still needs, and units each variable can move without breaking a row
+            need_up = np.where(short > tol, np.ceil(short - tol), 0)
+            need_down = np.where(excess > tol, np.ceil(excess - tol), 0)
+            room_up, room_down = hi - x, x - lo
+            np.minimum.at(room_up, cols, np.floor(-excess + tol)[rows])
+            np.minimum.at(room_down, cols, np.floor(-short + tol)[rows])
+            move_up = self.__moves(rows, cols, need_up, np.maximum(room_up, 0), (-gain, x - x_lp))
+            move_down = self.__moves(rows, cols, need_down, np.maximum(room_down, 0), (gain, x_lp - x))
+            conflict = (move_up > 0) & (move_down > 0)
+            move_up[conflict], move_down[conflict] = 0, 0
+            x = x + move_up - move_down
+        return best, rounds
+
+    @staticmethod
+    def __moves(rows: np.ndarray, cols: np.ndarray, need: np.ndarray, room: np.ndarray, priority: tuple) -> np.ndarray:
+        """
+        Distribute the units needed by every row among the variables of its scope, in order of priority.
+
+        :param rows: row of each nonzero
+        :param cols: column of each nonzero
+        :param need: units needed by each row
+        :param room: units each column can move
+        :param priority: sort keys of the columns, the first one being the most significant
+        :return: units each column moves
+        """
+        moves = np.zeros(len(room))
+        candidates = np.flatnonzero((need[rows] > 0) & (room[cols] > 0))
+        if len(candidates) == 0:
+            return moves
+        r, c = rows[candidates], cols[candidates]
+        order = np.lexsort(tuple(key[c] for key in reversed(priority)) + (r,))
+        r, c = r[order], c[order]
+        available = room[c]
+        cumulative = np.cumsum(available)
+        first = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+        before = cumulative - available - np.repeat(cumulative[first] - available[first], np.diff(np.r_[first, len(r)]))
+        np.maximum.at(moves, c, np.clip(need[r] - before, 0, available))
+        return moves
+
+    def polish(self, x: np.ndarray, violated: np.ndarray, lo: np.ndarray, hi: np.ndarray, sense: int) -> (np.ndarray, dict):
+        """
+        Polish the rows left violated by the repair with a MIP over the variables of their scopes, all the other
+        variables being fixed. Every row touching such variables is elastic, its violation being penalized beyond any
+        change of the objective, so that the current solution is feasible and the MIP only improves on it.
+
+        :param x: repaired solution
+        :param violated: rows violated by x
+        :param lo: integer lower bounds of the variables
+        :param hi: integer upper bounds of the variables
+        :param sense: 1 to maximize, -1 to minimize
+        :return: polished solution and statistics of the polish
+        """
+        mb, matrix = self.mb_, self.mb_.matrix_
+        rows, cols = matrix.row_ids(), matrix.index_
+        in_violated = np.zeros(matrix.num_row, dtype=bool)
+        in_violated[violated] = True
+        columns = np.unique(cols[in_violated[rows]])
+        if len(columns) > self.max_polish_columns_:  # the ones with most room first
+            columns = np.sort(columns[np.argsort(lo[columns] - hi[columns], kind='stable')[:self.max_polish_columns_]])
+        position = np.full(matrix.num_col_, -1, dtype=np.int64)
+        position[columns] = np.arange(len(columns))
+        touched = np.zeros(matrix.num_row, dtype=bool)
+        touched[rows[position[cols] >= 0]] = True
+        sub = matrix.take_rows(np.flatnonzero(touched))
+        sub_rows, free = sub.row_ids(), position[sub.index_] >= 0
+        fixed = np.bincount(sub_rows[~free], weights=x[sub.index_[~free]], minlength=sub.num_row)
+        num_col, num_row = len(columns), sub.num_row
+        # columns of the MIP: polished variables, then one slack below and one above every row
+        cost = sense * mb.col_cost_[columns]
+        penalty = 1 + np.abs(cost * (hi[columns] - lo[columns])).sum()
+        ids = np.arange(num_row)
+        coo_rows = np.concatenate([sub_rows[free], ids, ids])
+        coo_cols = np.concatenate([position[sub.index_[free]], num_col + ids, num_col + num_row + ids])
+        coo_values = np.concatenate([np.ones(free.sum()), np.ones(num_row), -np.ones(num_row)])
+        order = np.argsort(coo_rows, kind='stable')
+        start = np.zeros(num_row + 1, dtype=np.int32)
+        np.cumsum(np.bincount(coo_rows, minlength=num_row), out=start[1:])
+        highs = HighsSolver(self.polish_time_limit_)
+        highs.impl_.setOptionValue('output_flag', False)
+        highs.impl_.addVars(num_col + 2 * num_row, np.concatenate([lo[columns], np.zeros(2 * num_row)]),
+                            np.concatenate([hi[columns], np.full(2 * num_row, np.inf)]))
+        highs.impl_.addRows(num_row, sub.lower_ - fixed, sub.upper_ - fixed, len(coo_rows), start,
+                            coo_cols[order].astype(np.int32), coo_values[order])
+        highs.impl_.changeObjectiveSense(highspy.ObjSense.kMaximize)
+        highs.impl_.changeColsCost(num_col + 2 * num_row, np.arange(num_col + 2 * num_row, dtype=np.int32),
+                                   np.concatenate([cost, np.full(2 * num_row, -penalty)]))
+        highs.impl_.changeColsIntegrality(num_col, np.arange(num_col, dtype=np.int32),
+                                          np.array([highspy.HighsVarType.kInteger] * num_col))
+        highs.impl_.run()
+        solution = highs.impl_.getSolution()
+        statistics = {
+            'num_column': num_col,
+            'num_row': num_row,
+            'status': highs.impl_.modelStatusToString(highs.impl_.getModelStatus()),
+            'mip_gap': highs.impl_.getInfo().mip_gap
+        }
+        if solution.value_valid:
+            polished = x.copy()
+            polished[columns] = np.clip(np.round(np.asarray(solution.col_value[:num_col])), lo[columns], hi[columns])
+            if len(self.violated_rows(polished)) <= len(violated):
+                x = polished
+        return x, statistics
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the wrapped solver and of the rounding, repair and polish.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        self.solver_.populate_statistics(statistics)
+        statistics['integral'] = self.statistics_
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+from inventory_optim.data_model.constraint_table import ConstraintTable
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
+
+
+class FeatureIndex:
+    """
+    Index over a single feature column.
+    Rows are encoded with categorical codes and, for every distinct value, the sorted list of row positions holding
+    that value is available as a slice of a single ordering array (posting list).
+    """
+    def __init__(self, codes: np.ndarray, categories: pd.Index) -> None:
+        self.codes_ = codes
+        self.categories_ = categories
+        self.lookup_ = {value: code for code, value in enumerate(categories.tolist())}
+        valid = codes >= 0
+        self.order_ = np.flatnonzero(valid)[np.argsort(codes[valid], kind='stable')]
+        counts = np.bincount(codes[valid], minlength=len(categories))
+        self.offsets_ = np.concatenate(([0], np.cumsum(counts)))
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'FeatureIndex':
+        """
+        Build the index of a pandas series. Missing values do not belong to any posting list.
+
+        :param series: feature column
+        :return: FeatureIndex instance
+        """
+        codes, categories = pd.factorize(series, sort=False)
+        return cls(codes.astype(np.int32, copy=False), pd.Index(categories))
+
+    def lookup(self, values: list) -> np.ndarray:
+        """
+        Translate feature values into categorical codes. Values not observed in the data are dropped.
+
+        :param values: feature values
+        :return: categorical codes
+        """
+        return np.unique(np.array([self.lookup_[v] for v in values if v in self.lookup_], dtype=np.int64))
+
+    def postings(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Return the sorted positions of the rows holding any of the given codes.
+
+        :param codes: categorical codes
+        :return: sorted row positions
+        """
+        if len(codes) == 1:
+            return self.order_[self.offsets_[codes[0]]:self.offsets_[codes[0] + 1]]
+        return np.sort(np.concatenate([self.order_[self.offsets_[c]:self.offsets_[c + 1]] for c in codes]))
+
+    def count(self, codes: np.ndarray) -> int:
+        """
+        Number of rows holding any of the given codes.
+
+        :param codes: categorical codes
+        :return: number of rows
+        """
+        return int((self.offsets_[codes + 1] - self.offsets_[codes]).sum())
+
+    def mask(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Boolean lookup table over the categories, True for the given codes.
+
+        :param codes: categorical codes
+        :return: boolean array indexed by code
+        """
+        mask = np.zeros(len(self.categories_), dtype=bool)
+        mask[codes] = True
+        return mask
+
+
+class ScopeIndex:
+    """
+    Scope index built once per dataset.
+    Feature columns are indexed lazily the first time a constraint references them, so columns never involved in a
+    constraint are never encoded. AND-ed feature filters are evaluated by starting from the smallest posting list and
+    filtering it against the categorical codes of the remaining features. The codes of categorical columns are used
+    as they are.
+    """
+    def __init__(self, df: pd.DataFrame | ItemTable) -> None:
+        self.items_ = ItemTable.wrap(df)
+        self.num_rows_ = len(self.items_)
+        self.features_ = {}
+
+    def feature(self, name: str) -> FeatureIndex:
+        """
+        Return the index of a feature column, building it on first access.
+
+        :param name: name of the feature column
+        :return: FeatureIndex instance
+        """
+        if name not in self.features_:
+            if name not in self.items_.columns:
+                raise KeyError(f"feature {name} not found in data")
+            if self.items_.is_categorical(name):
+                self.features_[name] = FeatureIndex(self.items_.array(name), self.items_.dtype(name).categories)
+            else:
+                self.features_[name] = FeatureIndex.from_series(pd.Series(self.items_.array(name), copy=False))
+        return self.features_[name]
+
+    def get_scope(self, constraint: Constraint) -> np.ndarray:
+        """
+        Return the positions of the variables (pandas rows) involved in the constraint.
+
+        :param constraint: constraint defining the scope
+        :return: sorted positions of the records within the scope
+        """
+        return self.select(constraint['features'])
+
+    def select(self, features: List[dict]) -> np.ndarray:
+        """
+        Return the positions of the rows matching all the feature filters.
+
+        :param features: feature filters, each one with name and accepted values
+        :return: sorted positions of the matching rows
+        """
+        filters = []
+        for feature in features:
+            index = self.feature(feature['name'])
+            filters.append((index, index.lookup(feature['values'])))
+        return self.__select_codes(filters)
+
+    def table_scopes(self, table: ConstraintTable) -> List[np.ndarray]:
+        """
+        Return the scope of every constraint of a table. Each distinct pair of feature and value is translated into
+        a categorical code once, and the scopes are evaluated on the translated codes of the table.
+
+        :param table: constraints
+        :return: sorted positions of the records within the scope of each constraint
+        """
+        radix = max(len(table.values_), 1)
+        owner = np.repeat(np.asarray(table.filter_name_, dtype=np.int64), np.diff(table.value_start_))
+        pairs, inverse = np.unique(owner * radix + table.value_code_, return_inverse=True)
+        indexes = [self.feature(name) for name in table.names_]
+        translated = np.array([
+            indexes[pair // radix].lookup_.get(table.values_[pair % radix], -1) for pair in pairs.tolist()
+        ], dtype=np.int64)[inverse]
+        filter_start, filter_name, value_start = table.filter_start_.tolist(), table.filter_name_.tolist(), table.value_start_.tolist()
+        scopes = []
+        for i in range(len(table)):
+            filters = []
+            for j in range(filter_start[i], filter_start[i + 1]):
+                codes = translated[value_start[j]:value_start[j + 1]]
+                filters.append((indexes[filter_name[j]], np.unique(codes[codes >= 0])))
+            scopes.append(self.__select_codes(filters))
+        return scopes
+
+    def __select_codes(self, filters: List[tuple]) -> np.ndarray:
+        """
+        Return the positions of the rows matching all the filters, given as feature index and accepted codes.
+
+        :param filters: list of (FeatureIndex, codes) pairs
+        :return: sorted positions of the matching rows
+        """
+        if len(filters) == 0:
+            return np.arange(self.num_rows_)
+        if any(len(codes) == 0 for _, codes in filters):
+            return np.empty(0, dtype=np.int64)
+        filters = [(index.count(codes), index, codes) for index, codes in filters]
+        filters.sort(key=lambda f: f[0])
+        _, index, codes = filters[0]
+        rows = index.postings(codes)
+        for _, index, codes in filters[1:]:
+            rows = rows[index.mask(codes)[index.codes_[rows]]]
+        return rows
+
+    def group_scopes(self, group_by: List[str], features: List[dict] = None) -> (List[tuple], np.ndarray, np.ndarray):
+        """
+        Partition the rows matching the feature filters by the values of the group_by features, in a single pass.
+        The codes of the group_by features are combined into one group code per row, rows with a missing value in
+        any of them are left out. Groups are ordered by code and their rows are returned in CSR form.
+
+        :param group_by: names of the feature columns defining the groups
+        :param features: feature filters common to all the groups
+        :return: values of the group_by features of each group, start of each group and sorted positions of the rows
+        """
+        rows = self.select(features or [])
+        indexes = [self.feature(name) for name in group_by]
+        group, radix, valid = np.zeros(len(rows), dtype=np.int64), 1, np.ones(len(rows), dtype=bool)
+        for index in indexes:
+            codes = index.codes_[rows]
+            valid &= codes >= 0
+            if radix * len(index.categories_) >= 2 ** 62:  # re-encode the combinations observed so far
+                radix, group = _compact(group)
+            group, radix = group * len(index.categories_) + codes, radix * len(index.categories_)
+        if not valid.all():
+            rows, group = rows[valid], group[valid]
+        if radix <= 2 * len(rows):
+            counts = np.bincount(group, minlength=radix)
+            lookup = np.cumsum(counts > 0) - 1
+            group, counts = lookup[group], counts[counts > 0]
+        else:
+            _, group = _compact(group)
+            counts = np.bincount(group)
+        order = _stable_order(group, len(counts))
+        start = np.zeros(len(counts) + 1, dtype=np.int32)
+        np.cumsum(counts, out=start[1:])
+        rows = rows[order]
+        first = rows[start[:-1]]
+        keys = list(zip(*[index.categories_.take(index.codes_[first]).tolist() for index in indexes]))
+        return keys, start, rows
+
+
+def _stable_order(group: np.ndarray, num_groups: int) -> np.ndarray:
+    """
+    Stable ordering of rows by group code, with one or two passes of the numpy radix sort over 16-bit digits.
+
+    :param group: consecutive group codes
+    :param num_groups: number of groups
+    :return: row positions ordered by group
+    """
+    order = np.argsort(group.astype(np.uint16), kind='stable')
+    if num_groups > 2 ** 16:
+        order = order[np.argsort((group[order] >> 16).astype(np.uint16), kind='stable')]
+    return order
+
+
+def _compact(group: np.ndarray) -> (int, np.ndarray):
+    """
+    Re-encode group codes as consecutive integers, preserving their order.
+
+    :param group: group codes
+    :return: number of distinct codes and consecutive codes
+    """
+    uniques, inverse = np.unique(group, return_inverse=True)
+    return len(uniques), inverse.astype(np.int64, copy=False)
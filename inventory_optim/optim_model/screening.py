@@ -0,0 +1,296 @@
+import numpy as np
+import pandas as pd
+
+from typing import List, TypedDict
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix, constraint_signatures
+
+
+class Conflict(TypedDict):
+    constraints: List[int]
+    method: str
+    violation: float
+
+
+def scope_atoms(matrix: ConstraintMatrix, col_lower: np.ndarray, col_upper: np.ndarray) -> (ConstraintMatrix, np.ndarray, np.ndarray):
+    """
+    Collapse the variables into atoms, the classes of variables belonging to exactly the same rows.
+    With unit coefficients, the activity of a row only depends on the total of each atom, which can take any value
+    between the sums of the bounds of its variables: the model is feasible if and only if its atom model is.
+
+    :param matrix: compiled constraints, with unit coefficients
+    :param col_lower: lower bound of each variable
+    :param col_upper: upper bound of each variable
+    :return: rows over the atoms, lower and upper bound of each atom
+    """
+    signatures = constraint_signatures(matrix)
+    atom = pd.DataFrame({'sig0': signatures[:, 0], 'sig1': signatures[:, 1]}).groupby(['sig0', 'sig1'], sort=False).ngroup().to_numpy()
+    num_atoms = int(atom.max()) + 1 if len(atom) > 0 else 0
+    codes = np.unique(matrix.row_ids().astype(np.int64) * num_atoms + atom[matrix.index_])
+    start = np.zeros(matrix.num_row + 1, dtype=np.int32)
+    np.cumsum(np.bincount(codes // max(num_atoms, 1), minlength=matrix.num_row), out=start[1:])
+    atoms = ConstraintMatrix(matrix.lower_, matrix.upper_, start, (codes % max(num_atoms, 1)).astype(np.int32), np.ones(len(codes)), num_atoms)
+    return atoms, np.bincount(atom, weights=col_lower, minlength=num_atoms), np.bincount(atom, weights=col_upper, minlength=num_atoms)
+
+
+class ScopeScreening:
+    """
+    Screen a model for conflicts between constraints before solving it.
+    Rows are first collapsed on the atoms of their scopes and rows with the same scope are merged into a node of the
+    containment lattice. The implied range of the activity of every node is propagated bottom-up: it is the sum of
+    the ranges of a family of disjoint nodes it contains (e.g. the categories of a store, or the stores of a region)
+    plus the range of the atoms they leave uncovered, intersected with its own bounds. An empty range is a conflict,
+    explained by the rows whose bounds made the range. Conflicts between overlapping scopes that are not nested escape
+    propagation: when it finds none, an elastic LP over the atoms decides feasibility and a deletion filter shrinks the
+    rows supporting its infeasibility to an irreducible set. Conflicts with few rows are also made irreducible; a pair
+    of rows each feasible on its own already is, so that such conflicts are found without the solver.
+    """
+    def __init__(self, matrix: ConstraintMatrix, col_lower: np.ndarray, col_upper: np.ndarray, max_pairs: int = 10 ** 7,
+                 max_atoms: int = 10 ** 5, max_conflicts: int = 10, max_filter_rows: int = 100, tol: float = 1e-6) -> None:
+        assert np.all(matrix.value_ == 1), 'screening requires unit coefficients'
+        with tracer.span('scope_atoms') as span:
+            self.atoms_, self.atom_lower_, self.atom_upper_ = scope_atoms(matrix, col_lower, col_upper)
+            span.set(num_atoms=self.atoms_.num_col_)
+        self.max_pairs_ = max_pairs
+        self.max_atoms_ = max_atoms
+        self.max_conflicts_ = max_conflicts
+        self.max_filter_rows_ = max_filter_rows
+        self.tol_ = tol
+        # violations below this are numerical noise, in the scale of the volume of the atoms
+        self.min_violation_ = tol * max(1., float(np.median(self.atom_upper_)) if self.atoms_.num_col_ > 0 else 1.)
+        self.statistics_ = {'num_atoms': self.atoms_.num_col_}
+
+    def find_conflicts(self) -> List[Conflict]:
+        """
+        Find conflicts by propagation on the lattice and, if it finds none, by the elastic LP.
+
+        :return: list of conflicts, each one with the rows involved, empty if the model was not proven infeasible
+        """
+        with tracer.span('propagate') as span:
+            conflicts = self.propagate()
+            span.set(num_conflicts=len(conflicts))
+        if conflicts or self.atoms_.num_col_ > self.max_atoms_:
+            self.statistics_['lp'] = 'skipped'
+            return conflicts
+        with tracer.span('elastic_lp') as span:
+            conflicts = self.lp_conflicts()
+            span.set(num_conflicts=len(conflicts))
+        return conflicts
+
+    def nodes(self) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+        """
+        Merge the rows with the same atoms into nodes.
+
+        :return: node of each row, representative row, row with the largest lower bound and row with the smallest upper bound of each node
+        """
+        atoms = self.atoms_
+        start, rows, _ = ScopeScreening.__csc(atoms)
+        # the signature of a column of the transposed matrix is the signature of the atoms of a row
+        transposed = ConstraintMatrix(np.zeros(atoms.num_col_), np.zeros(atoms.num_col_), start, rows, np.ones(len(rows)), atoms.num_row)
+        signatures = constraint_signatures(transposed)
+        node = pd.DataFrame({'sig0': signatures[:, 0], 'sig1': signatures[:, 1]}).groupby(['sig0', 'sig1'], sort=False).ngroup().to_numpy()
+
+        def first_by_node(key: np.ndarray) -> np.ndarray:
+            order = np.lexsort((key, node))
+            return order[np.r_[True, node[order][1:] != node[order][:-1]]] if len(order) > 0 else order
+
+        return node, first_by_node(np.arange(atoms.num_row)), first_by_node(-atoms.lower_), first_by_node(atoms.upper_)
+
+    def propagate(self) -> List[Conflict]:
+        """
+        Propagate the implied ranges of the node activities bottom-up through the containment lattice.
+
+        :return: list of conflicts found by propagation
+        """
+        atoms, tol = self.atoms_, self.tol_
+        _, representative, lb_row, ub_row = self.nodes()
+        num_nodes = len(representative)
+        sub = atoms.take_rows(representative)
+        size = np.diff(sub.start_)
+        # overlap of every pair of nodes sharing an atom, from the nodes of every atom
+        start, nodes, _ = ScopeScreening.__csc(sub)
+        per_atom = np.diff(start)
+        num_pairs = int((per_atom.astype(np.int64) ** 2).sum())
+        self.statistics_.update(num_nodes=num_nodes, num_pairs=num_pairs)
+        if num_pairs > self.max_pairs_:
+            self.statistics_['propagation'] = 'skipped'
+            return []
+        entry_atom = np.repeat(np.arange(len(per_atom)), per_atom)
+        partners = per_atom[entry_atom]
+        owner = np.repeat(np.arange(len(nodes)), partners)
+        partner = np.repeat(start[:-1][entry_atom], partners) + np.arange(len(owner)) - np.repeat(np.cumsum(partners) - partners, partners)
+        child, parent = nodes[owner].astype(np.int64), nodes[partner].astype(np.int64)
+        codes, overlap = np.unique(child * num_nodes + parent, return_counts=True)
+        child, parent = codes // num_nodes, codes % num_nodes
+        contained = (child != parent) & (overlap == size[child])
+        child, parent = child[contained], parent[contained]
+        order = np.argsort(parent, kind='stable')
+        child, parent = child[order], parent[order]
+        child_start = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parent, minlength=num_nodes), out=child_start[1:])
+        self.statistics_['num_containments'] = len(child)
+        row_ids = sub.row_ids()
+        natural_lower = np.bincount(row_ids, weights=self.atom_lower_[sub.index_], minlength=num_nodes)
+        natural_upper = np.bincount(row_ids, weights=self.atom_upper_[sub.index_], minlength=num_nodes)
+        # implied range of every node, and the rows whose bounds imply each end
+        lower, upper = natural_lower.copy(), natural_upper.copy()
+        explain_lower, explain_upper = [frozenset()] * num_nodes, [frozenset()] * num_nodes
+        conflicting = np.zeros(num_nodes, dtype=bool)
+        covered = np.zeros(atoms.num_col_, dtype=bool)
+        conflicts = []
+        for p in np.argsort(size, kind='stable'):
+            scope = sub.index_[sub.start_[p]:sub.start_[p + 1]]
+            children = child[child_start[p]:child_start[p + 1]]
+            children = children[~conflicting[children]]
+            gain_lower, gain_upper = lower[children] - natural_lower[children], natural_upper[children] - upper[children]
+            by_lower = children[self.__disjoint(sub, children, gain_lower, covered)]
+            by_upper = children[self.__disjoint(sub, children, gain_upper, covered)]
+            lo = natural_lower[p] + (lower[by_lower] - natural_lower[by_lower]).sum()
+            hi = natural_upper[p] - (natural_upper[by_upper] - upper[by_upper]).sum()
+            own_lower, own_upper = atoms.lower_[lb_row[p]], atoms.upper_[ub_row[p]]
+            lower[p], explain_lower[p] = (own_lower, frozenset([lb_row[p]])) if own_lower > lo else (lo, ScopeScreening.__union(explain_lower, by_lower))
+            upper[p], explain_upper[p] = (own_upper, frozenset([ub_row[p]])) if own_upper < hi else (hi, ScopeScreening.__union(explain_upper, by_upper))
+            if lower[p] > upper[p] + tol * max(1., abs(upper[p])):
+                conflicting[p] = True
+                violation = float(lower[p] - upper[p])
+                # the fewest children, in order of tightening, that make the range empty
+                if own_lower <= lo:
+                    gains = np.cumsum(lower[by_lower] - natural_lower[by_lower])
+                    needed = min(np.searchsorted(gains, upper[p] - natural_lower[p], side='right') + 1, len(gains))
+                    rows = ScopeScreening.__union(explain_lower, by_lower[:needed]) | explain_upper[p]
+                    violation = float(natural_lower[p] + gains[needed - 1] - upper[p])
+                elif own_upper >= hi:
+                    gains = np.cumsum(natural_upper[by_upper] - upper[by_upper])
+                    needed = min(np.searchsorted(gains, natural_upper[p] - lower[p], side='right') + 1, len(gains))
+                    rows = ScopeScreening.__union(explain_upper, by_upper[:needed]) | explain_lower[p]
+                    violation = float(lower[p] - natural_upper[p] + gains[needed - 1])
+                else:
+                    rows = explain_lower[p] | explain_upper[p]
+                rows = sorted(int(r) for r in rows)
+                if len(conflicts) < self.max_conflicts_:
+                    # a pair of rows each feasible on its own is irreducible, and needs no solver
+                    pair = len(rows) == 2 and self.feasible_rows(rows).all()
+                    if 1 < len(rows) <= self.max_filter_rows_ and not pair:
+                        rows = self.irreducible(rows)
+                        violation = float(self.elastic(np.array(rows, dtype=np.int64))[0])
+                    conflicts.append(Conflict(constraints=rows, method='propagation', violation=violation))
+        return conflicts
+
+    @staticmethod
+    def __disjoint(sub: ConstraintMatrix, children: np.ndarray, gain: np.ndarray, covered: np.ndarray) -> np.ndarray:
+        """
+        Pick a family of disjoint children greedily, in decreasing order of how much they tighten a bound over the
+        bound of their atoms, the children that do not tighten it being left out.
+
+        :param sub: atoms of every node
+        :param children: nodes contained in a node
+        :param gain: tightening of every child
+        :param covered: mask of the atoms, all False, left as found
+        :return: positions in children of the picked ones, in order of tightening
+        """
+        picked = []
+        for position in np.argsort(-gain, kind='stable'):
+            if gain[position] <= 0:
+                break
+            c = children[position]
+            child_scope = sub.index_[sub.start_[c]:sub.start_[c + 1]]
+            if not covered[child_scope].any():
+                covered[child_scope] = True
+                picked.append(position)
+        for position in picked:
+            c = children[position]
+            covered[sub.index_[sub.start_[c]:sub.start_[c + 1]]] = False
+        return np.array(picked, dtype=np.int64)
+
+    @staticmethod
+    def __union(explain: list, nodes: np.ndarray) -> frozenset:
+        """
+        Rows implying the bounds of some nodes.
+        """
+        return frozenset().union(*(explain[c] for c in nodes))
+
+    @staticmethod
+    def __csc(matrix: ConstraintMatrix) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Rows of every column of a matrix, i.e. its CSC structure.
+        """
+        order = np.argsort(matrix.index_, kind='stable')
+        start = np.zeros(matrix.num_col_ + 1, dtype=np.int32)
+        np.cumsum(np.bincount(matrix.index_, minlength=matrix.num_col_), out=start[1:])
+        return start, matrix.row_ids()[order], order
+
+    def elastic(self, rows: np.ndarray) -> (float, np.ndarray):
+        """
+        Minimize the total violation of some rows over the atoms.
+
+        :param rows: rows of the atom model
+        :return: minimal total violation and dual value of every row
+        """
+        # imported here, so that screening settled by propagation never loads the solver
+        import highspy
+        from inventory_optim.optim_model.builder import HighsSolver
+        sub = self.atoms_.take_rows(rows)
+        num_col, num_row = self.atoms_.num_col_, sub.num_row
+        ids = np.arange(num_row)
+        coo_rows = np.concatenate([sub.row_ids(), ids, ids])
+        coo_cols = np.concatenate([sub.index_, num_col + ids, num_col + num_row + ids])
+        coo_values = np.concatenate([sub.value_, np.ones(num_row), -np.ones(num_row)])
+        order = np.argsort(coo_rows, kind='stable')
+        start = np.zeros(num_row + 1, dtype=np.int32)
+        np.cumsum(np.bincount(coo_rows, minlength=num_row), out=start[1:])
+        highs = HighsSolver(60)
+        highs.impl_.setOptionValue('output_flag', False)
+        highs.impl_.addVars(num_col + 2 * num_row, np.concatenate([self.atom_lower_, np.zeros(2 * num_row)]),
+                            np.concatenate([self.atom_upper_, np.full(2 * num_row, np.inf)]))
+        highs.impl_.addRows(num_row, sub.lower_, sub.upper_, len(coo_rows), start, coo_cols[order].astype(np.int32), coo_values[order])
+        highs.impl_.changeObjectiveSense(highspy.ObjSense.kMinimize)
+        highs.impl_.changeColsCost(2 * num_row, np.arange(num_col, num_col + 2 * num_row, dtype=np.int32), np.ones(2 * num_row))
+        highs.impl_.run()
+        solution = highs.impl_.getSolution()
+        return highs.impl_.getInfo().objective_function_value, np.array(solution.row_dual)
+
+    def feasible_rows(self, rows: List[int]) -> np.ndarray:
+        """
+        Whether every row, on its own, can be met within the bounds of its atoms.
+
+        :param rows: rows of the atom model
+        :return: mask of the rows feasible on their own
+        """
+        sub = self.atoms_.take_rows(np.array(rows, dtype=np.int64))
+        row_ids = sub.row_ids()
+        natural_lower = np.bincount(row_ids, weights=self.atom_lower_[sub.index_], minlength=sub.num_row)
+        natural_upper = np.bincount(row_ids, weights=self.atom_upper_[sub.index_], minlength=sub.num_row)
+        return (sub.lower_ <= natural_upper + self.min_violation_) & (sub.upper_ >= natural_lower - self.min_violation_)
+
+    def irreducible(self, rows: List[int]) -> List[int]:
+        """
+        Deletion filter: drop the rows of an infeasible set one at a time, as long as the rest stays infeasible.
+
+        :param rows: infeasible set of rows
+        :return: irreducible infeasible subset of rows
+        """
+        rows = list(rows)
+        for row in list(rows):
+            rest = [r for r in rows if r != row]
+            if self.elastic(np.array(rest, dtype=np.int64))[0] > self.min_violation_:
+                rows = rest
+        return rows
+
+    def lp_conflicts(self) -> List[Conflict]:
+        """
+        Find conflicts with the elastic LP over the atoms: the rows with a nonzero dual value support the violation,
+        and are filtered to an irreducible set. The rows of a conflict are then dropped and the search starts again.
+
+        :return: list of conflicts found by the elastic LP
+        """
+        active, conflicts = np.arange(self.atoms_.num_row), []
+        while len(conflicts) < self.max_conflicts_ and len(active) > 0:
+            violation, dual = self.elastic(active)
+            self.statistics_.setdefault('lp_violation', violation)
+            if violation <= self.min_violation_:
+                break
+            support = active[np.abs(dual) > 1e-9]
+            rows = self.irreducible(support.tolist()) if len(support) <= self.max_filter_rows_ else support.tolist()
+            conflicts.append(Conflict(constraints=rows, method='lp', violation=float(self.elastic(np.array(rows, dtype=np.int64))[0])))
+            active = np.setdiff1d(active, rows)
+        return conflicts
@@ -0,0 +1,86 @@
+import json
+import highspy
+import numpy as np
+
+from typing import Sequence
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.optim_model.builder import ModelBuilder
+
+
+class SensitivityReport:
+    """
+    Dual values, reduced costs and Highs ranging of a solved model, mapped back to the constraints and to the items.
+    For a constraint, dual is the change of the objective per unit change of its active bound, valid while the bound
+    stays within [bound_dn, bound_up], where the objective becomes bound_dn_objective and bound_up_objective.
+    For an item, cost_dn and cost_up delimit the objective coefficients for which the solution does not change, and
+    bound_dn and bound_up the values its active bound can take keeping the same basis. Ranging requires a basis, so
+    its columns are NaN when the solver returned none (e.g. interior point without crossover).
+    """
+    def __init__(self, constraints: ItemTable, items: ItemTable, summary: dict) -> None:
+        self.constraints_ = constraints
+        self.items_ = items
+        self.summary_ = summary
+
+    @classmethod
+    def from_model(cls, mb: ModelBuilder, constraints: Sequence[Constraint] = None, items: ItemTable = None,
+                   id_col: str = None) -> 'SensitivityReport':
+        """
+        Extract the sensitivity report of a model solved by ModelBuilder.solve.
+
+        :param mb: solved model
+        :param constraints: constraints in row order, used to describe the rows; rows beyond them are not described
+        :param items: item table of the model, used to identify the items
+        :param id_col: column of items identifying the items, the position of the item if not provided
+        :return: SensitivityReport instance
+        """
+        assert mb.matrix_ is not None, 'sensitivity report requires the bulk build path'
+        highs = mb.highs_.impl_
+        num_col, num_row = len(mb.col_lower_), mb.matrix_.num_row
+        solution, info = highs.getSolution(), highs.getInfo()
+        status, ranging = highs.getRanging()
+        ranging_valid = status == highspy.HighsStatus.kOk and ranging.valid
+
+        def ranges(record, size):
+            if not ranging_valid:
+                return np.full(size, np.nan), np.full(size, np.nan)
+            return np.array(record.value_[:size], dtype=np.float64), np.array(record.objective_[:size], dtype=np.float64)
+
+        constraints = constraints if constraints is not None else []
+        row_arrays = {
+            'constraint': np.arange(num_row),
+            'features': np.array(
+                [json.dumps(constraints[i]['features']) if i < len(constraints) else None for i in range(num_row)], dtype=object
+            ),
+            'lb': np.asarray(mb.matrix_.lower_, dtype=np.float64),
+            'ub': np.asarray(mb.matrix_.upper_, dtype=np.float64),
+            'activity': np.array(solution.row_value, dtype=np.float64),
+            'dual': np.array(solution.row_dual, dtype=np.float64) if solution.dual_valid else np.full(num_row, np.nan)
+        }
+        for name, record in [('bound_dn', ranging.row_bound_dn), ('bound_up', ranging.row_bound_up)]:
+            row_arrays[name], row_arrays[f'{name}_objective'] = ranges(record, num_row)
+        col_arrays, dtypes = {}, {}
+        if items is not None and id_col is not None and id_col in items.columns:
+            col_arrays[id_col] = items.array(id_col)
+            if items.is_categorical(id_col):
+                dtypes[id_col] = items.dtype(id_col)
+        else:
+            col_arrays['item'] = np.arange(num_col)
+        col_arrays.update({
+            'value': np.array(solution.col_value, dtype=np.float64),
+            'lower': np.asarray(mb.col_lower_, dtype=np.float64),
+            'upper': np.asarray(mb.col_upper_, dtype=np.float64),
+            'cost': np.asarray(mb.col_cost_, dtype=np.float64),
+            'reduced_cost': np.array(solution.col_dual, dtype=np.float64) if solution.dual_valid else np.full(num_col, np.nan)
+        })
+        for name, record in [('cost_dn', ranging.col_cost_dn), ('cost_up', ranging.col_cost_up),
+                             ('bound_dn', ranging.col_bound_dn), ('bound_up', ranging.col_bound_up)]:
+            col_arrays[name], col_arrays[f'{name}_objective'] = ranges(record, num_col)
+        dual = np.nan_to_num(row_arrays['dual'])
+        summary = {
+            'objective': info.objective_function_value,
+            'dual_valid': bool(solution.dual_valid),
+            'ranging_valid': bool(ranging_valid),
+            'num_binding_constraints': int((np.abs(dual) > highs.getOptionValue('dual_feasibility_tolerance')[1]).sum())
+        }
+        return cls(ItemTable(row_arrays), ItemTable(col_arrays, dtypes), summary)
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from timeit import default_timer as timer
+from typing import List
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+class WhatIfSession:
+    """
+    Long-lived optimization session for what-if analysis.
+    The model is built once; deltas are applied in place to the Highs model, so every re-solve warm-starts from the
+    basis of the previous solve. Each solve is recorded with the deltas applied since the previous one, only the last
+    max_history records being kept if given, e.g. for sessions kept resident by a service.
+    """
+    def __init__(self, df: pd.DataFrame, constraints: List[Constraint], var_name: str, obj_feature_name: str,
+                 obj: str = OBJ_MAX, var_incr: float = 1.5, var_decr: float = .8, time_limit_seconds=60,
+                 index: ScopeIndex = None, max_history: int = None) -> None:
+        self.df_ = df
+        self.var_name_ = var_name
+        self.obj_feature_name_ = obj_feature_name
+        self.obj_ = obj
+        self.var_incr_ = var_incr
+        self.var_decr_ = var_decr
+        self.constraints_ = list(constraints)
+        self.mb_ = ModelBuilder(time_limit_seconds)
+        self.mb_.create_variables(df, var_incr, var_decr, var_name)
+        self.mb_.build_model(df, self.constraints_, obj_feature_name, obj, index)
+        self.pending_deltas_ = ['build']
+        assert max_history is None or max_history > 0
+        self.max_history_ = max_history
+        self.history_ = []
+
+    @property
+    def highs(self):
+        return self.mb_.highs_.impl_
+
+    def change_constraint_bounds(self, rows: List[int], lb: List[float], ub: List[float]) -> None:
+        """
+        Change the bounds of existing constraints.
+
+        :param rows: positions of the constraints in the session, removed constraints cannot be changed
+        :param lb: new lower bounds
+        :param ub: new upper bounds
+        :return: None
+        """
+        for row, lower, upper in zip(rows, lb, ub):
+            assert self.constraints_[row] is not None, f'constraint {row} has been removed'
+            self.highs.changeRowBounds(int(row), float(lower), float(upper))
+            self.constraints_[row] = Constraint(lb=lower, ub=upper, features=self.constraints_[row]['features'])
+            self.mb_.matrix_.lower_[row], self.mb_.matrix_.upper_[row] = lower, upper
+        self.pending_deltas_.append(f'change_constraint_bounds({len(rows)})')
+
+    def change_variable_bounds(self, var_incr: float = None, var_decr: float = None) -> None:
+        """
+        Recompute the variable bounds with new increase/decrease percentages.
+
+        :param var_incr: upper bound in percentage, unchanged if not provided
+        :param var_decr: lower bound in percentage, unchanged if not provided
+        :return: None
+        """
+        self.var_incr_ = var_incr if var_incr is not None else self.var_incr_
+        self.var_decr_ = var_decr if var_decr is not None else self.var_decr_
+        reference = ItemTable.wrap(self.df_).numeric(self.var_name_)
+        self.mb_.col_lower_ = self.var_decr_ * reference
+        self.mb_.col_upper_ = self.var_incr_ * reference
+        self.highs.changeColsBounds(
+            len(reference), np.arange(len(reference), dtype=np.int32), self.mb_.col_lower_, self.mb_.col_upper_
+        )
+        self.pending_deltas_.append(f'change_variable_bounds({self.var_incr_}, {self.var_decr_})')
+
+    def change_objective(self, obj_feature_name: str = None, obj: str = None) -> None:
+        """
+        Change the objective column and/or the optimization direction.
+
+        :param obj_feature_name: name of the feature used to build the obj function, unchanged if not provided
+        :param obj: either max or min, unchanged if not provided
+        :return: None
+        """
+        self.obj_feature_name_ = obj_feature_name if obj_feature_name is not None else self.obj_feature_name_
+        self.obj_ = obj if obj is not None else self.obj_
+        self.mb_.make_objective(self.df_, self.obj_feature_name_, self.obj_)
+        self.pending_deltas_.append(f'change_objective({self.obj_feature_name_}, {self.obj_})')
+
+    def add_constraints(self, constraints: List[Constraint]) -> List[int]:
+        """
+        Add constraints to the model.
+
+        :param constraints: constraints to be added
+        :return: positions of the new constraints in the session
+        """
+        matrix = ConstraintMatrix.compile(self.mb_.scope_index_, constraints)
+        self.highs.addRows(matrix.num_row, matrix.lower_, matrix.upper_, matrix.nnz, matrix.start_[:-1], matrix.index_, matrix.value_)
+        self.mb_.matrix_ = ConstraintMatrix.vstack([self.mb_.matrix_, matrix])
+        rows = list(range(len(self.constraints_), len(self.constraints_) + len(constraints)))
+        self.constraints_.extend(constraints)
+        self.pending_deltas_.append(f'add_constraints({len(constraints)})')
+        return rows
+
+    def remove_constraints(self, rows: List[int]) -> None:
+        """
+        Remove constraints from the model.
+        Rows are deactivated by relaxing their bounds rather than deleted, since deleting rows invalidates the basis
+        and the next solve would start from scratch. Positions of the other constraints are left unchanged.
+
+        :param rows: positions of the constraints in the session
+        :return: None
+        """
+        inf = self.highs.getInfinity()
+        for row in rows:
+            self.highs.changeRowBounds(int(row), -inf, inf)
+            self.mb_.matrix_.lower_[row], self.mb_.matrix_.upper_[row] = -inf, inf
+            self.constraints_[row] = None
+        self.pending_deltas_.append(f'remove_constraints({len(rows)})')
+
+    def solve(self) -> (bool, list[float]):
+        """
+        Re-solve the model, warm-starting from the basis of the previous solve when available.
+
+        :return: solution flag and solution
+        """
+        warm_start = self.highs.getBasis().valid
+        start = timer()
+        is_ok, values = self.mb_.solve()
+        elapsed = timer() - start
+        info = self.highs.getInfo()
+        self.history_.append({
+            'deltas': self.pending_deltas_,
+            'warm_start': warm_start,
+            'solving_time(s)': elapsed,
+            'iteration_count': info.simplex_iteration_count,
+            'status': self.highs.modelStatusToString(self.highs.getModelStatus()),
+            'objective': info.objective_function_value
+        })
+        if self.max_history_ is not None:
+            del self.history_[:-self.max_history_]
+        self.pending_deltas_ = []
+        return is_ok, values
+
+    def populate_statistics(self, statistics: dict) -> None:
+        """
+        Collect statistics of the model and of every solve of the session.
+
+        :param statistics: dictionary containing the statistics
+        :return: None
+        """
+        self.mb_.populate_statistics(statistics)
+        statistics['what_if'] = self.history_
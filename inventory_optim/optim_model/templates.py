@@ -0,0 +1,74 @@
+import numpy as np
+
+from typing import List
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate
+from inventory_optim.monitoring.tracing import tracer
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+def expand_template(index: ScopeIndex, template: ConstraintTemplate) -> (List[Constraint], ConstraintMatrix):
+    """
+    Expand a constraint template into its constraints with a single group-by over the data.
+    With a bounds table, there is one constraint per entry of the table, in the same order, groups not observed in
+    the data giving constraints with an empty scope. With ratios, there is one constraint per observed group, with
+    bounds proportional to the volume of the reference column within the group.
+
+    :param index: scope index of the data
+    :param template: constraint template
+    :return: expanded constraints and their compiled rows
+    """
+    features = template.get('features', [])
+    keys, start, rows = index.group_scopes(template['group_by'], features)
+    num_groups = len(keys)
+    if 'bounds' in template:
+        table = template['bounds']
+        positions = {key: i for i, key in enumerate(keys)}
+        # the extra empty row stands for the groups of the table not observed in the data
+        start = np.append(start, start[-1]).astype(np.int32)
+        take = np.array([positions.get(tuple(key), num_groups) for key in table['keys']], dtype=np.int64)
+        keys = [tuple(key) for key in table['keys']]
+        lower, upper = np.asarray(table['lb'], dtype=np.float64), np.asarray(table['ub'], dtype=np.float64)
+    else:
+        take = None
+        reference = index.items_.numeric(template['reference'])[rows]
+        volumes = np.add.reduceat(reference, start[:-1]) if num_groups > 0 else np.zeros(0)  # groups are never empty
+        lower, upper = template['lb_ratio'] * volumes, template['ub_ratio'] * volumes
+    matrix = ConstraintMatrix(
+        np.zeros(len(start) - 1), np.zeros(len(start) - 1), start, rows.astype(np.int32), np.ones(len(rows)),
+        index.num_rows_
+    )
+    if take is not None:
+        matrix = matrix.take_rows(take)
+    matrix.lower_, matrix.upper_ = lower, upper
+    constraints = [
+        Constraint(
+            lb=float(lb), ub=float(ub),
+            features=features + [{'name': name, 'values': [value]} for name, value in zip(template['group_by'], key)]
+        ) for key, lb, ub in zip(keys, lower, upper)
+    ]
+    return constraints, matrix
+
+
+def compile_constraints(index: ScopeIndex, constraints: List[Constraint],
+                        templates: List[ConstraintTemplate] = None) -> (List[Constraint], ConstraintMatrix):
+    """
+    Compile a list of constraints and expand a list of templates into a single constraint matrix.
+    The rows of the explicit constraints come first, followed by the rows of every template, in order.
+
+    :param index: scope index of the data
+    :param constraints: explicit constraints
+    :param templates: constraint templates
+    :return: explicit and expanded constraints, and their compiled rows
+    """
+    matrix = ConstraintMatrix.compile(index, constraints)
+    if not templates:
+        return constraints, matrix
+    constraints, matrices = list(constraints), [matrix]
+    for template in templates:
+        with tracer.span('expand_template', group_by=','.join(template['group_by'])) as span:
+            expanded, rows = expand_template(index, template)
+            span.set(num_constraints=rows.num_row, nonzero=rows.nnz)
+        constraints += expanded
+        matrices.append(rows)
+    return constraints, ConstraintMatrix.vstack(matrices)
@@ -0,0 +1,86 @@
+import json
+import socket
+import pandas as pd
+
+from typing import List, Union
+from inventory_optim.data_model.constraints import Constraint
+
+
+class ServiceClient:
+    """
+    Blocking client of the resident optimization service, see OptimService for the protocol.
+    """
+    def __init__(self, socket_path: str, timeout: float = None) -> None:
+        self.socket_ = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket_.settimeout(timeout)
+        self.socket_.connect(socket_path)
+        self.file_ = self.socket_.makefile('rwb')
+
+    def __enter__(self) -> 'ServiceClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __read(self) -> dict:
+        line = self.file_.readline()
+        assert line, 'connection closed by the service'
+        return json.loads(line)
+
+    def request(self, message: dict) -> dict:
+        """
+        Send a request and wait for its response.
+
+        :param message: request
+        :return: response
+        """
+        self.file_.write(json.dumps(message).encode() + b'\n')
+        self.file_.flush()
+        return self.__read()
+
+    def register(self, name: str, path: str, columns: List[str] = None, categorical: List[str] = None) -> dict:
+        """
+        Register a dataset.
+
+        :param name: name of the dataset
+        :param path: path of the data, as seen by the service
+        :param columns: columns to be loaded, all of them if not provided
+        :param categorical: columns to be loaded as categoricals
+        :return: statistics of the registration
+        """
+        return self.request({'op': 'register', 'name': name, 'path': path, 'columns': columns, 'categorical': categorical})
+
+    def solve(self, dataset: str, constraints: Union[str, List[Constraint]], var_col: str, optim_col: str,
+              stream: bool = False, **options) -> (dict, pd.DataFrame):
+        """
+        Solve a job on a registered dataset.
+
+        :param dataset: name of the dataset
+        :param constraints: path of a constraint file, as seen by the service, or list of constraints
+        :param var_col: name of the column used as optimization variable
+        :param optim_col: name of the column used as optimization objective
+        :param stream: flag to receive the solution
+        :param options: optional fields of the job (optim_obj, var_incr, var_decr, time_limit, check, export_solution,
+            export_columns, chunk_size)
+        :return: statistics of the job and, if streamed, dataframe with the exported columns and the solution
+        """
+        message = {'op': 'solve', 'dataset': dataset, 'constraints': constraints, 'var_col': var_col,
+                   'optim_col': optim_col, 'stream': stream, **options}
+        stats = self.request(message)
+        if not stream or stats.get('status') != 'done':
+            return stats, None
+        header, chunks = self.__read(), []
+        while 'end' not in (message := self.__read()):
+            chunks.append(pd.DataFrame(message['chunk'], columns=header['columns']))
+        solution = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=header['columns'])
+        return stats, solution
+
+    def status(self) -> dict:
+        return self.request({'op': 'status'})
+
+    def shutdown(self) -> dict:
+        return self.request({'op': 'shutdown'})
+
+    def close(self) -> None:
+        self.file_.close()
+        self.socket_.close()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from timeit import default_timer as timer
+from typing import List
+from inventory_optim.data_model.reader import read_data
+from inventory_optim.data_model.shared_data import SharedDataset
+from inventory_optim.export.exporter import Exporter
+from inventory_optim.monitoring.time_runner import TimeRunner
+from inventory_optim.service.worker import make_job, model_key, run_job
+
+
+def to_builtin(value):
+    """
+    json.dumps default for numpy scalars and arrays.
+
+    :param value: value not serializable by json
+    :return: serializable value
+    """
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class OptimService:
+    """
+    Resident optimization service.
+    Datasets are read once, published in shared memory and kept for the lifetime of the service. Jobs are solved by
+    a fixed set of worker processes, one job at a time per worker, so that the event loop only moves requests and
+    results around. Every worker keeps the models of its last jobs: a job is routed to the worker holding a model
+    with the same scopes, unless that worker is much busier than the others, and is then solved by updating bounds
+    and objective of that model.
+
+    The protocol is line-delimited json over a unix socket. Every request is a json object with an op field:
+    - register: name, path, optional columns and categorical; reads (or re-reads) a dataset
+    - solve: dataset, constraints (file path or list), var_col, optim_col and the optional fields of a job (optim_obj,
+      var_incr, var_decr, time_limit, check), plus export_solution (file path) or stream (boolean), export_columns and
+      chunk_size; the solution is written to file or streamed as column chunks after the response
+    - status: registered datasets and job counters
+    - shutdown: stop the service
+    """
+    def __init__(self, num_workers: int = None, max_pending_jobs: int = 64, time_limit: int = 60) -> None:
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
+        context = multiprocessing.get_context('spawn')
+        self.workers_ = [ProcessPoolExecutor(1, mp_context=context) for _ in range(num_workers)]
+        self.worker_load_ = [0] * num_workers
+        self.owners_ = {}
+        self.max_pending_jobs_ = max_pending_jobs
+        self.time_limit_ = time_limit
+        self.datasets_ = {}
+        self.num_jobs_ = 0
+        self.num_failed_ = 0
+        self.logger_ = logging.getLogger('service')
+        self.server_ = None
+
+    def register_dataset(self, name: str, path: str, columns: List[str] = None, categorical: List[str] = None) -> dict:
+        """
+        Read a dataset and publish it for the workers, replacing any dataset with the same name.
+
+        :param name: name of the dataset
+        :param path: path of the data
+        :param columns: columns to be loaded, all of them if not provided
+        :param categorical: columns to be loaded as categoricals
+        :return: statistics of the registration
+        """
+        stats = {'dataset': name}
+        data = TimeRunner.run_and_log(stats, read_data, [path, columns, categorical], 'reading_data(s)', f'reading dataset {name}', self.logger_)
+        dataset = TimeRunner.run_and_log(stats, SharedDataset.publish, [data], 'publishing_data(s)', f'publishing dataset {name}', self.logger_)
+        previous = self.datasets_.get(name)
+        self.datasets_[name] = {
+            'dataset': dataset,
+            'frame': dataset.to_frame(),
+            'path': path,
+            'version': previous['version'] + 1 if previous is not None else 0
+        }
+        if previous is not None:
+            previous['dataset'].close()  # workers keep their own mapping of the old version until they drop it
+        stats.update({'num_rows': len(data), 'columns': data.columns.tolist(), 'version': self.datasets_[name]['version']})
+        return stats
+
+    def status(self) -> dict:
+        """
+        Describe the state of the service.
+
+        :return: registered datasets and job counters
+        """
+        return {
+            'datasets': {name: {'path': d['path'], 'num_rows': len(d['frame']), 'version': d['version']} for name, d in self.datasets_.items()},
+            'num_workers': len(self.workers_),
+            'pending_jobs': sum(self.worker_load_),
+            'num_jobs': self.num_jobs_,
+            'num_failed': self.num_failed_
+        }
+
+    def __route(self, key: tuple) -> int:
+        """
+        Choose the worker of a job: the one holding the model of the job, unless it has more than one job pending
+        than the least loaded worker.
+
+        :param key: model key of the job
+        :return: position of the worker
+        """
+        least_loaded = int(np.argmin(self.worker_load_))
+        owner = self.owners_.get(key)
+        if owner is None or self.worker_load_[owner] > self.worker_load_[least_loaded] + 1:
+            owner = self.owners_[key] = least_loaded
+        return owner
+
+    async def solve(self, request: dict) -> (dict, np.ndarray):
+        """
+        Queue a job and wait for its result.
+
+        :param request: job request
+        :return: statistics of the job and solution (None if the job failed)
+        """
+        assert sum(self.worker_load_) < self.max_pending_jobs_, f'too many pending jobs ({self.max_pending_jobs_})'
+        assert request.get('dataset') in self.datasets_, f"dataset {request.get('dataset')} not registered"
+        self.num_jobs_ += 1
+        job = make_job(request, f'job_{self.num_jobs_:06d}', self.time_limit_)
+        dataset = self.datasets_[job['dataset']]
+        # constraint files are routed by path, as their scopes are only known once read by the worker
+        key = model_key(job, job['constraints']) if not isinstance(job['constraints'], str) else (job['dataset'], job['var_col'], job['constraints'])
+        worker = self.__route(key)
+        self.worker_load_[worker] += 1
+        start = timer()
+        try:
+            future = self.workers_[worker].submit(run_job, job, dataset['version'], dataset['dataset'].descriptor_)
+            stats, values = await asyncio.wrap_future(future)
+        finally:
+            self.worker_load_[worker] -= 1
+        stats['queue_and_solve(s)'] = timer() - start
+        if stats['status'] != 'done':
+            self.num_failed_ += 1
+        elif request.get('export_solution'):
+            export_args = [request['export_solution'], dataset['frame'], values, 'opt', request.get('export_columns')]
+            await asyncio.get_running_loop().run_in_executor(None, TimeRunner.measure_elapsed_time, stats, Exporter.export_solution, export_args, 'export_solution(s)')
+        self.logger_.info(f"{stats['job']} {stats['status']} in {stats['job_time(s)']:.3f}s (warm model: {stats.get('warm_model')})")
+        return stats, values
+
+    async def __write(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(json.dumps(message, default=to_builtin).encode() + b'\n')
+        await writer.drain()
+
+    async def __stream(self, writer: asyncio.StreamWriter, request: dict, values: np.ndarray) -> None:
+        """
+        Stream a solution as json lines, each one holding a chunk of the exported columns and of the solution.
+
+        :param writer: stream of the client
+        :param request: job request
+        :param values: solution
+        :return: None
+        """
+        frame = self.datasets_[request['dataset']]['frame']
+        columns = request.get('export_columns') or []
+        chunk_size = request.get('chunk_size', 100_000)
+        await self.__write(writer, {'columns': columns + ['opt'], 'num_rows': len(values)})
+        for start in range(0, len(values), chunk_size):
+            stop = min(start + chunk_size, len(values))
+            chunk = {c: frame[c].iloc[start:stop].tolist() for c in columns}
+            chunk['opt'] = values[start:stop]
+            await self.__write(writer, {'chunk': chunk})
+        await self.__write(writer, {'end': True})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the requests of a client connection, in order.
+
+        :param reader: stream of the requests
+        :param writer: stream of the responses
+        :return: None
+        """
+        try:
+            while line := await reader.readline():
+                values, request = None, {}
+                try:
+                    request = json.loads(line)
+                    op = request.get('op')
+                    if op == 'register':
+                        loop = asyncio.get_running_loop()
+                        args = [request['name'], request['path'], request.get('columns'), request.get('categorical')]
+                        response = await loop.run_in_executor(None, self.register_dataset, *args)
+                    elif op == 'solve':
+                        response, values = await self.solve(request)
+                    elif op == 'status':
+                        response = self.status()
+                    elif op == 'shutdown':
+                        response = {'status': 'stopping'}
+                        self.server_.close()
+                    else:
+                        raise ValueError(f'unknown op {op}')
+                except Exception as e:
+                    response = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+                await self.__write(writer, response)
+                if values is not None and request.get('stream'):
+                    await self.__stream(writer, request, values)
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str) -> None:
+        """
+        Serve clients on a unix socket until a shutdown request.
+
+        :param socket_path: path of the unix socket
+        :return: None
+        """
+        if Path(socket_path).exists():
+            Path(socket_path).unlink()
+        self.server_ = await asyncio.start_unix_server(self.handle, path=socket_path)
+        self.logger_.info(f'serving on {socket_path} with {len(self.workers_)} workers')
+        try:
+            await self.server_.wait_closed()
+        finally:
+            self.close()
+            if Path(socket_path).exists():
+                Path(socket_path).unlink()
+
+    def close(self) -> None:
+        """
+        Stop the workers and release the datasets.
+
+        :return: None
+        """
+        for worker in self.workers_:
+            worker.shutdown(cancel_futures=True)
+        for dataset in self.datasets_.values():
+            dataset['frame'] = None
+            dataset['dataset'].close()
+        self.datasets_ = {}
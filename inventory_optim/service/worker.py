@@ -0,0 +1,169 @@
+import json
+import os
+import numpy as np
+
+from collections import OrderedDict
+from timeit import default_timer as timer
+from typing import TypedDict, List, Union
+from inventory_optim.data_model.checker import Checker
+from inventory_optim.data_model.constraint_table import read_problem
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.shared_data import SharedDataset
+from inventory_optim.monitoring.time_runner import TimeRunner
+from inventory_optim.optim_model.constants import OBJ_MAX
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.optim_model.session import WhatIfSession
+from inventory_optim.optim_model.templates import expand_template
+
+
+MAX_SESSIONS = 4
+MAX_HISTORY = 1  # jobs only report their own solve, resident sessions must not grow
+
+
+class Job(TypedDict):
+    id: str
+    dataset: str
+    constraints: Union[str, List[Constraint]]
+    var_col: str
+    optim_col: str
+    optim_obj: str
+    var_incr: float
+    var_decr: float
+    time_limit: int
+    check: bool
+
+
+def make_job(request: dict, job_id: str, time_limit: int) -> Job:
+    """
+    Fill a job request with the defaults of main.py.
+
+    :param request: job request, constraints being either the path of a constraint file or a list of constraints
+    :param job_id: identifier of the job
+    :param time_limit: default solver time limit in seconds
+    :return: job
+    """
+    for key in ['dataset', 'constraints', 'var_col', 'optim_col']:
+        assert key in request, f'{key} is required'
+    return Job(
+        id=job_id,
+        dataset=request['dataset'],
+        constraints=request['constraints'],
+        var_col=request['var_col'],
+        optim_col=request['optim_col'],
+        optim_obj=request.get('optim_obj', OBJ_MAX),
+        var_incr=request.get('var_incr', 1.5),
+        var_decr=request.get('var_decr', .8),
+        time_limit=request.get('time_limit', time_limit),
+        check=request.get('check', True)
+    )
+
+
+def model_key(job: Job, constraints: List[Constraint]) -> tuple:
+    """
+    Key of the model of a job: jobs with the same key only differ by bounds and objective, so that they can be solved
+    by updating the model of the previous one.
+
+    :param job: job
+    :param constraints: constraints of the job
+    :return: key of the model
+    """
+    return job['dataset'], job['var_col'], json.dumps([c['features'] for c in constraints], sort_keys=True)
+
+
+# state of the worker process, kept across jobs
+_datasets = {}
+_sessions = OrderedDict()
+
+
+def _attach_dataset(name: str, version: int, descriptor: dict) -> (object, ScopeIndex):
+    """
+    Attach to a registered dataset, once per version.
+    Models built on a previous version of the dataset are dropped.
+
+    :param name: name of the dataset
+    :param version: version of the dataset
+    :param descriptor: descriptor of the published dataset
+    :return: dataframe and scope index
+    """
+    cached = _datasets.get(name)
+    if cached is None or cached['version'] != version:
+        for key in [k for k in _sessions if k[0] == name]:
+            del _sessions[key]
+        dataset = SharedDataset.attach(descriptor)
+        frame = dataset.to_frame()
+        cached = _datasets[name] = {'version': version, 'dataset': dataset, 'frame': frame, 'index': ScopeIndex(frame)}
+    return cached['frame'], cached['index']
+
+
+def _update_session(session: WhatIfSession, job: Job, constraints: List[Constraint]) -> List[str]:
+    """
+    Apply the differences between the model of a session and a job with the same model key.
+
+    :param session: session holding the model of a previous job
+    :param job: job
+    :param constraints: constraints of the job
+    :return: deltas applied to the session
+    """
+    matrix = session.mb_.matrix_
+    lb, ub = np.array([c['lb'] for c in constraints], dtype=np.float64), np.array([c['ub'] for c in constraints], dtype=np.float64)
+    rows = np.flatnonzero((lb != matrix.lower_) | (ub != matrix.upper_))
+    if len(rows) > 0:
+        session.change_constraint_bounds(rows.tolist(), lb[rows].tolist(), ub[rows].tolist())
+    if (job['var_incr'], job['var_decr']) != (session.var_incr_, session.var_decr_):
+        session.change_variable_bounds(job['var_incr'], job['var_decr'])
+    if (job['optim_col'], job['optim_obj']) != (session.obj_feature_name_, session.obj_):
+        session.change_objective(job['optim_col'], job['optim_obj'])
+    session.highs.setOptionValue('time_limit', float(job['time_limit']))
+    return session.pending_deltas_
+
+
+def run_job(job: Job, version: int, descriptor: dict) -> (dict, np.ndarray):
+    """
+    Run a job in a worker process. The model of the job is taken from the models kept by the worker when possible
+    and updated in place, so that the solve warm-starts from the previous basis; it is built otherwise.
+
+    :param job: job
+    :param version: version of the dataset
+    :param descriptor: descriptor of the published dataset
+    :return: statistics of the job and solution (None if the job failed)
+    """
+    stats = {'job': job['id'], 'worker': os.getpid()}
+    start, values = timer(), None
+    try:
+        frame, index = TimeRunner.measure_elapsed_time(stats, _attach_dataset, [job['dataset'], version, descriptor], 'attach_dataset(s)')
+        if isinstance(job['constraints'], str):
+            problem = TimeRunner.measure_elapsed_time(stats, read_problem, [job['constraints']], 'read_constraint_file(s)')
+            # sessions edit constraints one by one, templates are expanded into explicit constraints
+            constraints = list(problem['constraints']) + [c for t in problem['templates'] for c in expand_template(index, t)[0]]
+        else:
+            constraints = [Constraint(c) for c in job['constraints']]
+        key = model_key(job, constraints)
+        session = _sessions.pop(key, None)
+        stats['warm_model'] = session is not None
+        if session is None:
+            session = TimeRunner.measure_elapsed_time(stats, WhatIfSession, [
+                frame, constraints, job['var_col'], job['optim_col'], job['optim_obj'], job['var_incr'], job['var_decr'],
+                job['time_limit'], index, MAX_HISTORY
+            ], 'build_model(s)')
+            session.highs.setOptionValue('output_flag', False)
+        else:
+            stats['deltas'] = list(TimeRunner.measure_elapsed_time(stats, _update_session, [session, job, constraints], 'update_model(s)'))
+        _sessions[key] = session
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        if job['check']:
+            mb = session.mb_
+            violations = TimeRunner.measure_elapsed_time(stats, Checker.find_violations, [mb.matrix_, mb.col_lower_, mb.col_upper_], 'check_constraints(s)')
+            stats['violations'] = violations
+            assert len(violations) == 0, f'{len(violations)} constraints incompatible with variable boundaries'
+        is_ok, values = TimeRunner.measure_elapsed_time(stats, session.solve, [], 'solving_time(s)')
+        solve = session.history_[-1]
+        stats.update({k: solve[k] for k in ['warm_start', 'iteration_count', 'objective']})
+        stats['model_status'] = solve['status']
+        assert is_ok, 'no valid solution found'
+        values = np.asarray(values)
+        stats['status'] = 'done'
+    except Exception as e:
+        stats['status'], stats['error'], values = 'failed', f'{type(e).__name__}: {e}', None
+    stats['job_time(s)'] = timer() - start
+    return stats, values
@@ -1,48 +1,161 @@
-import random
 import numpy as np
 import pandas as pd
 
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
 
 class SyntheticInventoryData:
+    CATEGORIES = ['A', 'B', 'C']
+    REGIONS = ['R1', 'R2', 'R3']
+
     @staticmethod
-    def generate(num_rows=1000, random_seed=17):
+    def generate(num_rows=1000, random_seed=17, num_stores=20):
         """
-        Generate a synthetic inventory data with the following columns: id, category, region, store, unit_price,
-        gross_margin. Here we assume that 10% of the items in the inventory have much higher demand than the rest.
-        Such items have also a lower gross margin than the low demand items.
+        Generate a synthetic inventory data with the following columns: id, category, region, store, quantity,
+        unit_price, gross_margin, gross_profit. Here we assume that 10% of the items in the inventory have much higher
+        demand than the rest. Such items have also a lower gross margin than the low demand items.
 
         :param num_rows: number of items in the inventory
         :param random_seed: random seed
+        :param num_stores: number of stores
         :return: pandas dataframe containing the list of items in the inventory
         """
-        np.random.seed(random_seed)
-        random.seed(random_seed)
-        ids = np.arange(1, num_rows + 1)
-        categories = np.random.choice(['A', 'B', 'C'], size=num_rows)
-        regions = np.random.choice(['R1', 'R2', 'R3'], size=num_rows)
-        stores = np.random.randint(1, 21, size=num_rows)  # Assuming there are 100 stores
-        unit_price = np.random.normal(4, 3, size=num_rows)
-        high_demand_quantity = np.random.normal(200, 150, size=num_rows // 10)  # 10% of items have high demand
-        low_demand_quantity = np.random.normal(20, 15, size=num_rows - (num_rows // 10))
-        quantity = np.concatenate([high_demand_quantity, low_demand_quantity])
-        high_demand_margin = np.random.uniform(0.03, 0.02, size=num_rows // 10)  # Lower gross margin for high demand items
-        low_demand_margin = np.random.uniform(0.2, 0.05, size=num_rows - (num_rows // 10))
-        gross_margin = np.concatenate([high_demand_margin, low_demand_margin])
+        return SyntheticInventoryData.generate_chunk(0, num_rows, [random_seed, 0], num_stores)
+
+    @staticmethod
+    def generate_chunk(start, stop, chunk_seed, num_stores=20):
+        """
+        Generate the items [start, stop) of a synthetic inventory, see generate. The chunk only depends on its bounds
+        and on its seed; category and region are pandas categoricals with fixed categories.
+
+        :param start: id of the first item minus one
+        :param stop: id of the last item
+        :param chunk_seed: random seed of the chunk
+        :param num_stores: number of stores
+        :return: pandas dataframe containing the items of the chunk
+        """
+        rng = np.random.default_rng(chunk_seed)
+        num_rows = stop - start
+        high_demand = np.zeros(num_rows, dtype=bool)
+        high_demand[:num_rows // 10] = True  # 10% of items have high demand
+        rng.shuffle(high_demand)
+        categories = rng.integers(0, len(SyntheticInventoryData.CATEGORIES), size=num_rows, dtype=np.int8)
+        regions = rng.integers(0, len(SyntheticInventoryData.REGIONS), size=num_rows, dtype=np.int8)
+        stores = rng.integers(1, num_stores + 1, size=num_rows)
+        quantity = np.where(high_demand, rng.normal(200, 150, size=num_rows), rng.normal(20, 15, size=num_rows))
+        unit_price = rng.normal(4, 3, size=num_rows)
+        # Lower gross margin for high demand items
+        gross_margin = np.where(high_demand, rng.uniform(0.02, 0.03, size=num_rows), rng.uniform(0.05, 0.2, size=num_rows))
         df = pd.DataFrame({
-            'category': categories,
-            'region': regions,
+            'id': np.arange(start + 1, stop + 1),
+            'category': pd.Categorical.from_codes(categories, SyntheticInventoryData.CATEGORIES),
+            'region': pd.Categorical.from_codes(regions, SyntheticInventoryData.REGIONS),
             'store': stores,
-            'quantity': quantity,
-            'unit_price': unit_price,
+            'quantity': np.maximum(np.ceil(quantity), 0),
+            'unit_price': np.maximum(unit_price, 0.5),
             'gross_margin': gross_margin
         })
-        cols = df.columns.tolist()
-        df['quantity'] = np.ceil(df['quantity'])
-        df['quantity'] = df['quantity'].apply(lambda x: 0 if x < 0 else x)
-        df['unit_price'] = df['unit_price'].apply(lambda x: 0.5 if x < 0.5 else x)
-        df['gross_margin'] = df['gross_margin'].apply(lambda x: 0 if x < 0 else x)
-        df = df.sample(frac=1).reset_index(drop=True)
-        df['id'] = df.reset_index().index + 1
-        df = df[['id'] + cols]
         df['gross_profit'] = df['gross_margin'] * df['unit_price']
-        return df
\ No newline at end of file
+        return df
+
+    @staticmethod
+    def generate_chunks(num_rows, chunk_size=1_000_000, random_seed=17, num_stores=20):
+        """
+        Generate a synthetic inventory chunk by chunk, see generate. The seed of the i-th chunk is (random_seed, i),
+        so every chunk can be generated independently from the others.
+
+        :param num_rows: number of items in the inventory
+        :param chunk_size: number of items per chunk
+        :param random_seed: random seed
+        :param num_stores: number of stores
+        :return: generator of pandas dataframes
+        """
+        for i, start in enumerate(range(0, num_rows, chunk_size)):
+            yield SyntheticInventoryData.generate_chunk(start, min(start + chunk_size, num_rows), [random_seed, i], num_stores)
+
+class SyntheticConstraints:
+    @staticmethod
+    def generate(df, num_constraints=100, features=('category', 'region', 'store'), var_name='quantity', margin=0.1,
+                 random_seed=17, num_features=None):
+        """
+        Generate a list of feasible constraints for a synthetic inventory. Each constraint filters a random subset of
+        features on one of their observed values; its bounds enclose the reference volume of the scope by +/- margin.
+        The more features a constraint filters on, the more selective its scope.
+
+        :param df: pandas dataframe containing the list of items in the inventory
+        :param num_constraints: number of constraints
+        :param features: feature columns constraints can filter on
+        :param var_name: name of the column used as reference volume
+        :param margin: relative distance of the bounds from the reference volume
+        :param random_seed: random seed
+        :param num_features: number of features filtered by each constraint, random between 1 and len(features) if
+            not provided
+        :return: list of constraints
+        """
+        rng = np.random.default_rng(random_seed)
+        index = ScopeIndex(df)
+        values = {f: df[f].unique().tolist() for f in features}
+        reference = df[var_name].to_numpy()
+        constraints = []
+        for _ in range(num_constraints):
+            names = rng.choice(features, size=num_features or rng.integers(1, len(features) + 1), replace=False)
+            constraint = Constraint(lb=0, ub=0, features=[
+                {'name': str(n), 'values': [values[n][rng.integers(len(values[n]))]]} for n in names
+            ])
+            volume = float(reference[index.get_scope(constraint)].sum())
+            constraint['lb'], constraint['ub'] = (1 - margin) * volume, (1 + margin) * volume
+            constraints.append(constraint)
+        return constraints
+
+    @staticmethod
+    def scope_volumes(chunks, features=('category', 'region', 'store'), var_name='quantity'):
+        """
+        Compute the total reference volume of every observed combination of feature values, chunk by chunk.
+        The result is all generate_nested needs, so constraints can be generated while the data is streamed to disk.
+
+        :param chunks: iterable of pandas dataframes
+        :param features: feature columns constraints can filter on
+        :param var_name: name of the column used as reference volume
+        :return: pandas dataframe with the feature columns and the total of var_name per combination
+        """
+        features = list(features)
+        partials = [chunk.groupby(features, observed=True)[var_name].sum() for chunk in chunks]
+        return pd.concat(partials).groupby(level=features, observed=True).sum().reset_index()
+
+    @staticmethod
+    def generate_nested(volumes, num_constraints=100, depth=None, margin=0.1, var_name='quantity', random_seed=17):
+        """
+        Generate a list of feasible, nested constraints from the reference volumes of the feature combinations.
+        Constraints of level k filter on the first k features of volumes; each of them is nested into a constraint of
+        level k - 1, so that the constraints form a hierarchy with the given depth. The number of constraints is
+        spread evenly across levels, a level taking over what the previous ones could not allocate. The bounds
+        enclose the reference volume of the scope by +/- margin.
+
+        :param volumes: reference volumes as returned by scope_volumes, features in nesting order
+        :param num_constraints: number of constraints, fewer are generated if there are not enough combinations
+        :param depth: number of levels, the number of features if not provided
+        :param margin: relative distance of the bounds from the reference volume
+        :param var_name: name of the column holding the reference volume
+        :param random_seed: random seed
+        :return: list of constraints
+        """
+        rng = np.random.default_rng(random_seed)
+        features = [c for c in volumes.columns if c != var_name]
+        depth = depth if depth is not None else len(features)
+        assert 1 <= depth <= len(features), f'depth must be between 1 and {len(features)}'
+        constraints, parents = [], None
+        for k in range(1, depth + 1):
+            level = volumes.groupby(features[:k], observed=True)[var_name].sum().reset_index()
+            if parents is not None:
+                level = level.merge(parents, on=features[:k - 1])
+            budget = (num_constraints - len(constraints)) // (depth - k + 1)
+            level = level.iloc[np.sort(rng.choice(len(level), size=min(budget, len(level)), replace=False))]
+            for record in level.to_dict('records'):
+                constraints.append(Constraint(
+                    lb=(1 - margin) * record[var_name],
+                    ub=(1 + margin) * record[var_name],
+                    features=[{'name': f, 'values': [record[f]]} for f in features[:k]]
+                ))
+            parents = level[features[:k]]
+        return constraints
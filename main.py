@@ -1,42 +1,313 @@
 import logging
-import pandas as pd
+import os
 import warnings
 
 from datetime import datetime
 from inventory_optim.data_model.parser import CustomParser
-from inventory_optim.data_model.constraints import read_constraints_file
-from inventory_optim.data_model.checker import Checker
-from inventory_optim.optim_model.builder import ModelBuilder
-from inventory_optim.export.exporter import Exporter
+from inventory_optim.data_model.constraints import feature_names
 from inventory_optim.monitoring.logger import create_logger
+from inventory_optim.monitoring.memory import peak_rss_mb
 from inventory_optim.monitoring.time_runner import global_timer, TimeRunner
+from inventory_optim.monitoring.tracing import tracer, trace_path
+from inventory_optim.optim_model.constants import SOLVER_STRATEGIES
 
+# heavy modules (numpy, pandas, highspy) are imported by main when the phase needing them runs, so that --help and
+# invalid arguments fail fast
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 
+def validate_args(args: dict) -> None:
+    """
+    Check the input args that can be checked before reading any data.
+
+    :param args: dict of input args
+    :return: None
+    """
+    assert os.path.exists(args['data']), f"data {args['data']} not found"
+    assert os.path.exists(args['constraints']), f"constraint file {args['constraints']} not found"
+    assert 0 <= args['var_decr'] <= args['var_incr'], 'var-decr must be between 0 and var-incr'
+    assert args['time_limit'] > 0, 'time-limit must be positive'
+    assert args['cache_size_mb'] > 0, 'cache-size-mb must be positive'
+    assert not (args['export_sensitivity'] and (args['decompose'] or args['aggregate'] or args['portfolio'] is not None)), \
+        'export-sensitivity requires the model solved as a whole, without decompose, aggregate or portfolio'
+    assert not (monitored(args) and (args['decompose'] or args['aggregate'] or args['portfolio'] is not None)), \
+        'progress-file, target-gap and target-objective monitor the model solved as a whole, without decompose, aggregate or portfolio'
+    assert not (args['export_sensitivity'] and (args['target_gap'] is not None or args['target_objective'] is not None)), \
+        'export-sensitivity requires the solve to reach optimality, not available with target-gap or target-objective'
+    assert args['progress_interval'] > 0, 'progress-interval must be positive'
+    assert args['target_gap'] is None or args['target_gap'] >= 0, 'target-gap must be non negative'
+    assert not (args['export_sensitivity'] and args['integral']), 'export-sensitivity describes the LP solution, not available with integral'
+    assert not (args['export_sensitivity'] and args['preprocess']), 'export-sensitivity describes every item of the full model, not available with preprocess'
+    assert not (args['pipeline'] and (args['check_only'] or args['preprocess'])), 'pipeline creates the variables of the full model, not available with check-only or preprocess'
+    assert args['chunk_size'] > 0, 'chunk-size must be positive'
+    for strategy in args['portfolio'] or []:
+        assert strategy.partition(':')[0] in SOLVER_STRATEGIES, f'unknown solver strategy {strategy}, expected one of {sorted(SOLVER_STRATEGIES)}'
+
+
+def monitored(args: dict) -> bool:
+    """
+    Whether the solve is run in chunks to stream its progress and to stop on a target.
+
+    :param args: dict of input args
+    :return: True if the solve is monitored
+    """
+    return args['progress_file'] is not None or args['target_gap'] is not None or args['target_objective'] is not None
+
+
+def required_columns(args: dict, problem: dict) -> set:
+    """
+    Columns of the data the run requires: features and reference columns of the constraints and templates, variable
+    and objective column.
+
+    :param args: dict of input args
+    :param problem: constraints and templates
+    :return: set of column names
+    """
+    references = [template['reference'] for template in problem['templates'] if 'reference' in template]
+    return set(feature_names(problem['constraints'], problem['templates']) + references + [args['var_col'], args['optim_col']])
+
+
+# arguments the compiled model depends on, besides data and constraint file
+CACHE_KEY_ARGS = ['var_col', 'optim_col', 'var_incr', 'var_decr', 'id_col', 'read_columns']
+
+
+def log_violations(violations: list, constraints: list, logger: logging.Logger) -> None:
+    """
+    Log every violation with the constraint it refers to, or with its row if the constraint is not known (e.g. a
+    template row of a model read from the cache).
+
+    :param violations: violations found by the checker
+    :param constraints: constraints in row order
+    :param logger: logger
+    :return: None
+    """
+    for violation in violations:
+        row = violation['constraint']
+        constraint = constraints[row] if row < len(constraints) else f'row {row}'
+        logger.error(f"variable boundaries incompatible with constraint {constraint}: {violation}")
+
+
+def log_conflicts(conflicts: list, constraints: list, logger: logging.Logger) -> None:
+    """
+    Log every conflict with the constraints it involves, or with their rows if the constraints are not known.
+
+    :param conflicts: conflicts found by the screening
+    :param constraints: constraints in row order
+    :param logger: logger
+    :return: None
+    """
+    for conflict in conflicts:
+        involved = [constraints[row] if row < len(constraints) else f'row {row}' for row in conflict['constraints']]
+        logger.error(f"conflicting constraints (found by {conflict['method']}, violation {conflict['violation']}): {involved}")
+
+
+def check_only(args: dict, stats: dict, data, problem: dict, index, logger: logging.Logger) -> None:
+    """
+    Check the constraints against the variable boundaries without building the model (--check-only).
+
+    :param args: dict of input args
+    :param stats: statistics of the run
+    :param data: item table
+    :param problem: constraints and templates
+    :param index: scope index of the data
+    :param logger: logger
+    :return: None
+    """
+    from inventory_optim.data_model.checker import Checker
+    from inventory_optim.export.exporter import Exporter
+    report = TimeRunner.run_and_log(stats, Checker.preflight, [
+        data, problem['constraints'], args['var_col'], args['var_incr'], args['var_decr'], index, problem['templates'],
+        args['screen'], stats
+    ], 'preflight(s)', 'checking constraints and variable boundaries without solver', logger)
+    violations, conflicts = report['violations'], report['conflicts']
+    stats['violations'] = violations
+    log_violations(violations, report['constraints'], logger)
+    if 'screen_constraints(s)' in stats:
+        stats['conflicts'] = conflicts
+        log_conflicts(conflicts, report['constraints'], logger)
+    stats['global_time(s)'] = global_timer.get_current_time()
+    stats['peak_rss(MB)'] = peak_rss_mb()
+    if args['export_statistics']:
+        Exporter.export_statistics(stats, args['export_statistics'])
+    assert len(violations) == 0, f'{len(violations)} constraints incompatible with variable boundaries'
+    assert len(conflicts) == 0, f'{len(conflicts)} conflicts between constraints'
+    logger.info(f"{len(problem['constraints'])} constraints and {len(problem['templates'])} templates compatible with variable boundaries")
+
+
 def main():
     global_timer.start()
     args = CustomParser.parse_args()
+    validate_args(args)
+    if args['trace'] or args['trace_memory']:
+        tracer.start(args['trace_memory'])
     stats = {
         'date': datetime.now().strftime("%Y%m%dT%H:%M"),
         'args': args
     }
-    # Instantiate optimization model
-    mb = ModelBuilder(args['time_limit'])
     logger = create_logger(logging.INFO)
     # Define the optimization model and run
-    data = TimeRunner.run_and_log(stats, lambda: pd.read_csv(args['data']), [], 'reading_data(s)', 'reading data', logger)
-    json_problem = TimeRunner.run_and_log(stats, read_constraints_file, [args['constraints']], 'read_constraint_file(s)', 'reading constraint file', logger)
-    TimeRunner.run_and_log(stats, mb.create_variables, [data, args['var_incr'], args['var_decr'], args['var_col']], 'create_variables(s)', 'creating opt variables', logger)
-    TimeRunner.run_and_log(stats, mb.build_model, [data, json_problem['constraints'], args['optim_col'], args['optim_obj']], 'build_model(s)', 'building opt model', logger)
+    # the wrapper solvers build their own models from the compiled constraints
+    load = not (args['decompose'] or args['aggregate'] or args['portfolio'] is not None)
+    cache, cached = None, None
+    if args['cache_dir'] and not args['check_only']:
+        from inventory_optim.optim_model.cache import ModelCache
+        cache = ModelCache(args['cache_dir'], args['cache_size_mb'])
+        key = TimeRunner.run_and_log(stats, cache.key, [args['data'], args['constraints'], {k: args[k] for k in CACHE_KEY_ARGS}], 'cache_key(s)', 'hashing inputs', logger)
+        cached = TimeRunner.run_and_log(stats, cache.load, [key], 'cache_lookup(s)', 'looking up compiled model', logger)
+        stats['model_cache'] = {'key': key, 'hit': cached is not None}
+    # the pipelined run parses the constraint file while reading the data
+    if cached is not None or not args['pipeline']:
+        from inventory_optim.data_model.constraint_table import read_problem
+        json_problem = TimeRunner.run_and_log(stats, read_problem, [args['constraints']], 'read_constraint_file(s)', 'reading constraint file', logger)
+        features = feature_names(json_problem['constraints'], json_problem['templates'])
+    from inventory_optim.data_model.checker import Checker
+    from inventory_optim.export.exporter import Exporter
+    if cached is not None:
+        # cache hit: the compiled model and the loaded columns are memory-mapped, data and scopes are not evaluated
+        from inventory_optim.optim_model.builder import ModelBuilder
+        mb = ModelBuilder(args['time_limit'])
+        data = TimeRunner.run_and_log(stats, cached.read_items, [], 'reading_data(s)', 'reading data from the model cache', logger)
+        model = [cached.col_lower_, cached.col_upper_, cached.matrix_, cached.col_cost_]
+        if not args['preprocess']:
+            TimeRunner.run_and_log(stats, mb.load_model, model + [args['optim_obj'], load], 'load_model(s)', 'loading cached opt model', logger)
+    elif args['pipeline']:
+        from inventory_optim.data_model.pipeline import IngestionPipeline
+        from inventory_optim.optim_model.builder import ModelBuilder
+        mb = ModelBuilder(args['time_limit'])
+        pipeline = IngestionPipeline(mb, args['var_col'], args['var_incr'], args['var_decr'], args['optim_col'], args['optim_obj'], args['chunk_size'])
+        required = None
+        if args['read_columns'] == 'required':
+            required = lambda problem: required_columns(args, problem) | {args['id_col']}
+        data, json_problem, index = TimeRunner.run_stages_and_log(stats, pipeline.run, [args['data'], args['constraints'], required], 'ingestion(s)', 'reading data and constraint file in overlapped chunks', logger)
+        stats['reading_data_peak_rss(MB)'] = peak_rss_mb()
+        stats['ingestion_stages']['num_chunks'] = pipeline.num_chunks_
+        missing = required_columns(args, json_problem).difference(data.columns)
+        assert len(missing) == 0, f'columns {sorted(missing)} not found in data'
+        errors = TimeRunner.run_and_log(stats, Checker.check_schema, [data, json_problem['constraints'], json_problem['templates']], 'check_schema(s)', 'checking constraints against the data schema', logger)
+        for error in errors:
+            logger.error(error)
+        assert len(errors) == 0, f'{len(errors)} constraint features not matching the data'
+        TimeRunner.run_and_log(stats, mb.add_constraints, [index, json_problem['constraints'], load, json_problem['templates']], 'build_model(s)', 'building opt model', logger)
+        if cache is not None:
+            features = feature_names(json_problem['constraints'], json_problem['templates'])
+            evicted = TimeRunner.run_and_log(stats, cache.store, [key, mb.matrix_, mb.col_lower_, mb.col_upper_, mb.col_cost_, data, features], 'cache_store(s)', 'storing compiled model', logger)
+            stats['model_cache']['evicted'] = evicted
+    else:
+        from inventory_optim.data_model.reader import read_items, available_columns
+        columns = None
+        if args['read_columns'] == 'required':
+            required = required_columns(args, json_problem)
+            columns = [c for c in available_columns(args['data']) if c in required or c == args['id_col']]
+            assert required.issubset(columns), f'columns {sorted(required.difference(columns))} not found in data'
+        data = TimeRunner.run_and_log(stats, read_items, [args['data'], columns, features], 'reading_data(s)', 'reading data', logger)
+        stats['reading_data_peak_rss(MB)'] = peak_rss_mb()
+        for column in [args['var_col'], args['optim_col']]:
+            assert data.dtype(column).kind in 'iuf', f'column {column} is not numeric'
+        errors = TimeRunner.run_and_log(stats, Checker.check_schema, [data, json_problem['constraints'], json_problem['templates']], 'check_schema(s)', 'checking constraints against the data schema', logger)
+        for error in errors:
+            logger.error(error)
+        assert len(errors) == 0, f'{len(errors)} constraint features not matching the data'
+        if args['preprocess']:
+            from inventory_optim.data_model.preprocessor import Preprocessor
+            data = TimeRunner.run_and_log(stats, Preprocessor.coerce, [data, features, [args['var_col'], args['optim_col']]], 'coerce_dtypes(s)', 'coercing data types', logger)
+        from inventory_optim.optim_model.scope_index import ScopeIndex
+        index = ScopeIndex(data)
+        if args['check_only']:
+            check_only(args, stats, data, json_problem, index, logger)
+            return
+        from inventory_optim.optim_model.builder import ModelBuilder
+        # Instantiate optimization model
+        mb = ModelBuilder(args['time_limit'])
+        if args['preprocess']:
+            # the model is compiled without passing it to Highs, the reduced model is passed instead
+            from inventory_optim.optim_model.templates import compile_constraints
+            col_lower, col_upper = Checker.variable_bounds(data, args['var_col'], args['var_incr'], args['var_decr'])
+            mb.constraints_, matrix = TimeRunner.run_and_log(stats, compile_constraints, [index, json_problem['constraints'], json_problem['templates']], 'build_model(s)', 'compiling opt model', logger)
+            model = [col_lower, col_upper, matrix, ModelBuilder.objective_coefficients(data, args['optim_col'])]
+        else:
+            TimeRunner.run_and_log(stats, mb.create_variables, [data, args['var_incr'], args['var_decr'], args['var_col']], 'create_variables(s)', 'creating opt variables', logger)
+            TimeRunner.run_and_log(stats, mb.build_model, [data, json_problem['constraints'], args['optim_col'], args['optim_obj'], index, True, load, json_problem['templates']], 'build_model(s)', 'building opt model', logger)
+            model = [mb.col_lower_, mb.col_upper_, mb.matrix_, mb.col_cost_]
+        if cache is not None:
+            evicted = TimeRunner.run_and_log(stats, cache.store, [key, model[2], model[0], model[1], model[3], data, features], 'cache_store(s)', 'storing compiled model', logger)
+            stats['model_cache']['evicted'] = evicted
+    if cache is not None:
+        stats['model_cache']['size(MB)'] = cache.size_mb()
+    labels = mb.constraints_ or json_problem['constraints']
+    preprocessor = None
+    if args['preprocess']:
+        from inventory_optim.data_model.preprocessor import Preprocessor
+        preprocessor = Preprocessor(integral=args['integral'])
+        reduced = TimeRunner.run_and_log(stats, preprocessor.reduce, model + [args['optim_obj']], 'preprocessing(s)', 'preprocessing opt model', logger)
+        stats['preprocessing'] = preprocessor.statistics_
+        reduction = preprocessor.statistics_
+        logger.info(f"{reduction['num_reduced_column']} of {reduction['num_column']} columns and {reduction['num_reduced_row']} of {reduction['num_row']} rows left "
+                    f"({reduction['num_fixed']} fixed, {reduction['num_unconstrained']} unconstrained, {reduction['num_duplicates']} duplicated columns)")
+        TimeRunner.run_and_log(stats, mb.load_model, list(reduced) + [args['optim_obj'], load], 'load_model(s)', 'loading reduced opt model', logger)
+        labels = [labels[row] if row < len(labels) else f'row {row}' for row in preprocessor.rows_]
     if args['check']:
-        TimeRunner.run_and_log(stats, Checker.check_constraints, [data, json_problem['constraints'], args['var_col']], 'check_constraints(s)', 'checking constraints and variable boundaries', logger)
-    is_ok, values = TimeRunner.run_and_log(stats, mb.solve, [], 'solving_time(s)', 'solving the opt problem', logger)
-    stats['global_time(s)'] = global_timer.get_current_time()
+        violations = TimeRunner.run_and_log(stats, Checker.find_violations, [mb.matrix_, mb.col_lower_, mb.col_upper_], 'check_constraints(s)', 'checking constraints and variable boundaries', logger)
+        stats['violations'] = violations
+        log_violations(violations, labels, logger)
+        if violations and args['export_statistics']:
+            Exporter.export_statistics(stats, args['export_statistics'])
+        assert len(violations) == 0, f'{len(violations)} constraints incompatible with variable boundaries'
+    if args['screen']:
+        conflicts = TimeRunner.run_and_log(stats, Checker.find_conflicts, [mb.matrix_, mb.col_lower_, mb.col_upper_], 'screen_constraints(s)', 'screening constraints for conflicts', logger)
+        stats['conflicts'] = conflicts
+        log_conflicts(conflicts, labels, logger)
+        if conflicts and args['export_statistics']:
+            Exporter.export_statistics(stats, args['export_statistics'])
+        assert len(conflicts) == 0, f'{len(conflicts)} conflicts between constraints'
+    if args['aggregate']:
+        from inventory_optim.optim_model.aggregation import AggregatedSolver
+        solver, solve_args = AggregatedSolver(mb, args['aggregate_cost_decimals']), []
+    elif args['decompose']:
+        from inventory_optim.optim_model.decomposition import BlockSolver
+        solver, solve_args = BlockSolver(mb), [args['workers']]
+    elif args['portfolio'] is not None:
+        from inventory_optim.optim_model.portfolio import PortfolioSolver
+        solver, solve_args = PortfolioSolver(mb, args['portfolio']), []
+        if len(solver.strategies_) > os.cpu_count():
+            logger.warning(f'{len(solver.strategies_)} solver strategies racing on {os.cpu_count()} cpus')
+    elif monitored(args):
+        from inventory_optim.monitoring.progress import ProgressStream
+        from inventory_optim.optim_model.monitored import MonitoredSolver
+        stream = ProgressStream(args['progress_file'], logger)
+        monitor = MonitoredSolver(mb, stream, args['progress_interval'], args['target_gap'], args['target_objective'])
+        solver, solve_args = monitor, []
+    else:
+        solver, solve_args = mb, []
+    if args['integral']:
+        from inventory_optim.optim_model.rounding import IntegralSolver
+        solver = IntegralSolver(mb, solver)
+    is_ok, values = TimeRunner.run_and_log(stats, solver.solve, solve_args, 'solving_time(s)', 'solving the opt problem', logger)
+    if monitored(args):
+        stream.close()
+        logger.info(f"solve ended with status {monitor.statistics_['status']}")
     assert is_ok
-    Exporter.export_solution(args['export_solution'], data, values)
+    if args['integral']:
+        if preprocessor is not None:
+            solver.add_fixed_objective(preprocessor.statistics_['fixed_objective'], preprocessor.statistics_['fixed_lp_objective'])
+        integral = solver.statistics_
+        logger.info(f"integral solution: gap {integral['gap']:.4%} to the LP bound, {integral['num_repaired']} items repaired in {integral['repair(s)']:.3f}s")
+        if integral['num_violated'] > 0:
+            logger.warning(f"{integral['num_violated']} constraints violated by the integral solution")
+    reference_col = args['var_col'] if args['export_only_changed'] else None
+    TimeRunner.run_and_log(stats, Exporter.export_solution, [args['export_solution'], data, values, 'opt', args['export_columns'], reference_col, preprocessor], 'export_solution(s)', 'exporting solution', logger)
+    if args['export_sensitivity']:
+        from inventory_optim.optim_model.sensitivity import SensitivityReport
+        report = TimeRunner.run_and_log(stats, SensitivityReport.from_model, [mb, mb.constraints_ or json_problem['constraints'], data, args['id_col']], 'sensitivity(s)', 'extracting duals and ranging', logger)
+        TimeRunner.run_and_log(stats, Exporter.export_sensitivity, [args['export_sensitivity'], report], 'export_sensitivity(s)', 'exporting sensitivity report', logger)
+        stats['sensitivity'] = report.summary_
+    stats['global_time(s)'] = global_timer.get_current_time()
+    stats['peak_rss(MB)'] = peak_rss_mb()
     if args['export_statistics']:
-        mb.populate_statistics(stats)
+        solver.populate_statistics(stats)
+        if tracer.enabled_:
+            tracer.stop()
+            stats['trace'] = tracer.summary()
+            tracer.export_chrome_trace(trace_path(args['export_statistics']))
         Exporter.export_statistics(stats, args['export_statistics'])
 
 
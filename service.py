@@ -0,0 +1,23 @@
+import asyncio
+import logging
+import warnings
+
+from inventory_optim.data_model.parser import ServiceParser
+from inventory_optim.monitoring.logger import create_logger
+from inventory_optim.service.server import OptimService
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+def main():
+    args = ServiceParser.parse_args()
+    create_logger(logging.INFO)
+    service = OptimService(args['workers'], args['max_pending_jobs'], args['time_limit'])
+    for registration in args['register']:
+        name, path = registration.split('=', 1)
+        service.register_dataset(name, path)
+    asyncio.run(service.serve(args['socket']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import pytest
+import pandas as pd
+
+from inventory_optim.batch.runner import BatchRunner, read_scenarios_file, summarize
+from inventory_optim.data_model.shared_data import SharedDataset
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10., 20., 30.],
+        'CATEGORY': ["A", "B", "A"],
+        'CONTRIB': [11., 10., 10.]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def scenarios_json(tmp_path):
+    constraints = {'constraints': [{'lb': 0, 'ub': 10, 'features': [{'name': 'CATEGORY', 'values': ['A']}]}]}
+    infeasible = {'constraints': [{'lb': 1000, 'ub': 1000, 'features': []}]}
+    (tmp_path / 'constraints.json').write_text(json.dumps(constraints))
+    (tmp_path / 'infeasible.json').write_text(json.dumps(infeasible))
+    grid = {
+        'constraints': [str(tmp_path / 'constraints.json'), str(tmp_path / 'infeasible.json')],
+        'var_decr': 0,
+        'var_incr': [1, 2],
+        'optim_col': 'CONTRIB'
+    }
+    (tmp_path / 'scenarios.json').write_text(json.dumps(grid))
+    return str(tmp_path / 'scenarios.json')
+
+
+def test_read_scenarios_file(scenarios_json):
+    scenarios = read_scenarios_file(scenarios_json)
+    assert len(scenarios) == 4
+    assert scenarios[0]['id'] == 'scenario_00000'
+    assert scenarios[0]['var_decr'] == 0
+    assert scenarios[0]['optim_obj'] == 'max'
+    assert [s['var_incr'] for s in scenarios] == [1, 2, 1, 2]
+
+
+def test_summarize():
+    results = [
+        {'status': 'done', 'build_model(s)': 1., 'scenario_time(s)': 2.},
+        {'status': 'failed', 'scenario_time(s)': 1.}
+    ]
+    report = summarize(results, 30.)
+    assert report['num_scenarios'] == 2
+    assert report['num_failed'] == 1
+    assert report['scenarios_per_minute'] == 4.
+    assert report['phases']['build_model(s)']['total'] == 1.
+    assert report['phases']['scenario_time(s)']['max'] == 2.
+
+
+def test_batch_runner(sample_dataframe, scenarios_json, tmp_path):
+    dataset = SharedDataset.publish(sample_dataframe)
+    try:
+        runner = BatchRunner(dataset, 'QUANTITY', str(tmp_path / 'out'), num_workers=2)
+        report = runner.run(read_scenarios_file(scenarios_json), logging.getLogger())
+    finally:
+        dataset.close()
+    assert report['num_scenarios'] == 4
+    assert report['num_failed'] == 2
+    assert os.path.isfile(tmp_path / 'out' / 'batch_statistics.json')
+    solution = pd.read_csv(tmp_path / 'out' / 'scenario_00001' / 'solution.csv')
+    assert solution['opt'].tolist() == [10., 40., 0.]
+    with open(tmp_path / 'out' / 'scenario_00002' / 'statistics.json') as f:
+        assert json.load(f)['status'] == 'failed'
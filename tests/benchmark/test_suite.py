@@ -0,0 +1,50 @@
+import pytest
+
+from inventory_optim.benchmark.suite import PHASES, compare, run_instance
+
+
+@pytest.mark.parametrize('data_format', ['csv', 'npy'])
+def test_run_instance(data_format):
+    stats = run_instance(1000, 10, num_features=3, data_format=data_format)
+    assert all(stats[phase] >= 0 for phase in PHASES if phase in stats)  # preprocessing phases only with --preprocess
+    assert stats['total(s)'] == pytest.approx(sum(stats.get(phase, 0) for phase in PHASES))
+    assert stats['total(s)'] <= stats['global_time(s)']
+    assert stats['peak_rss(MB)'] > 0
+    assert stats['num_violations'] == 0
+    assert stats['status'] == 'Optimal'
+    assert 0 < stats['selectivity'] < 1 / 9  # about 1 / (3 * 3 * 20) of the rows per constraint
+    assert stats['check_schema(s)'] >= 0 and stats['screen_constraints(s)'] >= 0  # stages of the real run
+
+
+def test_run_instance_main_args():
+    stats = run_instance(1000, 10, num_features=3, main_args=['--preprocess', '--read-columns', 'required'])
+    assert stats['status'] == 'Optimal' and stats['preprocessing(s)'] >= 0 and stats['coerce_dtypes(s)'] >= 0
+    assert stats['main_args'] == ['--preprocess', '--read-columns', 'required']
+    failed = run_instance(1000, 10, num_features=3, main_args=['--pipeline', '--preprocess'])
+    assert failed['status'] == 'failed' and 'AssertionError' in failed['error']
+
+
+def make_report(build_time, peak_rss):
+    instance = {'num_rows': 1000, 'num_constraints': 10, 'num_features': None, 'data_format': 'csv',
+                'build_model(s)': build_time, 'solving_time(s)': 1., 'peak_rss(MB)': peak_rss}
+    return {'environment': {}, 'instances': [instance]}
+
+
+def test_compare():
+    baseline = make_report(1., 100.)
+    assert compare(baseline, make_report(1.1, 110.)) == []
+    assert compare(baseline, make_report(1.3, 100.), threshold=.2)[0]['metric'] == 'build_model(s)'
+    assert [r['metric'] for r in compare(baseline, make_report(1., 150.))] == ['peak_rss(MB)']
+    assert compare(make_report(.01, 100.), make_report(.03, 100.), min_time=.05) == []  # noise
+    other = make_report(10., 100.)
+    other['instances'][0]['num_rows'] = 2000
+    assert compare(baseline, other) == []
+    other = make_report(10., 100.)
+    other['instances'][0]['main_args'] = ['--preprocess']
+    assert compare(baseline, other) == []  # runs with other arguments are not compared
+
+
+def test_compare_cold_start():
+    baseline, current = make_report(1., 100.), make_report(1., 100.)
+    baseline['cold_start'], current['cold_start'] = {'main_help(s)': .1}, {'main_help(s)': .5}
+    assert [r['metric'] for r in compare(baseline, current)] == ['cold_start/main_help(s)']
@@ -0,0 +1,128 @@
+import json
+import subprocess
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+from inventory_optim.data_model.checker import Checker
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate, write_constraints_file
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30],
+        'CATEGORY': ["A", "B", "A"],
+        'increase': [1.5, 1.5, 1.5],
+        'decrease': [.5, .5, .5]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),  # min reachable volume is 20
+        Constraint(lb=20, ub=30, features=[{'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=100, ub=120, features=[])  # max reachable volume is 90
+    ]
+
+
+def test_find_violations(sample_dataframe, constraints):
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints)
+    quantity = sample_dataframe['QUANTITY'].to_numpy(dtype=np.float64)
+    violations = Checker.find_violations(matrix, .5 * quantity, 1.5 * quantity)
+    assert [v['constraint'] for v in violations] == [0, 2]
+    assert violations[0]['min_value'] == 20
+    assert violations[0]['slack'] == -10
+    assert violations[1]['max_value'] == 90
+    assert violations[1]['slack'] == -10
+    assert Checker.find_violations(matrix, 0 * quantity, 2 * quantity) == []
+
+
+def test_find_conflicts(sample_dataframe):
+    conflicting = [
+        Constraint(lb=0, ub=45, features=[]),
+        Constraint(lb=25, ub=30, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=25, ub=30, features=[{'name': 'CATEGORY', 'values': ['B']}])
+    ]
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), conflicting)
+    quantity = sample_dataframe['QUANTITY'].to_numpy(dtype=np.float64)
+    assert Checker.find_violations(matrix, .5 * quantity, 1.5 * quantity) == []
+    conflicts = Checker.find_conflicts(matrix, .5 * quantity, 1.5 * quantity)
+    assert [c['constraints'] for c in conflicts] == [[0, 1, 2]]
+    assert conflicts[0]['violation'] == pytest.approx(5)
+    assert Checker.find_conflicts(matrix.take_rows(np.array([1, 2])), .5 * quantity, 1.5 * quantity) == []
+
+
+def test_check_constraints(sample_dataframe, constraints):
+    Checker.check_constraints(sample_dataframe, constraints[1:2], 'QUANTITY')
+    with pytest.raises(AssertionError) as e:
+        Checker.check_constraints(sample_dataframe, constraints, 'QUANTITY')
+    assert len(str(e.value).splitlines()) == 2
+
+
+def test_check_schema(sample_dataframe, constraints):
+    assert Checker.check_schema(sample_dataframe, constraints) == []
+    invalid = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A', 1]}]),
+        Constraint(lb=0, ub=10, features=[{'name': 'QUANTITY', 'values': ['10', True]}, {'name': 'STORE', 'values': [1]}])
+    ]
+    assert Checker.check_schema(sample_dataframe, invalid) == [
+        'feature CATEGORY: values [1] not of type str',
+        "feature QUANTITY: values ['10', True] not of type int/float",
+        'feature STORE not found in data'
+    ]
+    templates = [ConstraintTemplate(group_by=['CATEGORY'], reference='CATEGORY', lb_ratio=0, ub_ratio=1)]
+    assert Checker.check_schema(sample_dataframe, [], templates) == ['reference column CATEGORY is not numeric']
+
+
+def test_preflight(sample_dataframe, constraints):
+    df = sample_dataframe.drop(columns=['increase', 'decrease'])
+    stats = {}
+    report = Checker.preflight(df, constraints, 'QUANTITY', 1.5, .5, screen=True, stats=stats)
+    assert [v['constraint'] for v in report['violations']] == [0, 2]
+    assert report['conflicts'] == [] and 'screen_constraints(s)' not in stats  # not screened with violations
+    assert Checker.preflight(df, constraints, 'QUANTITY', 2, 0)['violations'] == []
+    assert df.columns.tolist() == ['QUANTITY', 'CATEGORY']  # no variables are created
+    templates = [ConstraintTemplate(group_by=['CATEGORY'], bounds={'keys': [['A'], ['B']], 'lb': [0, 0], 'ub': [10, 100]})]
+    report = Checker.preflight(df, constraints[1:2], 'QUANTITY', 1.5, .5, templates=templates)
+    assert [v['constraint'] for v in report['violations']] == [1]  # template rows follow the explicit constraints
+    assert len(report['constraints']) == 3
+
+
+def test_preflight_conflicts(sample_dataframe):
+    conflicting = [Constraint(lb=0, ub=50, features=[]), Constraint(lb=45, ub=60, features=[{'name': 'CATEGORY', 'values': ['A']}])]
+    stats = {}
+    report = Checker.preflight(sample_dataframe, conflicting, 'QUANTITY', 1.5, .5, screen=True, stats=stats)
+    assert report['violations'] == [] and [c['constraints'] for c in report['conflicts']] == [[0, 1]]
+    assert {'compile_constraints(s)', 'check_constraints(s)', 'screen_constraints(s)'} <= set(stats)
+
+
+@pytest.mark.parametrize('constraints, args', [
+    ([Constraint(lb=0, ub=100, features=[{'name': 'CATEGORY', 'values': ['A']}])], ['--no-screen']),
+    ([Constraint(lb=0, ub=100, features=[{'name': 'CATEGORY', 'values': ['A']}])], ['--no-screen', '--preprocess']),
+    ([Constraint(lb=0, ub=50, features=[]), Constraint(lb=45, ub=60, features=[{'name': 'CATEGORY', 'values': ['A']}])], [])
+])
+def test_check_only_is_lightweight(sample_dataframe, constraints, args, tmp_path):
+    # the pre-flight runs without a solver, unless screening needs the elastic LP
+    sample_dataframe.to_csv(tmp_path / 'data.csv', index=False)
+    write_constraints_file(constraints, str(tmp_path / 'constraints.json'))
+    main_py = Path(__file__).resolve().parents[2] / 'main.py'
+    argv = [str(main_py), '--constraints', str(tmp_path / 'constraints.json'), '--data', str(tmp_path / 'data.csv'),
+            '--var-col', 'QUANTITY', '--optim-col', 'QUANTITY', '--check-only', '--export-statistics', str(tmp_path / 'stats.json')] + args
+    code = ('import runpy, sys\n'
+            f'sys.argv = {argv!r}\n'
+            'try:\n'
+            '    runpy.run_path(sys.argv[0], run_name="__main__")\n'
+            'except AssertionError:\n'
+            '    pass\n'
+            'print("highspy" in sys.modules)')
+    res = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=main_py.parent)
+    assert res.stdout.strip().splitlines()[-1] == 'False'  # the log is on stdout as well
+    stats = json.loads((tmp_path / 'stats.json').read_text())
+    assert stats['violations'] == [] and ('conflicts' in stats) == ('--no-screen' not in args)
@@ -0,0 +1,56 @@
+import json
+import pytest
+import numpy as np
+
+from inventory_optim.data_model.constraint_table import ConstraintTable, read_problem, convert
+from inventory_optim.data_model.constraints import Constraint, read_constraints_file, write_constraints_file
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=10, features=[{'name': 'store', 'values': [1, 2]}, {'name': 'category', 'values': ['A']}]),
+        Constraint(lb=5.5, ub=15, features=[{'name': 'category', 'values': ['A', 'B']}]),
+        Constraint(lb=0, ub=20, features=[]),
+        Constraint(lb=1, ub=2, features=[{'name': 'store', 'values': [2.0]}])
+    ]
+
+
+@pytest.fixture
+def templates():
+    return [{"group_by": ["store"], "reference": "quantity", "lb_ratio": .9, "ub_ratio": 1.1}]
+
+
+def test_from_constraints(constraints):
+    table = ConstraintTable.from_constraints(iter(constraints))
+    assert len(table) == 4
+    assert list(table) == constraints
+    assert table[3]['features'][0]['values'] == [2.0] and isinstance(table[3]['features'][0]['values'][0], float)
+    assert table.feature_names() == ['store', 'category']
+    assert table.feature_values() == {'store': [1, 2, 2.0], 'category': ['A', 'B']}
+    assert len(table.values_) == 5  # values are interned
+
+
+def test_write_and_read(tmp_path, constraints, templates):
+    ConstraintTable.from_constraints(constraints).write(str(tmp_path / 'table'), templates)
+    table, read_templates = ConstraintTable.read(str(tmp_path / 'table'))
+    assert isinstance(table.lb_, np.memmap)
+    assert list(table) == constraints and read_templates == templates
+
+
+def test_read_problem(tmp_path, constraints, templates):
+    write_constraints_file(constraints, str(tmp_path / 'constraints.json'), templates)
+    problem = read_problem(str(tmp_path / 'constraints.json'))
+    assert list(problem['constraints']) == constraints and problem['templates'] == templates
+    (tmp_path / 'invalid.json').write_text(json.dumps({'constraints': [{'lb': 0, 'ub': 'x', 'features': []}]}))
+    with pytest.raises(AssertionError, match='constraint 0'):
+        read_problem(str(tmp_path / 'invalid.json'))
+
+
+def test_convert(tmp_path, constraints, templates):
+    write_constraints_file(constraints, str(tmp_path / 'constraints.json'), templates)
+    convert(str(tmp_path / 'constraints.json'), str(tmp_path / 'binary'))
+    convert(str(tmp_path / 'binary'), str(tmp_path / 'back.json'))
+    problem = read_constraints_file(str(tmp_path / 'back.json'))
+    assert problem['constraints'] == constraints and problem['templates'] == templates
+    assert list(read_problem(str(tmp_path / 'binary'))['constraints']) == constraints
@@ -1,7 +1,8 @@
 import json
 import pytest
 
-from inventory_optim.data_model.constraints import read_constraints_file
+from inventory_optim.data_model.constraints import read_constraints_file, feature_names, write_constraints_file, \
+    iter_constraints, iter_problem
 
 
 @pytest.fixture
@@ -55,3 +56,60 @@ def test_read_constraints_file_missing_keys(tmp_path):
         json.dump(data, f)
     with pytest.raises(KeyError):
         read_constraints_file(str(file_path))
+
+
+def test_read_constraints_file_invalid_constraint(tmp_path):
+    file_path = tmp_path / "invalid.json"
+    for constraint in [{"lb": 0, "features": []}, {"lb": 0, "ub": 1, "features": [{"values": [1]}]},
+                       {"lb": 0, "ub": 1, "features": [{"name": "store", "values": [[1]]}]}]:
+        file_path.write_text(json.dumps({"constraints": [{"lb": 0, "ub": 1, "features": []}, constraint]}))
+        with pytest.raises(AssertionError, match="constraint 1"):
+            read_constraints_file(str(file_path))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 2 ** 20])
+def test_iter_constraints(constraints_json, chunk_size):
+    constraints = list(iter_constraints(constraints_json, chunk_size))
+    assert constraints == read_constraints_file(constraints_json)['constraints']
+
+
+def test_iter_problem(tmp_path):
+    file_path = tmp_path / "problem.json"
+    file_path.write_text(' {"version": 12345, "constraints" : [ ], "templates": [{"group_by": ["a"]}, 1.5e3], "x": {}} ')
+    content = [(key, list(value) if not isinstance(value, (int, dict)) else value) for key, value in iter_problem(str(file_path), 3)]
+    assert content == [("version", 12345), ("constraints", []), ("templates", [{"group_by": ["a"]}, 1500.]), ("x", {})]
+    file_path.write_text('{"constraints": [{"lb": 0, "ub": 1, "features": []}, ')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_constraints(str(file_path)))
+
+
+def test_feature_names(constraints_json):
+    problem = read_constraints_file(constraints_json)
+    assert feature_names(problem['constraints']) == ['feature1', 'feature2', 'feature3']
+    templates = [{"group_by": ["feature4", "feature1"], "features": [{"name": "feature5", "values": [1]}]}]
+    assert feature_names(problem['constraints'], templates) == ['feature1', 'feature2', 'feature3', 'feature5', 'feature4']
+
+
+def test_read_constraints_file_templates(tmp_path):
+    templates = [
+        {"group_by": ["store", "category"], "reference": "quantity", "lb_ratio": .9, "ub_ratio": 1.1},
+        {"group_by": ["store"], "bounds": {"keys": [[1], [2]], "lb": [0, 5], "ub": [10, 15]}}
+    ]
+    write_constraints_file([], str(tmp_path / "constraints.json"), templates)
+    problem = read_constraints_file(str(tmp_path / "constraints.json"))
+    assert problem['constraints'] == [] and problem['templates'] == templates
+    for template in [
+        {"group_by": [], "reference": "quantity", "lb_ratio": .9, "ub_ratio": 1.1},
+        {"group_by": ["store"], "reference": "quantity", "lb_ratio": .9},
+        {"group_by": ["store"], "bounds": {"keys": [[1, "A"]], "lb": [0], "ub": [10]}},
+        {"group_by": ["store"], "bounds": {"keys": [[1]], "lb": [0], "ub": [10]}, "reference": "quantity"}
+    ]:
+        (tmp_path / "invalid.json").write_text(json.dumps({"constraints": [], "templates": [template]}))
+        with pytest.raises(AssertionError):
+            read_constraints_file(str(tmp_path / "invalid.json"))
+
+
+def test_write_constraints_file(constraints_json, tmp_path):
+    constraints = read_constraints_file(constraints_json)['constraints']
+    write_constraints_file(constraints, str(tmp_path / 'out' / 'constraints.json'))
+    assert read_constraints_file(str(tmp_path / 'out' / 'constraints.json'))['constraints'] == constraints
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.item_table import ItemTable
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'ID': ['a', 'b', 'c', 'd'],
+        'QUANTITY': [10., 20., 30., 40.],
+        'CATEGORY': ["A", "B", "A", None],
+        'STORE': [1, 1, 2, 2]
+    }
+    return pd.DataFrame(data).astype({'CATEGORY': 'category'})
+
+
+def test_from_frame(sample_dataframe):
+    items = ItemTable.from_frame(sample_dataframe, ['STORE'])
+    assert len(items) == 4
+    assert items.columns == ['ID', 'QUANTITY', 'CATEGORY', 'STORE']
+    assert items.is_categorical('CATEGORY') and items.is_categorical('STORE') and not items.is_categorical('ID')
+    assert items.array('CATEGORY').tolist() == [0, 1, 0, -1]
+    assert items.dtype('STORE').categories.tolist() == [1, 2]
+    assert np.shares_memory(items.numeric('QUANTITY'), sample_dataframe['QUANTITY'].to_numpy())  # no copy
+    assert items.numeric('QUANTITY', np.float32).dtype == np.float32
+    with pytest.raises(AssertionError):
+        items.numeric('CATEGORY')
+    with pytest.raises(KeyError):
+        items.array('REGION')
+    assert ItemTable.wrap(items) is items
+
+
+def test_to_frame(sample_dataframe):
+    items = ItemTable.from_frame(sample_dataframe)
+    assert items.to_frame().equals(sample_dataframe)
+    chunk = items.to_frame(['CATEGORY', 'QUANTITY'], np.array([3, 0]))
+    assert chunk['CATEGORY'].dtype == sample_dataframe['CATEGORY'].dtype
+    assert chunk['CATEGORY'].isna().tolist() == [True, False]
+    assert chunk['QUANTITY'].tolist() == [40., 10.]
+    assert items.to_frame(['ID'], slice(1, 3))['ID'].tolist() == ['b', 'c']
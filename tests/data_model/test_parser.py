@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import pytest
 
 from inventory_optim.data_model.parser import CustomParser
@@ -26,9 +28,53 @@ def test_parse_args_valid(valid_args, monkeypatch):
     assert 'var_decr' in parsed_args
     assert 'export_statistics' in parsed_args
     assert 'export_solution' in parsed_args
+    assert parsed_args['check']
+    assert parsed_args['id_col'] == 'id'
+    assert parsed_args['read_columns'] == 'all'  # every column is exported with the solution
+
+
+def test_parse_args_no_check(valid_args, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args + ['--no-check'])
+    assert not CustomParser.parse_args()['check']
 
 
 def test_parse_args_invalid(invalid_args, monkeypatch):
     with pytest.raises(SystemExit):
         monkeypatch.setattr('sys.argv', ['script_name'] + invalid_args)
         CustomParser.parse_args()  # This should raise SystemExit due to missing required argument
+
+
+def test_parser_is_lightweight():
+    # the parser must not pull in the heavy modules, so that --help and invalid arguments fail fast
+    code = 'import sys, inventory_optim.data_model.parser; print(sorted({"numpy", "pandas", "highspy"} & set(sys.modules)))'
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip() == '[]'
+
+
+def test_check_only(valid_args, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args + ['--check-only'])
+    assert CustomParser.parse_args()['check_only']
+
+
+def test_progress(valid_args, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args)
+    args = CustomParser.parse_args()
+    assert args['progress_file'] is None and args['target_gap'] is None and args['target_objective'] is None
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args + ['--progress-file', 'progress.jsonl', '--target-gap', '0.01'])
+    args = CustomParser.parse_args()
+    assert args['progress_file'] == 'progress.jsonl' and args['target_gap'] == .01 and args['progress_interval'] == 1
+
+
+def test_preprocess(valid_args, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args)
+    assert not CustomParser.parse_args()['preprocess']
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args + ['--preprocess'])
+    assert CustomParser.parse_args()['preprocess']
+
+
+def test_pipeline(valid_args, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args)
+    args = CustomParser.parse_args()
+    assert not args['pipeline'] and args['chunk_size'] == 1_000_000
+    monkeypatch.setattr('sys.argv', ['script_name'] + valid_args + ['--pipeline', '--chunk-size', '1000'])
+    args = CustomParser.parse_args()
+    assert args['pipeline'] and args['chunk_size'] == 1000
@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint, write_constraints_file
+from inventory_optim.data_model import reader
+from inventory_optim.data_model.pipeline import IngestionPipeline
+from inventory_optim.monitoring.time_runner import StageTimer
+from inventory_optim.optim_model.builder import ModelBuilder
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'ID': [1, 2, 3, 4, 5, 6, 7],
+        'QUANTITY': [10., 0., 10., 20., 5., 7., 3.],
+        'STORE': [1, 1, 2, 1, 3, 2, 1],
+        'CATEGORY': ["A", "B", "A", "C", "B", "A", "D"],
+        'BRAND': [1, 2, 3, 4, 5, "X", 1],  # numeric in the first chunks only
+        'CONTRIB': [1., 2., 1., 1., 3., -1., .5]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'CATEGORY', 'values': ['B', 'D']}])
+    ]
+
+
+def run_pipeline(tmp_path, sample_dataframe, constraints, required=None, **kwargs):
+    sample_dataframe.to_csv(tmp_path / 'data.csv', index=False)
+    write_constraints_file(constraints, str(tmp_path / 'constraints.json'))
+    mb = ModelBuilder()
+    pipeline = IngestionPipeline(mb, 'QUANTITY', 1.5, .5, 'CONTRIB', 'max', chunk_size=2, **kwargs)
+    stages = StageTimer()
+    items, problem, index = pipeline.run(str(tmp_path / 'data.csv'), str(tmp_path / 'constraints.json'), required, stages)
+    return mb, pipeline, stages, items, problem, index
+
+
+def test_run(tmp_path, sample_dataframe, constraints):
+    mb, pipeline, stages, items, problem, index = run_pipeline(tmp_path, sample_dataframe, constraints)
+    assert pipeline.num_chunks_ == 4
+    assert list(problem['constraints']) == constraints
+    assert items.columns == sample_dataframe.columns.tolist()
+    for name in ['STORE', 'CATEGORY', 'BRAND']:  # codes are shared by the chunks
+        assert items.is_categorical(name)
+        assert [str(value) for value in items.to_frame()[name]] == [str(value) for value in sample_dataframe[name]]
+    assert items.array('QUANTITY').tolist() == sample_dataframe['QUANTITY'].tolist()
+    expected = ModelBuilder()
+    expected.create_variables(sample_dataframe, 1.5, .5, 'QUANTITY')
+    expected.make_objective(sample_dataframe, 'CONTRIB', 'max')
+    assert np.array_equal(mb.col_lower_, expected.col_lower_) and np.array_equal(mb.col_upper_, expected.col_upper_)
+    assert np.array_equal(mb.col_cost_, expected.col_cost_) and mb.obj_ == 'max'
+    assert mb.highs_.impl_.getNumCol() == len(sample_dataframe)
+    assert {'read_constraint_file', 'read_chunk', 'process_chunk', 'assemble_items', 'scope_index'} <= set(stages.busy_)
+    mb.add_constraints(index, problem['constraints'])
+    solved, values = mb.solve()
+    assert solved and len(values) == len(sample_dataframe)
+
+
+def test_run_required(tmp_path, sample_dataframe, constraints, monkeypatch):
+    def required(problem):
+        return {'ID', 'QUANTITY', 'CONTRIB'} | {feature['name'] for constraint in problem['constraints'] for feature in constraint['features']}
+
+    calls = []
+
+    def read_chunks(filepath, columns=None, chunk_size=1_000_000, skip_rows=0):
+        calls.append((columns, skip_rows))
+        return reader.read_chunks(filepath, columns, chunk_size, skip_rows)
+
+    monkeypatch.setattr('inventory_optim.data_model.pipeline.read_chunks', read_chunks)
+    mb, pipeline, stages, items, problem, index = run_pipeline(tmp_path, sample_dataframe, constraints, required, max_pending=0)
+    assert calls[0] == (None, 0) and calls[-1][0] == ['ID', 'QUANTITY', 'STORE', 'CATEGORY', 'CONTRIB']  # narrowed once parsed
+    assert items.columns == ['ID', 'QUANTITY', 'STORE', 'CATEGORY', 'CONTRIB']
+    assert items.array('ID').tolist() == sample_dataframe['ID'].tolist()
+    assert [str(value) for value in items.to_frame()['CATEGORY']] == sample_dataframe['CATEGORY'].tolist()
+    assert len(mb.col_lower_) == len(sample_dataframe)
+
+
+def test_encode():
+    pipeline = IngestionPipeline(ModelBuilder(), 'QUANTITY', 1.5, .5, 'CONTRIB', 'max')
+    assert pipeline.encode('CATEGORY', pd.Series(['A', 'B', None])).tolist() == [0, 1, -1]
+    assert pipeline.encode('CATEGORY', pd.Series(['C', 'A'])).tolist() == [2, 0]
+    assert pipeline.lookups_['CATEGORY'] == {'A': 0, 'B': 1, 'C': 2}
@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.checker import Checker
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.data_model.preprocessor import Preprocessor
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.rounding import IntegralSolver
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 0, 10, 10, 5, 7],
+        'STORE': [1, 1, 1, 1, 2, 3],
+        'CATEGORY': ["A", "D", "A", "A", "B", "C"],
+        'CONTRIB': [1, 2, 1, 1, 3, -1]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=0, ub=5, features=[{'name': 'CATEGORY', 'values': ['D']}])  # only on an item with no quantity
+    ]
+
+
+def compiled_model(df, constraints):
+    col_lower, col_upper = Checker.variable_bounds(df, 'QUANTITY', 1.5, .5)
+    matrix = ConstraintMatrix.compile(ScopeIndex(df), constraints)
+    return [col_lower, col_upper, matrix, ModelBuilder.objective_coefficients(df, 'CONTRIB')]
+
+
+def test_coerce(sample_dataframe):
+    df = sample_dataframe.assign(PRICE=[.1, .2, .3, .4, .5, .6])
+    items = Preprocessor.coerce(df, ['STORE', 'CATEGORY'], ['QUANTITY', 'PRICE'])
+    assert items.is_categorical('STORE') and items.is_categorical('CATEGORY')
+    assert items.dtype('QUANTITY') == np.float32
+    assert items.dtype('PRICE') == np.float64  # not exactly representable as float32
+    assert items.numeric('QUANTITY').tolist() == sample_dataframe['QUANTITY'].tolist()
+    assert items.to_frame(['STORE'])['STORE'].tolist() == [1, 1, 1, 1, 2, 3]
+
+
+def test_reduce(sample_dataframe, constraints):
+    preprocessor = Preprocessor()
+    col_lower, col_upper, matrix, col_cost = preprocessor.reduce(*compiled_model(sample_dataframe, constraints), 'max')
+    # items 0, 2 and 3 are merged, item 1 has no quantity and item 5 is in no constraint
+    assert preprocessor.column_map_.tolist() == [0, -1, 0, 0, 1, -1]
+    assert col_lower.tolist() == [15, 2.5]
+    assert col_upper.tolist() == [45, 7.5]
+    assert col_cost.tolist() == [1, 3]
+    # the row on the item with no quantity is left empty
+    assert preprocessor.rows_.tolist() == [0, 1]
+    assert matrix.num_row == 2 and matrix.num_col_ == 2
+    assert matrix.upper_.tolist() == [40, 100]
+    assert preprocessor.statistics_['num_fixed'] == 1
+    assert preprocessor.statistics_['num_unconstrained'] == 1
+    assert preprocessor.statistics_['num_duplicates'] == 2
+    assert preprocessor.statistics_['fixed_objective'] == -3.5
+
+
+def test_restore(sample_dataframe, constraints):
+    model = compiled_model(sample_dataframe, constraints)
+    full = ModelBuilder()
+    full.load_model(*model)
+    _, full_values = full.solve()
+    preprocessor = Preprocessor()
+    reduced = ModelBuilder()
+    reduced.load_model(*preprocessor.reduce(*model, 'max'))
+    _, values = reduced.solve()
+    restored = preprocessor.restore(values)
+    assert restored.tolist() == pytest.approx([40 / 3, 0, 40 / 3, 40 / 3, 7.5, 3.5])
+    assert model[3] @ restored == pytest.approx(model[3] @ np.array(full_values))
+    assert ((restored >= model[0]) & (restored <= model[1])).all()
+
+
+def test_fixed_contribution(sample_dataframe):
+    # item 5, fixed at 1.75, takes part of the bound of stores 1 and 3; item 4 is in no constraint
+    constraints = [Constraint(lb=0, ub=20, features=[{'name': 'STORE', 'values': [1, 3]}])]
+    df = sample_dataframe.assign(QUANTITY=[10, 0, 10, 10, 5, 3.5])
+    col_lower, col_upper, matrix, col_cost = compiled_model(df, constraints)
+    col_upper[5] = col_lower[5]
+    preprocessor = Preprocessor(dedupe=False)
+    _, _, reduced, _ = preprocessor.reduce(col_lower, col_upper, matrix, col_cost, 'max')
+    assert reduced.upper_.tolist() == [20 - 1.75]
+    assert preprocessor.column_map_.tolist() == [0, -1, 1, 2, -1, -1]
+    assert preprocessor.restore(np.array([1., 2, 3])).tolist() == [1, 0, 2, 3, 7.5, 1.75]
+
+
+def test_reduce_integral(sample_dataframe, constraints):
+    model = compiled_model(sample_dataframe.assign(QUANTITY=[10, 0, 10, 10, 5, 5]), constraints)
+    model[1][1] = model[0][1] = 2.5  # fixed at a fractional quantity
+    preprocessor = Preprocessor(integral=True)
+    reduced = ModelBuilder()
+    reduced.load_model(*preprocessor.reduce(*model, 'max'))
+    solver = IntegralSolver(reduced)
+    is_ok, values = solver.solve()
+    reduced_lp_objective = solver.statistics_['lp_objective']
+    solver.add_fixed_objective(preprocessor.statistics_['fixed_objective'], preprocessor.statistics_['fixed_lp_objective'])
+    restored = preprocessor.restore(values)
+    assert is_ok and preprocessor.statistics_['num_duplicates'] == 0  # not merged
+    assert restored.dtype.kind == 'i' and restored.tolist()[5] == 3  # unconstrained at ceil(2.5), not 2.5
+    assert restored.tolist()[1] in [2, 3]  # fixed at 2.5
+    assert ((restored >= np.floor(model[0])) & (restored <= np.ceil(model[1]))).all()
+    assert solver.statistics_['objective'] == pytest.approx(model[3] @ restored)
+    assert solver.statistics_['lp_objective'] == pytest.approx(reduced_lp_objective + 2.5 * 2 - 2.5)  # dropped items at their LP values
+    assert solver.statistics_['gap'] >= 0
@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.reader import read_data, read_items, read_chunks, available_columns, write_npy_dir, write_npy_chunks, detect_format
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'ID': [1, 2, 3],
+        'QUANTITY': [10., 20., 30.],
+        'CATEGORY': ["A", "B", "A"],
+        'STORE': [1, 1, 2]
+    }
+    return pd.DataFrame(data)
+
+
+def check_projection(path, sample_dataframe):
+    assert available_columns(path) == ['ID', 'QUANTITY', 'CATEGORY', 'STORE']
+    df = read_data(path, ['QUANTITY', 'CATEGORY', 'STORE'], ['CATEGORY', 'STORE'])
+    assert df.columns.tolist() == ['QUANTITY', 'CATEGORY', 'STORE']
+    assert isinstance(df['STORE'].dtype, pd.CategoricalDtype)
+    assert df['STORE'].tolist() == [1, 1, 2]  # numeric features keep numeric categories
+    assert df['CATEGORY'].tolist() == ["A", "B", "A"]
+    assert df['QUANTITY'].tolist() == [10., 20., 30.]
+    assert read_data(path).astype({'CATEGORY': object}).equals(sample_dataframe)
+
+
+def test_read_csv(sample_dataframe, tmp_path):
+    path = str(tmp_path / 'data.csv.gz')
+    sample_dataframe.to_csv(path, index=False)
+    assert detect_format(path) == 'csv'
+    check_projection(path, sample_dataframe)
+
+
+def test_read_npy_dir(sample_dataframe, tmp_path):
+    path = str(tmp_path / 'data')
+    write_npy_dir(sample_dataframe, path)
+    assert detect_format(path) == 'npy'
+    check_projection(path, sample_dataframe)
+    with pytest.raises(KeyError):
+        read_data(path, ['REGION'])
+
+
+def test_read_items(sample_dataframe, tmp_path):
+    path = str(tmp_path / 'data')
+    write_npy_dir(sample_dataframe, path)
+    items = read_items(path, ['QUANTITY', 'CATEGORY', 'STORE'], ['STORE'])
+    assert isinstance(items.array('CATEGORY'), np.memmap)  # codes are used as stored
+    assert isinstance(items.array('QUANTITY'), np.memmap)
+    assert items.is_categorical('STORE') and items.is_categorical('CATEGORY')
+    csv_path = str(tmp_path / 'data.csv')
+    sample_dataframe.to_csv(csv_path, index=False)
+    from_csv, from_npy = read_items(csv_path, None, ['CATEGORY', 'STORE']), read_items(path, None, ['STORE'])
+    assert from_csv.to_frame().astype(object).equals(from_npy.to_frame().astype(object))
+
+
+def test_read_parquet(sample_dataframe, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'data.parquet')
+    sample_dataframe.to_parquet(path)
+    assert detect_format(path) == 'parquet'
+    check_projection(path, sample_dataframe)
+
+
+def test_read_arrow(sample_dataframe, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'data.arrow')
+    sample_dataframe.to_feather(path)
+    assert detect_format(path) == 'arrow'
+    check_projection(path, sample_dataframe)
+
+
+def test_write_npy_chunks(sample_dataframe, tmp_path):
+    path = str(tmp_path / 'data')
+    df = sample_dataframe.astype({'CATEGORY': pd.CategoricalDtype(['A', 'B'])})
+    write_npy_chunks([df.iloc[:2], df.iloc[2:]], path, len(df))
+    assert available_columns(path) == ['ID', 'QUANTITY', 'CATEGORY', 'STORE']
+    assert read_data(path).astype({'CATEGORY': object}).equals(sample_dataframe)
+    with pytest.raises(AssertionError):
+        write_npy_chunks([df.iloc[:2]], path, len(df))
+
+
+def test_read_chunks(sample_dataframe, tmp_path):
+    sample_dataframe.to_csv(tmp_path / 'data.csv', index=False)
+    write_npy_dir(sample_dataframe, str(tmp_path / 'data'))
+    for path in [str(tmp_path / 'data.csv'), str(tmp_path / 'data')]:
+        chunks = list(read_chunks(path, ['ID', 'CATEGORY'], chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert pd.concat(chunks)['CATEGORY'].astype(object).tolist() == ["A", "B", "A"]
+        skipped = list(read_chunks(path, ['ID', 'STORE'], chunk_size=2, skip_rows=1))
+        assert pd.concat(skipped).columns.tolist() == ['ID', 'STORE']
+        assert pd.concat(skipped)['ID'].tolist() == [2, 3]
+        assert list(read_chunks(path, chunk_size=2, skip_rows=3)) == []
@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.shared_data import SharedDataset
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10., 20., 30.],
+        'CATEGORY': ["A", "B", "A"],
+        'STORE': [1, 1, 2]
+    }
+    return pd.DataFrame(data)
+
+
+def test_publish_and_attach(sample_dataframe):
+    dataset = SharedDataset.publish(sample_dataframe)
+    try:
+        attached = SharedDataset.attach(dataset.descriptor_)
+        df = attached.to_frame()
+        assert df['QUANTITY'].tolist() == [10., 20., 30.]
+        assert df['STORE'].tolist() == [1, 1, 2]
+        assert isinstance(df['CATEGORY'].dtype, pd.CategoricalDtype)
+        assert df['CATEGORY'].tolist() == ["A", "B", "A"]
+        np.ndarray((3,), dtype=np.float64, buffer=dataset.blocks_[0].buf)[0] = 5.
+        assert df['QUANTITY'][0] == 5.  # columns are views on the shared memory blocks
+        del df
+        attached.close()
+    finally:
+        dataset.close()
+
+
+def test_publish_columns(sample_dataframe):
+    dataset = SharedDataset.publish(sample_dataframe, ['STORE'])
+    try:
+        assert list(dataset.descriptor_['columns']) == ['STORE']
+    finally:
+        dataset.close()
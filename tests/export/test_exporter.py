@@ -2,8 +2,12 @@ import pytest
 import pandas as pd
 import json
 import os
+import numpy as np
 
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.data_model.preprocessor import Preprocessor
 from inventory_optim.export.exporter import Exporter
+from inventory_optim.optim_model.sensitivity import SensitivityReport
 
 
 @pytest.fixture
@@ -34,6 +38,68 @@ def test_export_solution(tmp_dir):
     df = pd.DataFrame({'F': [1, 2, 3], 'V': [10, 20, 30]})
     values = [0.1, 0.2, 0.3]
     Exporter.export_solution(temp_file, df, values, optim_col_name='OPT')
+    assert df.columns.tolist() == ['F', 'V']  # input is left untouched
     assert os.path.isfile(temp_file)
     loaded_df = pd.read_csv(temp_file)
     assert loaded_df.equals(pd.DataFrame({'F': [1, 2, 3], 'V': [10, 20, 30], 'OPT': [0.1, 0.2, 0.3]}))
+
+
+@pytest.mark.parametrize('filename', ['solution.csv', 'solution.csv.gz', 'solution.csv.bz2'])
+def test_export_solution_chunks(tmp_dir, filename):
+    temp_file = os.path.join(tmp_dir, filename)
+    df = pd.DataFrame({'ID': range(10), 'V': range(10)})
+    values = [v + (v % 2) for v in range(10)]
+    Exporter.export_solution(temp_file, df, values, columns=['ID'], chunk_size=3)
+    loaded_df = pd.read_csv(temp_file)
+    assert loaded_df.equals(pd.DataFrame({'ID': range(10), 'opt': values}))
+
+
+def test_export_solution_only_changed(tmp_dir):
+    temp_file = os.path.join(tmp_dir, 'solution.csv')
+    df = pd.DataFrame({'ID': range(10), 'V': range(10)})
+    values = [v + (v % 2) for v in range(10)]
+    Exporter.export_solution(temp_file, df, values, columns=['ID'], reference_col='V', chunk_size=2)
+    loaded_df = pd.read_csv(temp_file)
+    assert loaded_df.equals(pd.DataFrame({'ID': [1, 3, 5, 7, 9], 'opt': [2, 4, 6, 8, 10]}))
+    Exporter.export_solution(temp_file, df, df['V'].tolist(), columns=['ID'], reference_col='V')
+    assert pd.read_csv(temp_file).columns.tolist() == ['ID', 'opt']
+    assert len(pd.read_csv(temp_file)) == 0
+
+
+@pytest.mark.parametrize('filename', ['solution.parquet', 'solution.arrow'])
+def test_export_solution_columnar(tmp_dir, filename):
+    pytest.importorskip('pyarrow')
+    temp_file = os.path.join(tmp_dir, filename)
+    df = pd.DataFrame({'ID': range(10), 'C': pd.Categorical(['A', 'B'] * 5)})
+    values = [float(v) for v in range(10)]
+    Exporter.export_solution(temp_file, df, values, chunk_size=4)
+    loaded_df = pd.read_parquet(temp_file) if filename.endswith('parquet') else pd.read_feather(temp_file)
+    assert loaded_df['ID'].tolist() == list(range(10))
+    assert loaded_df['C'].astype(str).tolist() == ['A', 'B'] * 5
+    assert loaded_df['opt'].tolist() == values
+
+
+def test_export_solution_preprocessed(tmp_dir):
+    temp_file = os.path.join(tmp_dir, 'solution.csv')
+    df = pd.DataFrame({'ID': range(4), 'V': [2, 0, 2, 4]})
+    preprocessor = Preprocessor()
+    preprocessor.column_map_ = np.array([0, -1, 0, 1])
+    preprocessor.group_size_ = np.array([2, 1])
+    preprocessor.fixed_values_ = np.array([0, 0, 0, 0.])
+    Exporter.export_solution(temp_file, df, [5., 3.], columns=['ID'], preprocessor=preprocessor)
+    assert pd.read_csv(temp_file)['opt'].tolist() == [2.5, 0, 2.5, 3]
+
+
+def test_export_solution_unknown_column(tmp_dir):
+    df = pd.DataFrame({'ID': range(3)})
+    with pytest.raises(AssertionError):
+        Exporter.export_solution(os.path.join(tmp_dir, 'solution.csv'), df, [0, 0, 0], columns=['X'])
+
+
+def test_export_sensitivity(tmp_dir):
+    report = SensitivityReport(ItemTable({'constraint': np.arange(2), 'dual': np.array([1., 0.])}),
+                               ItemTable({'item': np.arange(3), 'reduced_cost': np.array([0., 1., 2.])}), {})
+    paths = Exporter.export_sensitivity(os.path.join(tmp_dir, 'sensitivity.csv'), report, chunk_size=2)
+    assert paths == (os.path.join(tmp_dir, 'sensitivity.constraints.csv'), os.path.join(tmp_dir, 'sensitivity.items.csv'))
+    assert pd.read_csv(paths[0])['dual'].tolist() == [1., 0.]
+    assert pd.read_csv(paths[1])['reduced_cost'].tolist() == [0., 1., 2.]
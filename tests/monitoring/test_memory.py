@@ -0,0 +1,9 @@
+from inventory_optim.monitoring.memory import peak_rss_mb
+
+
+def test_peak_rss_mb():
+    peak = peak_rss_mb()
+    buffer = bytearray(64 * 2 ** 20)
+    assert peak > 0
+    assert peak_rss_mb() >= peak
+    del buffer
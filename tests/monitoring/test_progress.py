@@ -0,0 +1,24 @@
+import json
+import logging
+
+from inventory_optim.monitoring.progress import ProgressStream
+
+
+def test_progress_stream(tmp_path, caplog):
+    filepath = tmp_path / 'out' / 'progress.jsonl'
+    with caplog.at_level(logging.INFO):
+        with ProgressStream(str(filepath), logging.getLogger('progress')) as stream:
+            stream.record({'iteration_count': 10, 'objective': 1.5})
+            stream.record({'iteration_count': 20, 'objective': 2.25, 'gap': None})
+            assert len(filepath.read_text().splitlines()) == 2  # flushed as records come
+    assert stream.num_records_ == 2
+    records = [json.loads(line) for line in filepath.read_text().splitlines()]
+    assert records[1] == {'iteration_count': 20, 'objective': 2.25, 'gap': None}
+    assert 'iteration_count=20 objective=2.25 gap=None' in caplog.text
+
+
+def test_progress_stream_without_file():
+    stream = ProgressStream()
+    stream.record({'iteration_count': 10})
+    stream.close()
+    assert stream.num_records_ == 1
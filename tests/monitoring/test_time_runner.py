@@ -1,4 +1,8 @@
-from inventory_optim.monitoring.time_runner import Timer, TimeRunner
+import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from inventory_optim.monitoring.time_runner import StageTimer, Timer, TimeRunner
 
 
 def test_timer():
@@ -20,3 +24,32 @@ def test_timerunner_measure_elapsed_time():
     assert result == sum(args)
     assert info_stat in stats
     assert stats[info_stat] >= 0
+
+
+def test_stage_timer():
+    stages = StageTimer()
+
+    def work_item():
+        with stages.stage('sleep'):
+            time.sleep(.01)
+
+    with ThreadPoolExecutor(2) as pool:
+        for future in [pool.submit(work_item) for _ in range(4)]:
+            future.result()
+    assert set(stages.busy_) == {'sleep'}
+    assert stages.busy_['sleep'] >= .04  # busy time of every work item, whatever their overlap
+
+
+def test_timerunner_run_stages_and_log():
+    stats = {}
+
+    def test_function(a, stages):
+        with stages.stage('first'):
+            time.sleep(.01)
+        with stages.stage('second'):
+            return a + 1
+
+    assert TimeRunner.run_stages_and_log(stats, test_function, [1], 'test(s)', 'test', logging.getLogger('test')) == 2
+    assert set(stats['test_stages']) == {'first(s)', 'second(s)', 'sum(s)', 'overlap(s)'}
+    assert stats['test_stages']['first(s)'] >= .01
+    assert stats['test_stages']['sum(s)'] <= stats['test(s)']  # stages in sequence do not overlap
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+import pytest
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.monitoring.time_runner import TimeRunner
+from inventory_optim.monitoring.tracing import Tracer, tracer, trace_path
+from inventory_optim.optim_model.builder import ModelBuilder
+
+
+def test_nested_spans():
+    t = Tracer()
+
+    @t.span('leaf')
+    def leaf(n):
+        return [0] * n
+
+    with t.span('leaf'):
+        pass
+    assert t.spans_ == []  # disabled
+    t.start(trace_memory=True)
+    with t.span('root', size=1) as span:
+        leaf(10 ** 6)
+        with t.span('mid'):
+            leaf(10)
+        span.set(done=True)
+    with pytest.raises(ValueError):
+        with t.span('failing'):
+            raise ValueError()
+    t.stop()
+    assert [s['path'] for s in t.spans_] == ['root/leaf', 'root/mid/leaf', 'root/mid', 'root', 'failing']
+    assert [s['depth'] for s in t.spans_] == [1, 2, 1, 0, 0]
+    root = t.spans_[3]
+    assert root['args'] == {'size': 1, 'done': True}
+    assert root['wall(s)'] >= t.spans_[0]['wall(s)'] + t.spans_[2]['wall(s)']
+    assert root['alloc_peak(MB)'] >= t.spans_[0]['alloc_peak(MB)'] > 7  # a list of 10^6 pointers
+    assert t.spans_[4]['args'] == {'error': 'ValueError'}
+    assert t.summary()['root/mid/leaf']['count'] == 1
+
+
+def test_thread_cpu_time():
+    t = Tracer()
+    t.start()
+
+    def idle():
+        with t.span('idle'):
+            time.sleep(.2)
+
+    thread = threading.Thread(target=idle)
+    thread.start()
+    while thread.is_alive():  # keeps the process busy while the span sleeps
+        pass
+    t.stop()
+    span = t.spans_[0]
+    assert span['cpu(s)'] < .05  # the CPU time of the other threads is not counted
+    assert span['process_cpu(s)'] > span['cpu(s)']
+
+
+def test_chrome_trace(tmp_path):
+    t = Tracer()
+    t.start()
+    with t.span('root'):
+        with t.span('child', rows=3):
+            pass
+    t.stop()
+    filepath = trace_path(str(tmp_path / 'stats.json'))
+    assert filepath == str(tmp_path / 'stats.trace.json')
+    t.export_chrome_trace(filepath)
+    events = json.loads((tmp_path / 'stats.trace.json').read_text())['traceEvents']
+    spans = [e for e in events if e['ph'] == 'X']
+    assert [e['name'] for e in spans] == ['root', 'child']
+    assert spans[1]['args']['rows'] == 3
+    assert spans[0]['ts'] <= spans[1]['ts'] and spans[1]['ts'] + spans[1]['dur'] <= spans[0]['ts'] + spans[0]['dur']
+    assert sum(e['ph'] == 'C' for e in events) == 2
+
+
+@pytest.mark.parametrize('bulk', [True, False])
+def test_build_model_spans(bulk):
+    df = pd.DataFrame({'QUANTITY': [10, 20, 30], 'STORE': [1, 2, 1], 'CONTRIB': [1, 2, 3]})
+    constraints = [Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}])]
+    mb = ModelBuilder()
+    stats = {}
+    tracer.start()
+    try:
+        mb.create_variables(df, 1.5, .8, 'QUANTITY')
+        TimeRunner.measure_elapsed_time(stats, mb.build_model, [df, constraints, 'CONTRIB', 'max', None, bulk], 'build_model(s)')
+        mb.solve()
+    finally:
+        tracer.stop()
+    paths = set(tracer.summary())
+    if bulk:
+        assert {'build_model/compile_constraints/scope_queries', 'build_model/highs_add_rows'} <= paths
+    else:
+        assert {'build_model/build_constraints/scope_query', 'build_model/build_constraints/highs_add_row'} <= paths
+    run = [s for s in tracer.spans_ if s['name'] == 'highs_run'][0]
+    assert run['args']['status'] == 'Optimal'
@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.aggregation import AggregatedSolver, constraint_signatures
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40, 50, 60],
+        'STORE': [1, 1, 1, 2, 2, 2],
+        'CATEGORY': ["A", "A", "B", "A", "A", "A"],
+        'CONTRIB': [1, 1, 2, 3, 3, 3.04]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=50, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'STORE', 'values': [2]}]),
+        Constraint(lb=0, ub=40, features=[{'name': 'CATEGORY', 'values': ['A']}, {'name': 'STORE', 'values': [1]}])
+    ]
+
+
+def test_constraint_signatures(sample_dataframe, constraints):
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints)
+    signatures = constraint_signatures(matrix)
+    assert signatures.shape == (6, 2)
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[3] == signatures[4]).all() and (signatures[4] == signatures[5]).all()
+    assert (signatures[0] != signatures[2]).any()
+    assert (signatures[0] != signatures[3]).any()
+
+
+def build(df, constraints, load):
+    mb = ModelBuilder()
+    mb.create_variables(df, var_incr=2, var_decr=0, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj='max', load=load)
+    return mb
+
+
+@pytest.mark.parametrize('cost_decimals, num_groups', [(None, 4), (1, 3)])
+def test_aggregated_solver(sample_dataframe, constraints, cost_decimals, num_groups):
+    full = build(sample_dataframe, constraints, True)
+    is_ok, expected = full.solve()
+    assert is_ok
+    mb = build(sample_dataframe, constraints, False)
+    solver = AggregatedSolver(mb, cost_decimals)
+    is_ok, values = solver.solve()
+    assert is_ok
+    values = np.array(values)
+    assert ((values >= mb.col_lower_ - 1e-9) & (values <= mb.col_upper_ + 1e-9)).all()
+    activity = mb.matrix_.dot(values)
+    assert ((activity >= mb.matrix_.lower_ - 1e-6) & (activity <= mb.matrix_.upper_ + 1e-6)).all()
+    assert np.dot(mb.col_cost_, values) == pytest.approx(np.dot(full.col_cost_, expected))
+    stats = {}
+    solver.populate_statistics(stats)
+    assert stats['aggregation']['num_aggregated_column'] == num_groups
+    assert stats['aggregation']['exact'] == (cost_decimals is None)
+    assert stats['solving']['status'] == 'Optimal'
+
+
+def test_disaggregate_fills_best_cost_first(sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints, False)
+    solver = AggregatedSolver(mb, cost_decimals=1)
+    solver.aggregate()
+    group = solver.groups_[3]
+    group_values = np.bincount(solver.groups_, mb.col_lower_)
+    group_values[group] = 150
+    values = solver.disaggregate(group_values)
+    assert values[3:].tolist() == [30, 0, 120]  # the largest coefficient is filled first, ties in order
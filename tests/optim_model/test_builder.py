@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 
 from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
 from inventory_optim.optim_model.builder import get_constraint_scope, ModelBuilder
 
 
@@ -41,3 +42,35 @@ def test_model_builder(sample_dataframe):
     assert sum(values) == 10
     assert values[np.argmax(sample_dataframe['CONTRIB'])] == 10
     assert values == [10, 0, 0]
+
+
+def test_model_builder_legacy_path(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=0, ub=10, features=[])
+    ]
+    solutions = []
+    for bulk in [False, True]:
+        mb = ModelBuilder()
+        mb.create_variables(sample_dataframe, var_incr=1, var_decr=0, var_name='QUANTITY')
+        mb.build_model(sample_dataframe, constraints, obj_feature_name="CONTRIB", obj='max', bulk=bulk)
+        assert mb.highs_.impl_.getNumRow() == len(constraints)
+        assert mb.highs_.impl_.getNumNz() == 6
+        solutions.append(mb.solve()[1])
+    assert solutions[0] == solutions[1]
+
+
+def test_model_builder_item_table(sample_dataframe):
+    constraints = [Constraint(lb=0, ub=25, features=[{'name': 'CATEGORY', 'values': ['A']}])]
+    sample_dataframe.loc[1, 'CONTRIB'] = np.nan
+    items = ItemTable.from_frame(sample_dataframe, ['CATEGORY'])
+    mb = ModelBuilder()
+    mb.create_variables(items, var_incr=1, var_decr=.5, var_name='QUANTITY')
+    mb.build_model(items, constraints, obj_feature_name="CONTRIB", obj='max')
+    assert sample_dataframe.columns.tolist() == ['QUANTITY', 'CATEGORY', 'CONTRIB']  # data is left untouched
+    assert mb.col_lower_.tolist() == [5, 10, 15]
+    assert mb.col_cost_.tolist() == [11, 0, 10]
+    assert np.isnan(sample_dataframe.loc[1, 'CONTRIB'])
+    is_ok, values = mb.solve()
+    assert is_ok and values[0] == 10 and values[2] == 15  # the second item has no cost
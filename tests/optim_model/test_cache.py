@@ -0,0 +1,97 @@
+import json
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.cache import ModelCache, file_digest
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40],
+        'STORE': [1, 1, 2, 2],
+        'CATEGORY': ["A", "B", "A", "B"],
+        'CONTRIB': [1, 2, 3, 4.5]
+    }
+    return pd.DataFrame(data).astype({'STORE': 'category', 'CATEGORY': 'category'})
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=50, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=60, features=[{'name': 'CATEGORY', 'values': ['B']}])
+    ]
+
+
+@pytest.fixture
+def inputs(tmp_path, sample_dataframe, constraints):
+    data_path, constraints_path = tmp_path / 'data.csv', tmp_path / 'constraints.json'
+    sample_dataframe.to_csv(data_path, index=False)
+    constraints_path.write_text(json.dumps({'constraints': constraints}))
+    return str(data_path), str(constraints_path)
+
+
+def build(df, constraints):
+    mb = ModelBuilder()
+    mb.create_variables(df, var_incr=2, var_decr=0, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj='max')
+    return mb
+
+
+def test_key(tmp_path, inputs):
+    cache = ModelCache(str(tmp_path / 'cache'))
+    args = {'var_col': 'QUANTITY', 'var_incr': 2}
+    key = cache.key(*inputs, args)
+    assert cache.key(*inputs, args) == key
+    assert cache.key(*inputs, {'var_col': 'QUANTITY', 'var_incr': 3}) != key
+    with open(inputs[0], 'a') as f:
+        f.write('5,1,A,1\n')
+    os.utime(inputs[0], ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert cache.key(*inputs, args) != key
+
+
+def test_file_digest(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'a' / 'x.npy').write_bytes(b'123')
+    digest = file_digest(str(tmp_path / 'a'))
+    (tmp_path / 'a' / 'x.npy').rename(tmp_path / 'a' / 'y.npy')
+    assert file_digest(str(tmp_path / 'a')) != digest
+
+
+def test_store_and_load(tmp_path, sample_dataframe, constraints):
+    cache = ModelCache(str(tmp_path / 'cache'))
+    assert cache.load('k') is None
+    mb = build(sample_dataframe, constraints)
+    is_ok, values = mb.solve()
+    assert cache.store('k', mb.matrix_, mb.col_lower_, mb.col_upper_, mb.col_cost_, sample_dataframe, ['STORE', 'CATEGORY']) == []
+    cached = cache.load('k')
+    assert isinstance(cached.col_cost_, np.memmap)
+    assert np.array_equal(cached.matrix_.index_, mb.matrix_.index_)
+    assert np.array_equal(cached.matrix_.row_ids(), mb.matrix_.row_ids())
+    items = cached.read_items()
+    assert items.columns == sample_dataframe.columns.tolist()
+    assert items.is_categorical('STORE')
+    assert items.to_frame()['CATEGORY'].tolist() == sample_dataframe['CATEGORY'].tolist()
+    warm = ModelBuilder()
+    warm.load_model(cached.col_lower_, cached.col_upper_, cached.matrix_, cached.col_cost_, 'max')
+    warm_ok, warm_values = warm.solve()
+    assert is_ok and warm_ok
+    assert np.allclose(warm_values, values)
+
+
+def test_eviction(tmp_path, sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints)
+    cache = ModelCache(str(tmp_path / 'cache'))
+    for key in ['a', 'b']:
+        cache.store(key, mb.matrix_, mb.col_lower_, mb.col_upper_, mb.col_cost_, sample_dataframe, [])
+        time.sleep(.01)
+    cache.load('a')  # a becomes the most recently used
+    cache.max_size_mb_ = cache.size_mb() * 1.25  # room for two entries
+    assert cache.store('c', mb.matrix_, mb.col_lower_, mb.col_upper_, mb.col_cost_, sample_dataframe, []) == ['b']
+    assert [e['key'] for e in cache.entries()] == ['a', 'c']
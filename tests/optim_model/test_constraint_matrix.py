@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraint_table import ConstraintTable
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30],
+        'CATEGORY': ["A", "B", "A"],
+        'CONTRIB': [11, 10, 10]
+    }
+    return pd.DataFrame(data)
+
+
+def test_compile(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=1, ub=11, features=[{'name': 'CATEGORY', 'values': ['C']}]),
+        Constraint(lb=2, ub=12, features=[])
+    ]
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints)
+    assert matrix.num_row == 3
+    assert matrix.nnz == 5
+    assert matrix.num_col_ == 3
+    assert np.array_equal(matrix.lower_, [0, 1, 2])
+    assert np.array_equal(matrix.upper_, [10, 11, 12])
+    assert np.array_equal(matrix.start_, [0, 2, 2, 5])
+    assert np.array_equal(matrix.index_, [0, 2, 0, 1, 2])
+    assert np.array_equal(matrix.row_ids(), [0, 0, 2, 2, 2])
+    assert np.array_equal(matrix.dot(sample_dataframe['QUANTITY'].to_numpy()), [40, 0, 60])
+
+
+def test_compile_stream_and_table(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=2, ub=12, features=[])
+    ]
+    index = ScopeIndex(sample_dataframe)
+    expected = ConstraintMatrix.compile(index, constraints)
+    for source in [iter(constraints), ConstraintTable.from_constraints(constraints)]:
+        matrix = ConstraintMatrix.compile(index, source)
+        assert np.array_equal(matrix.start_, expected.start_) and np.array_equal(matrix.index_, expected.index_)
+        assert np.array_equal(matrix.lower_, expected.lower_) and np.array_equal(matrix.upper_, expected.upper_)
+
+
+def test_compile_empty(sample_dataframe):
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), [])
+    assert matrix.num_row == 0
+    assert matrix.nnz == 0
+    assert len(matrix.dot(np.ones(3))) == 0
+
+
+def test_vstack(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    first = ConstraintMatrix.compile(index, [Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}])])
+    second = ConstraintMatrix.compile(index, [Constraint(lb=1, ub=11, features=[])])
+    matrix = ConstraintMatrix.vstack([first, second])
+    assert np.array_equal(matrix.start_, [0, 2, 5])
+    assert np.array_equal(matrix.index_, [0, 2, 0, 1, 2])
+    assert np.array_equal(matrix.lower_, [0, 1])
+
+
+def test_take_rows(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=1, ub=11, features=[{'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=2, ub=12, features=[])
+    ]
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints).take_rows([2, 0])
+    assert np.array_equal(matrix.lower_, [2, 0])
+    assert np.array_equal(matrix.start_, [0, 3, 5])
+    assert np.array_equal(matrix.index_, [0, 1, 2, 0, 2])
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.decomposition import BlockSolver, connected_components
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40, 50, 60],
+        'STORE': [1, 2, 1, 2, 3, 4],
+        'CATEGORY': ["A", "A", "B", "B", "A", "A"],
+        'CONTRIB': [1, 2, 3, 4, 5, -6]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=20, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=30, features=[{'name': 'STORE', 'values': [2]}]),
+        Constraint(lb=0, ub=10, features=[{'name': 'STORE', 'values': [2]}, {'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=0, ub=10, features=[{'name': 'STORE', 'values': [5]}])  # empty scope
+    ]
+
+
+def test_connected_components(sample_dataframe, constraints):
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints)
+    num_blocks, row_labels, col_labels = connected_components(matrix)
+    assert num_blocks == 2
+    assert row_labels.tolist() == [0, 1, 1, -1]
+    assert col_labels.tolist() == [0, 1, 0, 1, -1, -1]
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_block_solver(sample_dataframe, constraints, num_workers):
+    solutions = []
+    for decompose in [False, True]:
+        mb = ModelBuilder()
+        mb.create_variables(sample_dataframe, var_incr=1, var_decr=0, var_name='QUANTITY')
+        mb.build_model(sample_dataframe, constraints, obj_feature_name='CONTRIB', obj='max', load=not decompose)
+        solver = BlockSolver(mb) if decompose else mb
+        is_ok, values = solver.solve(num_workers) if decompose else solver.solve()
+        assert is_ok
+        solutions.append(values)
+    assert np.allclose(solutions[0], solutions[1])
+    assert solutions[1] == [0, 20, 20, 10, 50, 0]  # free variables move to the bound favoured by their cost
+    stats = {}
+    solver.populate_statistics(stats)
+    assert stats['decomposition']['num_blocks'] == 2
+    assert stats['decomposition']['num_free_columns'] == 2
+    assert stats['decomposition']['num_empty_rows'] == 1
+    assert [b['num_column'] for b in stats['decomposition']['blocks']] == [2, 2]
+    assert stats['solving']['status'] == 'Optimal'
+
+
+def test_block_solver_infeasible_empty_row(sample_dataframe):
+    mb = ModelBuilder()
+    mb.create_variables(sample_dataframe, var_incr=1, var_decr=0, var_name='QUANTITY')
+    mb.build_model(sample_dataframe, [Constraint(lb=1, ub=10, features=[{'name': 'STORE', 'values': [5]}])], 'CONTRIB', load=False)
+    is_ok, _ = BlockSolver(mb).solve(1)
+    assert not is_ok
@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.monitoring.progress import ProgressStream
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.monitored import MonitoredSolver, lagrangian_bound, relative_gap
+
+
+@pytest.fixture
+def sample_dataframe():
+    rng = np.random.default_rng(3)
+    data = {
+        'QUANTITY': rng.integers(1, 50, size=300),
+        'STORE': rng.integers(0, 10, size=300),
+        'CATEGORY': rng.choice(['A', 'B', 'C'], size=300),
+        'CONTRIB': rng.uniform(0, 1, size=300)
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints(sample_dataframe):
+    volume = sample_dataframe.groupby('STORE')['QUANTITY'].sum()
+    return [
+        Constraint(lb=0, ub=float(volume[store]), features=[{'name': 'STORE', 'values': [store]}]) for store in volume.index
+    ] + [
+        Constraint(lb=0, ub=float(sample_dataframe['QUANTITY'].sum() / 3), features=[{'name': 'CATEGORY', 'values': [c]}]) for c in 'ABC'
+    ]
+
+
+def build(df, constraints, obj='max'):
+    mb = ModelBuilder()
+    mb.highs_.impl_.setOptionValue('output_flag', False)
+    mb.create_variables(df, var_incr=1.5, var_decr=.5, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj=obj)
+    return mb
+
+
+@pytest.mark.parametrize('obj', ['max', 'min'])
+def test_lagrangian_bound(sample_dataframe, constraints, obj):
+    mb = build(sample_dataframe, constraints, obj)
+    mb.solve()
+    objective = mb.highs_.impl_.getInfo().objective_function_value
+    row_dual = np.array(mb.highs_.impl_.getSolution().row_dual)
+    assert np.isclose(lagrangian_bound(mb, row_dual), objective)
+    # any multipliers give a bound
+    sense = 1 if obj == 'max' else -1
+    for y in [np.zeros(len(row_dual)), np.random.default_rng(0).normal(size=len(row_dual))]:
+        assert sense * lagrangian_bound(mb, y) >= sense * objective - 1e-9
+
+
+def test_relative_gap():
+    assert relative_gap(None, 10) is None
+    assert relative_gap(8, 10) == .25
+
+
+def test_solve(tmp_path, sample_dataframe, constraints):
+    expected_ok, expected = build(sample_dataframe, constraints).solve()
+    mb = build(sample_dataframe, constraints)
+    stream = ProgressStream(str(tmp_path / 'progress.jsonl'))
+    solver = MonitoredSolver(mb, stream, interval=1e-6)
+    is_ok, values = solver.solve()
+    stream.close()
+    assert is_ok and expected_ok
+    assert np.isclose(mb.col_cost_ @ values, mb.col_cost_ @ expected)
+    assert solver.statistics_['status'] == 'Optimal' and not solver.statistics_['interrupted']
+    assert solver.statistics_['num_records'] > 1  # chunks of 10 iterations
+    assert len((tmp_path / 'progress.jsonl').read_text().splitlines()) == solver.statistics_['num_records']
+    assert mb.highs_.impl_.getOptionValue('presolve')[1] == 'choose'  # options restored
+
+
+def test_target_gap(sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints)
+    solver = MonitoredSolver(mb, interval=1e-6, target_gap=.05)
+    is_ok, values = solver.solve()
+    assert is_ok
+    statistics = solver.statistics_
+    assert statistics['status'] == 'Interrupted: target gap reached' and statistics['interrupted']
+    assert statistics['gap'] <= .05
+    values = np.array(values)
+    activity = mb.matrix_.dot(values)
+    assert ((values >= mb.col_lower_ - 1e-7) & (values <= mb.col_upper_ + 1e-7)).all()
+    assert ((activity >= mb.matrix_.lower_ - 1e-7) & (activity <= mb.matrix_.upper_ + 1e-7)).all()
+    assert np.isclose(mb.col_cost_ @ values, statistics['primal_bound'])
+    result = {}
+    solver.populate_statistics(result)
+    assert result['solving']['status'] == 'Interrupted: target gap reached'
+    assert result['progress']['iteration_count'] == result['solving']['iteration_count']
+
+
+def test_target_objective(sample_dataframe, constraints):
+    expected_ok, expected = build(sample_dataframe, constraints).solve()
+    optimum = build(sample_dataframe, constraints).col_cost_ @ expected
+    mb = build(sample_dataframe, constraints)
+    solver = MonitoredSolver(mb, interval=1e-6, target_objective=.9 * optimum)
+    is_ok, values = solver.solve()
+    assert is_ok
+    assert mb.col_cost_ @ values >= .9 * optimum - 1e-9
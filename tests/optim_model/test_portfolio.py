@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constants import SOLVER_STRATEGIES
+from inventory_optim.optim_model.portfolio import PortfolioSolver, parse_strategy
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40, 50, 60],
+        'STORE': [1, 1, 1, 2, 2, 2],
+        'CATEGORY': ["A", "A", "B", "A", "B", "B"],
+        'CONTRIB': [1, 2, 3, 4, 5, 6]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=0, ub=70, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=150, features=[{'name': 'STORE', 'values': [2]}]),
+        Constraint(lb=0, ub=120, features=[{'name': 'CATEGORY', 'values': ['B']}])
+    ]
+
+
+def build(df, constraints, load):
+    mb = ModelBuilder()
+    mb.create_variables(df, var_incr=2, var_decr=0, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj='max', load=load)
+    return mb
+
+
+def test_parse_strategy():
+    assert parse_strategy('ipm') == SOLVER_STRATEGIES['ipm']
+    assert parse_strategy('dual_simplex:2') == {**SOLVER_STRATEGIES['dual_simplex'], 'threads': 2}
+    with pytest.raises(AssertionError):
+        parse_strategy('pdlp')
+    with pytest.raises(AssertionError):
+        parse_strategy('ipm:x')
+
+
+def test_portfolio_solver(sample_dataframe, constraints):
+    reference = build(sample_dataframe, constraints, True)
+    is_ok, expected = reference.solve()
+    solver = PortfolioSolver(build(sample_dataframe, constraints, False), ['dual_simplex', 'ipm', 'primal_simplex:1'])
+    is_ok, values = solver.solve()
+    assert is_ok
+    contrib = sample_dataframe['CONTRIB'].to_numpy()
+    assert np.isclose(contrib @ np.array(values), contrib @ np.array(expected))
+    stats = {}
+    solver.populate_statistics(stats)
+    assert stats['solving']['status'] == 'Optimal'
+    assert stats['solving']['strategy'] == stats['portfolio']['winner']
+    outcomes = {s['strategy']: s['outcome'] for s in stats['portfolio']['strategies']}
+    assert sorted(outcomes) == ['dual_simplex', 'ipm', 'primal_simplex:1']
+    assert list(outcomes.values()).count('won') == 1
+    assert stats['lp'] == {'num_column': 6, 'num_row': 3, 'nonzero': 9}
+
+
+def test_portfolio_failed_strategy(sample_dataframe, constraints, monkeypatch):
+    monkeypatch.setitem(SOLVER_STRATEGIES, 'broken', {'solver': 'unknown'})
+    solver = PortfolioSolver(build(sample_dataframe, constraints, False), ['broken', 'dual_simplex'])
+    is_ok, values = solver.solve()
+    assert is_ok and solver.winner_ == 'dual_simplex'
+    broken = solver.statistics_['strategies'][0]
+    assert broken['status'] == 'failed' and 'invalid option' in broken['error']
@@ -0,0 +1,103 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.rounding import IntegralSolver, integral_bounds
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [1, 1, 1, 4, 4, 4],
+        'STORE': [1, 1, 1, 2, 2, 2],
+        'CATEGORY': ["A", "A", "B", "A", "B", "B"],
+        'CONTRIB': [1, 1.5, 2, 3, 1, 2]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [
+        Constraint(lb=5, ub=5, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=14.5, features=[{'name': 'STORE', 'values': [2]}]),
+        Constraint(lb=0, ub=12, features=[{'name': 'CATEGORY', 'values': ['B']}])
+    ]
+
+
+def build(df, constraints, load=True):
+    mb = ModelBuilder()
+    mb.create_variables(df, var_incr=2.5, var_decr=0, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj='max', load=load)
+    return mb
+
+
+def test_integral_bounds():
+    lo, hi, empty = integral_bounds(np.array([0, .5, 1.2, 2]), np.array([2.5, 3, 1.8, 2]), np.array([1, 1, 1.7, 2]))
+    assert lo.tolist() == [0, 1, 2, 2]
+    assert hi.tolist() == [2, 3, 2, 2]
+    assert empty.tolist() == [False, False, True, False]
+
+
+def test_solve(sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints)
+    solver = IntegralSolver(mb)
+    is_ok, values = solver.solve()
+    assert is_ok
+    values = np.array(values)
+    assert values.dtype.kind == 'i'
+    assert ((values >= mb.col_lower_) & (values <= mb.col_upper_)).all()
+    activity = mb.matrix_.dot(values)
+    assert ((activity >= mb.matrix_.lower_) & (activity <= mb.matrix_.upper_)).all()
+    assert solver.statistics_['num_violated_after_rounding'] > 0
+    assert solver.statistics_['num_violated'] == 0
+    assert solver.statistics_['objective'] <= solver.statistics_['lp_objective']
+    assert solver.statistics_['gap'] >= 0
+
+
+def test_repair(sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints)
+    solver = IntegralSolver(mb)
+    lo, hi, _ = integral_bounds(mb.col_lower_, mb.col_upper_, mb.col_lower_)
+    x = np.array([0, 0, 0, 10, 0, 10.])  # store 1 misses 5 units, store 2 exceeds by 5.5
+    x_lp = np.array([1, 1.5, 2.5, 10, 0, 4.5])
+    repaired, rounds = solver.repair(x, x_lp, lo, hi, 1)
+    assert rounds >= 1
+    assert len(solver.violated_rows(repaired)) == 0
+    # the most profitable items of store 1 are filled first, the least profitable of store 2 are emptied first
+    assert repaired.tolist() == [1, 2, 2, 10, 0, 4]
+
+
+def test_polish(sample_dataframe, constraints):
+    mb = build(sample_dataframe, constraints)
+    solver = IntegralSolver(mb)
+    lo, hi, _ = integral_bounds(mb.col_lower_, mb.col_upper_, mb.col_lower_)
+    x = np.array([0, 0, 0, 10, 0, 4.])
+    polished, statistics = solver.polish(x, solver.violated_rows(x), lo, hi, 1)
+    assert statistics['status'] == 'Optimal'
+    assert len(solver.violated_rows(polished)) == 0
+    assert polished[:3].tolist() == [1, 2, 2]
+    assert (polished[3:] == x[3:]).all()
+
+
+def test_residual_violations(sample_dataframe):
+    # store 1 requires 7 units but its items can hold 2 each
+    mb = build(sample_dataframe, [Constraint(lb=7, ub=7, features=[{'name': 'STORE', 'values': [1]}])])
+    solver = IntegralSolver(mb)
+    is_ok, values = solver.solve()
+    assert is_ok
+    assert values[:3] == [2, 2, 2]
+    assert solver.statistics_['polish']['num_column'] == 3
+    assert solver.statistics_['num_violated'] == 1
+
+
+def test_populate_statistics(sample_dataframe, constraints):
+    solver = IntegralSolver(build(sample_dataframe, constraints))
+    solver.solve()
+    statistics = {}
+    solver.populate_statistics(statistics)
+    assert statistics['solving']['status'] == 'Optimal'
+    assert statistics['integral']['repair(s)'] >= 0
+    assert set(statistics['integral']).issuperset({'lp_objective', 'objective', 'gap', 'num_repaired', 'polish'})
@@ -0,0 +1,52 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraint_table import ConstraintTable
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.builder import get_constraint_scope
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.util import SyntheticInventoryData, SyntheticConstraints
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40],
+        'CATEGORY': ["A", "B", "A", None],
+        'STORE': [1, 1, 2, 2]
+    }
+    return pd.DataFrame(data)
+
+
+def test_get_scope(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    assert np.array_equal(index.get_scope(Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}])), [0, 2])
+    assert np.array_equal(index.get_scope(Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A', 'B']}])), [0, 1, 2])
+    assert np.array_equal(index.get_scope(Constraint(lb=0, ub=10, features=[
+        {'name': 'CATEGORY', 'values': ['A']}, {'name': 'STORE', 'values': [2]}
+    ])), [2])
+    assert np.array_equal(index.get_scope(Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['Z']}])), [])
+    assert np.array_equal(index.get_scope(Constraint(lb=0, ub=10, features=[])), [0, 1, 2, 3])
+
+
+def test_get_scope_unknown_feature(sample_dataframe):
+    with pytest.raises(KeyError):
+        ScopeIndex(sample_dataframe).get_scope(Constraint(lb=0, ub=10, features=[{'name': 'REGION', 'values': ['R1']}]))
+
+
+def test_get_scope_matches_query():
+    df = SyntheticInventoryData.generate(2000)
+    index = ScopeIndex(df)
+    for constraint in SyntheticConstraints.generate(df, 50):
+        assert np.array_equal(index.get_scope(constraint), get_constraint_scope(df, constraint))
+
+
+def test_table_scopes():
+    df = SyntheticInventoryData.generate(2000)
+    index = ScopeIndex(df)
+    constraints = SyntheticConstraints.generate(df, 50) + [Constraint(lb=0, ub=1, features=[{'name': 'store', 'values': [-1]}])]
+    scopes = index.table_scopes(ConstraintTable.from_constraints(constraints))
+    assert len(scopes) == len(constraints)
+    for scope, constraint in zip(scopes, constraints):
+        assert np.array_equal(scope, index.get_scope(constraint))
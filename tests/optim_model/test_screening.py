@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.optim_model.screening import ScopeScreening, scope_atoms
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 10, 20, 30],
+        'STORE': [1, 1, 1, 2, 2, 2],
+        'CATEGORY': ["A", "B", "C", "A", "B", "C"]
+    }
+    return pd.DataFrame(data)
+
+
+def screening(df, constraints):
+    matrix = ConstraintMatrix.compile(ScopeIndex(df), constraints)
+    quantity = df['QUANTITY'].to_numpy(dtype=np.float64)
+    return ScopeScreening(matrix, 0 * quantity, 1.5 * quantity)
+
+
+def test_scope_atoms(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=100, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'CATEGORY', 'values': ['A', 'B']}])
+    ]
+    matrix = ConstraintMatrix.compile(ScopeIndex(sample_dataframe), constraints)
+    quantity = sample_dataframe['QUANTITY'].to_numpy(dtype=np.float64)
+    atoms, atom_lower, atom_upper = scope_atoms(matrix, quantity, 2 * quantity)
+    # store 1 and A/B, store 1 and C, store 2 and A/B, store 2 and C
+    assert atoms.num_col_ == 4
+    assert atom_lower.sum() == quantity.sum()
+    assert sorted(atom_lower.tolist()) == [30, 30, 30, 30]
+    assert sorted(np.diff(atoms.start_).tolist()) == [2, 2]
+
+
+def test_nested_conflict(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=1000, features=[]),
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=15, ub=100, features=[{'name': 'STORE', 'values': [1]}, {'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=30, ub=100, features=[{'name': 'STORE', 'values': [1]}, {'name': 'CATEGORY', 'values': ['B']}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'STORE', 'values': [1]}, {'name': 'CATEGORY', 'values': ['C']}])
+    ]
+    # every constraint is satisfiable on its own, but the lower bounds of the categories of store 1 exceed its cap
+    conflicts = screening(sample_dataframe, constraints).find_conflicts()
+    assert len(conflicts) == 1
+    assert conflicts[0]['method'] == 'propagation'
+    assert conflicts[0]['constraints'] == [1, 2, 3]
+    assert conflicts[0]['violation'] == pytest.approx(5)
+
+
+def test_equality_out_of_reach(sample_dataframe):
+    constraints = [
+        Constraint(lb=150, ub=150, features=[]),
+        Constraint(lb=0, ub=70, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=60, features=[{'name': 'STORE', 'values': [2]}])
+    ]
+    # each store can hold 90, the global equality needs both caps to be out of reach
+    conflicts = screening(sample_dataframe, constraints).find_conflicts()
+    assert [(c['constraints'], c['method']) for c in conflicts] == [([0, 1, 2], 'propagation')]
+    assert conflicts[0]['violation'] == pytest.approx(20)
+
+
+def test_overlapping_conflict(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=20, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [2]}]),
+        Constraint(lb=64, ub=1000, features=[{'name': 'CATEGORY', 'values': ['A', 'B']}]),
+        Constraint(lb=0, ub=1000, features=[{'name': 'CATEGORY', 'values': ['C']}])
+    ]
+    # categories A and B span both stores without being contained in either, propagation cannot see the conflict
+    screen = screening(sample_dataframe, constraints)
+    assert screen.propagate() == []
+    conflicts = screen.find_conflicts()
+    assert [(c['constraints'], c['method']) for c in conflicts] == [([0, 1, 2], 'lp')]
+    assert conflicts[0]['violation'] == pytest.approx(4)
+
+
+def test_feasible(sample_dataframe):
+    constraints = [
+        Constraint(lb=100, ub=150, features=[]),
+        Constraint(lb=0, ub=60, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=30, ub=100, features=[{'name': 'CATEGORY', 'values': ['A', 'B']}])
+    ]
+    screen = screening(sample_dataframe, constraints)
+    assert screen.find_conflicts() == []
+    assert screen.statistics_['lp_violation'] == pytest.approx(0)
+
+
+def test_irreducible(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=50, ub=100, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=0, ub=100, features=[{'name': 'STORE', 'values': [2]}])
+    ]
+    screen = screening(sample_dataframe, constraints)
+    assert screen.irreducible([0, 1, 2]) == [0, 1]
+    assert screen.elastic(np.array([0, 1]))[0] == pytest.approx(10)
+
+
+def test_pair_conflict_without_solver(sample_dataframe, monkeypatch):
+    constraints = [
+        Constraint(lb=0, ub=40, features=[{'name': 'STORE', 'values': [1]}]),
+        Constraint(lb=45, ub=100, features=[{'name': 'STORE', 'values': [1]}, {'name': 'CATEGORY', 'values': ['C']}])
+    ]
+    expected = screening(sample_dataframe, constraints).elastic(np.array([0, 1]))[0]
+    monkeypatch.setattr(ScopeScreening, 'elastic', lambda *args: pytest.fail('the solver is not needed'))
+    conflicts = screening(sample_dataframe, constraints).find_conflicts()
+    assert [(c['constraints'], c['method']) for c in conflicts] == [([0, 1], 'propagation')]
+    assert conflicts[0]['violation'] == pytest.approx(expected)
@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.data_model.item_table import ItemTable
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.sensitivity import SensitivityReport
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'id': ['a', 'b', 'c'],
+        'QUANTITY': [5, 5, 5],
+        'STORE': [1, 1, 1],
+        'CONTRIB': [3, 2, 1]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def constraints():
+    return [Constraint(lb=0, ub=15, features=[{'name': 'STORE', 'values': [1]}])]
+
+
+def solve(df, constraints, bulk=True):
+    mb = ModelBuilder()
+    mb.highs_.impl_.setOptionValue('output_flag', False)
+    mb.create_variables(df, var_incr=2, var_decr=0, var_name='QUANTITY')
+    mb.build_model(df, constraints, obj_feature_name='CONTRIB', obj='max', bulk=bulk)
+    assert mb.solve()[0]
+    return mb
+
+
+def test_sensitivity_report(sample_dataframe, constraints):
+    mb = solve(sample_dataframe, constraints)
+    report = SensitivityReport.from_model(mb, constraints, ItemTable.wrap(sample_dataframe), 'id')
+    rows = report.constraints_.to_frame()
+    assert rows.columns.tolist()[:3] == ['constraint', 'features', 'lb']
+    assert rows['features'][0] == '[{"name": "STORE", "values": [1]}]'
+    assert rows['activity'][0] == 15 and rows['dual'][0] == 2  # the marginal item b is worth 2 per unit
+    assert (rows['bound_dn'][0], rows['bound_up'][0]) == (10, 20)  # while b stays between its bounds
+    assert (rows['bound_dn_objective'][0], rows['bound_up_objective'][0]) == (30, 50)
+    items = report.items_.to_frame()
+    assert items['id'].tolist() == ['a', 'b', 'c']
+    assert items['value'].tolist() == [10, 5, 0]
+    assert items['reduced_cost'].tolist() == [1, 0, -1]
+    assert items['cost_up'].tolist()[1:] == [3, 2] and items['cost_dn'].tolist()[:2] == [2, 1]
+    assert report.summary_ == {'objective': 40, 'dual_valid': True, 'ranging_valid': True, 'num_binding_constraints': 1}
+
+
+def test_sensitivity_report_without_ids(sample_dataframe, constraints):
+    report = SensitivityReport.from_model(solve(sample_dataframe, constraints))
+    assert report.items_.columns[:2] == ['item', 'value']
+    assert report.constraints_.to_frame()['features'].isna().all()
+    with pytest.raises(AssertionError):
+        SensitivityReport.from_model(solve(sample_dataframe, constraints, bulk=False))
@@ -0,0 +1,66 @@
+import pytest
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint
+from inventory_optim.optim_model.session import WhatIfSession
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30],
+        'CATEGORY': ["A", "B", "A"],
+        'CONTRIB': [11, 10, 10],
+        'PRICE': [1, 3, 2]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def session(sample_dataframe):
+    constraints = [
+        Constraint(lb=0, ub=10, features=[{'name': 'CATEGORY', 'values': ['A']}]),
+        Constraint(lb=0, ub=10, features=[])
+    ]
+    return WhatIfSession(sample_dataframe, constraints, 'QUANTITY', 'CONTRIB', var_incr=1, var_decr=0)
+
+
+def test_session_deltas(session):
+    is_ok, values = session.solve()
+    assert is_ok
+    assert values == [10, 0, 0]
+    session.change_constraint_bounds([1], [0], [40])
+    assert session.solve()[1] == [10, 20, 0]
+    session.change_objective('PRICE')
+    assert session.solve()[1] == [0, 20, 10]
+    rows = session.add_constraints([Constraint(lb=0, ub=5, features=[{'name': 'CATEGORY', 'values': ['B']}])])
+    assert rows == [2]
+    assert session.solve()[1] == [0, 5, 10]
+    session.remove_constraints([0])
+    assert session.solve()[1] == [5, 5, 30]
+    session.change_variable_bounds(var_incr=2)
+    assert session.solve()[1] == [0, 5, 35]
+    assert len(session.history_) == 6
+    assert all(record['warm_start'] for record in session.history_[1:])
+    assert session.history_[1]['deltas'] == ['change_constraint_bounds(1)']
+
+
+def test_session_statistics(session):
+    session.solve()
+    stats = {}
+    session.populate_statistics(stats)
+    assert stats['lp']['num_row'] == 2
+    assert stats['what_if'][0]['deltas'] == ['build']
+    assert stats['what_if'][0]['status'] == 'Optimal'
+
+
+def test_session_max_history(sample_dataframe):
+    session = WhatIfSession(sample_dataframe, [Constraint(lb=0, ub=10, features=[])], 'QUANTITY', 'CONTRIB', var_incr=1, var_decr=0, max_history=2)
+    for ub in [10, 20, 30]:
+        session.change_constraint_bounds([0], [0], [ub])
+        session.solve()
+    assert len(session.history_) == 2
+    assert session.history_[-1]['objective'] == session.highs.getInfo().objective_function_value
+    stats = {}
+    session.populate_statistics(stats)
+    assert len(stats['what_if']) == 2
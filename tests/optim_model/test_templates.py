@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from inventory_optim.data_model.constraints import Constraint, ConstraintTemplate
+from inventory_optim.optim_model.builder import ModelBuilder
+from inventory_optim.optim_model.constraint_matrix import ConstraintMatrix
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.optim_model.templates import expand_template, compile_constraints
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'QUANTITY': [10, 20, 30, 40, 50, 60, 70],
+        'STORE': [1, 1, 1, 2, 2, 2, None],
+        'CATEGORY': ["A", "A", "B", "A", "B", "B", "A"],
+        'REGION': ["N", "N", "N", "S", "S", "N", "N"],
+        'CONTRIB': [1, 2, 3, 4, 5, 6, 7]
+    }
+    return pd.DataFrame(data)
+
+
+def explicit(df, group_by, features=None):
+    """
+    Reference expansion: one explicit constraint per observed group.
+    """
+    constraints = []
+    for key, _ in df.dropna(subset=group_by).groupby(group_by, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        constraints.append(Constraint(lb=0, ub=0, features=(features or []) + [{'name': n, 'values': [v]} for n, v in zip(group_by, key)]))
+    return constraints
+
+
+def test_group_scopes(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    keys, start, rows = index.group_scopes(['STORE', 'CATEGORY'])
+    assert keys == [(1., 'A'), (1., 'B'), (2., 'A'), (2., 'B')]
+    assert start.tolist() == [0, 2, 3, 4, 6]
+    assert rows.tolist() == [0, 1, 2, 3, 4, 5]
+    keys, start, rows = index.group_scopes(['CATEGORY'], [{'name': 'REGION', 'values': ['N']}])
+    assert keys == [('A',), ('B',)]
+    assert [rows[start[i]:start[i + 1]].tolist() for i in range(len(keys))] == [[0, 1, 6], [2, 5]]
+
+
+def test_expand_template_ratio(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    template = ConstraintTemplate(group_by=['STORE', 'CATEGORY'], reference='QUANTITY', lb_ratio=.5, ub_ratio=2.)
+    constraints, matrix = expand_template(index, template)
+    reference = ConstraintMatrix.compile(index, explicit(sample_dataframe, ['STORE', 'CATEGORY']))
+    assert np.array_equal(matrix.start_, reference.start_) and np.array_equal(matrix.index_, reference.index_)
+    assert matrix.lower_.tolist() == [15., 15., 20., 55.]
+    assert matrix.upper_.tolist() == [60., 60., 80., 220.]
+    assert constraints[3] == Constraint(lb=55., ub=220., features=[{'name': 'STORE', 'values': [2.]}, {'name': 'CATEGORY', 'values': ['B']}])
+    assert np.array_equal(ConstraintMatrix.compile(index, constraints).index_, matrix.index_)
+
+
+def test_expand_template_bounds(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    features = [{'name': 'REGION', 'values': ['N']}]
+    template = ConstraintTemplate(group_by=['CATEGORY'], features=features,
+                                  bounds={'keys': [['B'], ['C'], ['A']], 'lb': [1, 2, 3], 'ub': [10, 20, 30]})
+    constraints, matrix = expand_template(index, template)
+    assert matrix.lower_.tolist() == [1, 2, 3] and matrix.upper_.tolist() == [10, 20, 30]
+    assert matrix.start_.tolist() == [0, 2, 2, 5]
+    assert matrix.index_.tolist() == [2, 5, 0, 1, 6]
+    reference = ConstraintMatrix.compile(index, constraints)
+    assert np.array_equal(matrix.start_, reference.start_) and np.array_equal(matrix.index_, reference.index_)
+
+
+def test_compile_constraints(sample_dataframe):
+    index = ScopeIndex(sample_dataframe)
+    constraints = [Constraint(lb=0, ub=100, features=[{'name': 'STORE', 'values': [1]}])]
+    templates = [ConstraintTemplate(group_by=['STORE'], reference='QUANTITY', lb_ratio=0, ub_ratio=1.5)]
+    expanded, matrix = compile_constraints(index, constraints, templates)
+    assert len(expanded) == matrix.num_row == 3
+    assert expanded[0] == constraints[0]
+    assert matrix.upper_.tolist() == [100., 90., 225.]
+    assert compile_constraints(index, constraints)[0] is constraints
+
+
+def test_build_model_templates(sample_dataframe):
+    templates = [ConstraintTemplate(group_by=['STORE', 'CATEGORY'], reference='QUANTITY', lb_ratio=0, ub_ratio=1.)]
+    mb = ModelBuilder()
+    mb.create_variables(sample_dataframe, var_incr=2, var_decr=0, var_name='QUANTITY')
+    mb.build_model(sample_dataframe, [], obj_feature_name='CONTRIB', obj='max', templates=templates)
+    assert mb.matrix_.num_row == len(mb.constraints_) == 4
+    is_ok, values = mb.solve()
+    assert is_ok
+    assert np.allclose(mb.matrix_.dot(np.array(values)), mb.matrix_.upper_)
+    with pytest.raises(AssertionError):
+        ModelBuilder().build_model(sample_dataframe, [], obj_feature_name='CONTRIB', bulk=False, templates=templates)
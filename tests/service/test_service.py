@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pytest
+import pandas as pd
+
+from inventory_optim.data_model.shared_data import SharedDataset
+from inventory_optim.service.client import ServiceClient
+from inventory_optim.service.server import OptimService
+from inventory_optim.service.worker import make_job, run_job
+
+
+@pytest.fixture
+def sample_dataframe():
+    data = {
+        'ID': [1, 2, 3],
+        'QUANTITY': [10., 20., 30.],
+        'CATEGORY': ["A", "B", "A"],
+        'CONTRIB': [11., 10., 10.]
+    }
+    return pd.DataFrame(data)
+
+
+def make_constraints(ub):
+    return [{'lb': 0, 'ub': ub, 'features': [{'name': 'CATEGORY', 'values': ['A']}]}]
+
+
+def test_run_job(sample_dataframe):
+    dataset = SharedDataset.publish(sample_dataframe)
+    try:
+        request = {'dataset': 'test', 'constraints': make_constraints(10), 'var_col': 'QUANTITY', 'optim_col': 'CONTRIB',
+                   'var_incr': 2, 'var_decr': 0}
+        stats, values = run_job(make_job(request, 'job_1', 10), 0, dataset.descriptor_)
+        assert stats['status'] == 'done' and not stats['warm_model']
+        assert values.tolist() == [10, 40, 0]
+        request['constraints'] = make_constraints(20)
+        stats, values = run_job(make_job(request, 'job_2', 10), 0, dataset.descriptor_)
+        assert stats['status'] == 'done' and stats['warm_model'] and stats['warm_start']
+        assert stats['deltas'] == ['change_constraint_bounds(1)']
+        assert values.tolist() == [20, 40, 0]
+        request['constraints'] = make_constraints(100)
+        request['var_incr'] = 1
+        stats, values = run_job(make_job(request, 'job_3', 10), 1, dataset.descriptor_)  # new version of the dataset
+        assert stats['status'] == 'done' and not stats['warm_model']
+        assert values.tolist() == [10, 20, 30]
+        request['optim_col'] = 'UNKNOWN'
+        stats, values = run_job(make_job(request, 'job_4', 10), 1, dataset.descriptor_)
+        assert stats['status'] == 'failed' and values is None
+    finally:
+        dataset.close()
+
+
+@pytest.fixture
+def service(tmp_path):
+    socket_path = str(tmp_path / 'service.sock')
+    service = OptimService(num_workers=1, time_limit=10)
+    thread = threading.Thread(target=asyncio.run, args=(service.serve(socket_path),))
+    thread.start()
+    while service.server_ is None or not service.server_.is_serving():
+        thread.join(.05)
+    yield socket_path
+    with ServiceClient(socket_path) as client:
+        client.shutdown()
+    thread.join()
+
+
+def test_service(service, sample_dataframe, tmp_path):
+    sample_dataframe.to_csv(tmp_path / 'data.csv', index=False)
+    with ServiceClient(service) as client:
+        assert client.register('test', str(tmp_path / 'data.csv'))['num_rows'] == 3
+        stats, solution = client.solve('test', make_constraints(10), 'QUANTITY', 'CONTRIB', stream=True, var_incr=2,
+                                       var_decr=0, export_columns=['ID'], chunk_size=2)
+        assert stats['status'] == 'done'
+        assert solution.columns.tolist() == ['ID', 'opt']
+        assert solution['opt'].tolist() == [10, 40, 0]
+        stats, _ = client.solve('test', make_constraints(20), 'QUANTITY', 'CONTRIB', var_incr=2, var_decr=0,
+                                export_solution=str(tmp_path / 'solution.csv'))
+        assert stats['warm_model'] and 'export_solution(s)' in stats
+        assert pd.read_csv(tmp_path / 'solution.csv')['opt'].tolist() == [20, 40, 0]
+        assert client.solve('unknown', make_constraints(10), 'QUANTITY', 'CONTRIB')[0]['status'] == 'failed'
+        status = client.status()
+        assert status['datasets']['test']['num_rows'] == 3
+        assert status['num_jobs'] == 2 and status['pending_jobs'] == 0
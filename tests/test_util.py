@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from inventory_optim.optim_model.scope_index import ScopeIndex
+from inventory_optim.util import SyntheticInventoryData, SyntheticConstraints
+
+
+def test_generate_chunks():
+    chunks = list(SyntheticInventoryData.generate_chunks(2500, 1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    df = pd.concat(chunks, ignore_index=True)
+    assert df['id'].tolist() == list(range(1, 2501))
+    assert (df['quantity'] >= 0).all() and (df['unit_price'] >= .5).all()
+    assert df['gross_profit'].equals(df['gross_margin'] * df['unit_price'])
+    # every chunk only depends on its seed
+    assert chunks[1].equals(SyntheticInventoryData.generate_chunk(1000, 2000, [17, 1]))
+    assert SyntheticInventoryData.generate(1000).equals(chunks[0])
+
+
+def test_generate_nested():
+    df = pd.concat(SyntheticInventoryData.generate_chunks(5000, 2000), ignore_index=True)
+    volumes = SyntheticConstraints.scope_volumes([df.iloc[:2000], df.iloc[2000:]])
+    assert volumes['quantity'].sum() == df['quantity'].sum()
+    constraints = SyntheticConstraints.generate_nested(volumes, 30, depth=2, margin=0)
+    assert len(constraints) == 3 + 9  # not enough combinations of category and region
+    index, reference = ScopeIndex(df), df['quantity'].to_numpy()
+    for constraint in constraints:
+        volume = reference[index.get_scope(constraint)].sum()
+        assert constraint['lb'] == constraint['ub'] == volume
+        assert [f['name'] for f in constraint['features']] == ['category', 'region'][:len(constraint['features'])]
+    constraints = SyntheticConstraints.generate_nested(volumes, 20)
+    assert len(constraints) == 20
+    parents = {tuple(f['values'][0] for f in c['features']) for c in constraints}
+    assert all(tuple(f['values'][0] for f in c['features'][:-1]) in parents for c in constraints if len(c['features']) > 1)
+    assert np.bincount([len(c['features']) for c in constraints]).tolist() == [0, 3, 8, 9]